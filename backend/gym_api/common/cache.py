@@ -0,0 +1,90 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'response-cache'
+
+
+def _version_key(group):
+    return f'{KEY_PREFIX}:version:{group}'
+
+
+def _bump(groups):
+    for group in groups:
+        try:
+            cache.incr(_version_key(group))
+        except ValueError:
+            cache.set(_version_key(group), 2, None)
+
+
+def invalidate(*groups):
+    """
+    Evict every cached response that depends on ``groups``.
+
+    Entries are keyed on the group versions, so bumping a version makes the
+    old entries unreachable and they age out on their own. The bump runs
+    again on commit so a response rebuilt from pre-commit data inside the
+    transaction window cannot outlive it.
+    """
+    _bump(groups)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(groups))
+
+
+def versions(groups):
+    """
+    Current version of each group, as a key fragment
+    """
+    stored = cache.get_many([_version_key(group) for group in groups])
+    return ','.join(f'{group}={stored.get(_version_key(group), 1)}' for group in groups)
+
+
+def response_key(request, groups):
+    """
+    Cache key for a GET: path, normalized query params and group versions
+    """
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    raw = '|'.join([request.path, repr(params), versions(groups)])
+    return f'{KEY_PREFIX}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def get_or_build(key, build, timeout=None):
+    """
+    Return the cached value for ``key``, building it on a miss.
+
+    Only one caller rebuilds a missing entry: it takes a short lock with
+    ``cache.add`` while the others poll for the result. If the builder does
+    not finish within ``RESPONSE_CACHE_LOCK_TIMEOUT`` the waiters build it
+    themselves. ``build`` may return None to skip caching.
+    Returns (value, hit).
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+
+    timeout = timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60)
+    lock_timeout = getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 5)
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, lock_timeout):
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = cache.get(key)
+            if value is not None:
+                return value, True
+        return build(), False
+
+    try:
+        value = build()
+        if value is not None:
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value, False
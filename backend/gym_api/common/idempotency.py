@@ -0,0 +1,126 @@
+"""
+Idempotency-Key support for write endpoints.
+
+The first response to a keyed request is stored in IdempotencyKey; a retry
+with the same key, user and endpoint gets that response back without the
+handler running again. Keys expire after ``IDEMPOTENCY_KEY_TTL`` seconds.
+The reservation, the handler's writes and the stored response share one
+transaction, so a crash at any point leaves neither the order nor the key
+behind and the retry runs for real.
+"""
+import datetime
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _digest(request):
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    raw = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _reserve(user, scope, key, digest):
+    """
+    Claim ``key`` for this request.
+    Returns (record, None) when the handler should run, or (None, response)
+    when the request is a retry, a conflicting reuse or still in flight.
+    """
+    now = timezone.now()
+    lookup = {'user': user, 'scope': scope, 'key': key}
+    IdempotencyKey.objects.filter(expires_at__lte=now, **lookup).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(request_hash=digest, expires_at=now + _ttl(), **lookup), None
+    except IntegrityError:
+        existing = IdempotencyKey.objects.filter(**lookup).first()
+    if existing is None:
+        # The other request failed and released the key in the meantime
+        return _reserve(user, scope, key, digest)
+    if existing.request_hash != digest:
+        return None, Response(
+            {'detail': 'Idempotency-Key was already used with a different request body'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if existing.response_status is None:
+        return None, Response(
+            {'detail': 'A request with this Idempotency-Key is still being processed'},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return None, Response(
+        existing.response_body, status=existing.response_status, headers={REPLAYED_HEADER: 'true'}
+    )
+
+
+def _store(record, response):
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        response_status=response.status_code, response_body=response.data
+    )
+
+
+def idempotent(handler):
+    """
+    Decorate a view handler (``create``, a ``@action``) to honour Idempotency-Key.
+
+    Requests without the header, or from anonymous users, run as usual.
+    Responses below 500 are stored; server errors and exceptions roll back
+    the whole transaction, key included, so the client can retry for real.
+    A concurrent request with the same key waits on the unique constraint
+    until the first one commits and then gets its stored response.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            record, response = _reserve(request.user, f'{request.method} {request.path}', key, _digest(request))
+            if response is not None:
+                return response
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+            else:
+                _store(record, response)
+        return response
+    return wrapper
+
+
+def purge_expired(batch_size=1000):
+    """
+    Delete expired keys in batches; returns the number removed
+    """
+    total = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        total += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gym_api.common import outbox
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox events to their handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Events claimed per batch')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between polls with --loop')
+        parser.add_argument('--replay-failed', nargs='?', const='', default=None, metavar='TOPIC',
+                            help='Requeue failed events (optionally only TOPIC) before processing')
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help='Delete events processed more than this many days ago')
+
+    def handle(self, *args, **options):
+        if options['replay_failed'] is not None:
+            count = outbox.replay_failed(options['replay_failed'] or None)
+            self.stdout.write(f'Requeued {count} failed events')
+        if options['purge_days'] is not None:
+            count = outbox.purge_done(options['purge_days'])
+            self.stdout.write(f'Purged {count} processed events')
+
+        while True:
+            succeeded, failed = outbox.process_outbox(
+                batch_size=options['batch_size'], max_batches=options['max_batches']
+            )
+            if succeeded or failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Processed {succeeded} events, {failed} failed'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.common import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses past their TTL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Keys deleted per statement')
+
+    def handle(self, *args, **options):
+        total = idempotency.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {total} idempotency keys'))
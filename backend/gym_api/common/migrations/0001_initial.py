@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+import gym_api.common.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadedImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to=gym_api.common.models.upload_image_path, verbose_name='图片')),
+                ('business_type', models.CharField(choices=[('user', '用户头像'), ('course', '课程图片'), ('news', '新闻图片'), ('banner', '轮播图'), ('other', '其他')], default='other', max_length=20, verbose_name='业务类型')),
+                ('business_id', models.IntegerField(blank=True, help_text='关联的业务对象ID，如用户ID、课程ID等', null=True, verbose_name='业务ID')),
+                ('title', models.CharField(blank=True, max_length=100, null=True, verbose_name='标题')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='描述')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否激活')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '上传图片',
+                'verbose_name_plural': '上传图片',
+                'db_table': 'gym_uploaded_image',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='uploadedimage',
+            index=models.Index(fields=['business_type', 'business_id', 'is_active'], name='gym_image_business'),
+        ),
+    ]
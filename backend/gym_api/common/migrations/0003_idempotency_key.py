@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:42
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_uploadedimage_business_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name='幂等键')),
+                ('scope', models.CharField(help_text='请求方法和路径，如 POST /api/orders/', max_length=255, verbose_name='接口')),
+                ('request_hash', models.CharField(max_length=32, verbose_name='请求摘要')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='响应状态码')),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='响应内容')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='过期时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '幂等键',
+                'verbose_name_plural': '幂等键',
+                'db_table': 'gym_idempotency_key',
+                'constraints': [models.UniqueConstraint(fields=('user', 'scope', 'key'), name='gym_idempotency_unique_key')],
+            },
+        ),
+    ]
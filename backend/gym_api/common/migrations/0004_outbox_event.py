@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:50
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=100, verbose_name='事件类型')),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='事件内容')),
+                ('status', models.CharField(choices=[('pending', '待处理'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=10, verbose_name='状态')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='尝试次数')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='可处理时间')),
+                ('claimed_by', models.CharField(blank=True, default='', max_length=64, verbose_name='处理进程')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='最近错误')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='处理时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '发件箱事件',
+                'verbose_name_plural': '发件箱事件',
+                'db_table': 'gym_outbox_event',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='gym_outbox_due'), models.Index(fields=['claimed_by'], name='gym_outbox_claim')],
+            },
+        ),
+    ]
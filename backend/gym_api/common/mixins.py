@@ -0,0 +1,300 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max, Prefetch
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from . import cache as response_cache
+
+
+class _RelationNode:
+    """
+    One model in the relation tree walked by the query planner
+    """
+    def __init__(self, model):
+        self.model = model
+        self.single = {}  # FK / one-to-one children, joined with select_related
+        self.many = {}    # reverse FK / m2m children, loaded with prefetch_related
+
+    def child(self, name):
+        """
+        Return the child node for relation ``name``, creating it if needed.
+        Returns None when ``name`` is not a relation on this model.
+        """
+        if name in self.single:
+            return self.single[name]
+        if name in self.many:
+            return self.many[name]
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation or field.related_model is None:
+            return None
+        node = _RelationNode(field.related_model)
+        if field.many_to_many or field.one_to_many:
+            self.many[name] = node
+        else:
+            self.single[name] = node
+        return node
+
+    def add_path(self, path):
+        """
+        Walk a dotted (``course.instructor.get_full_name``) or double
+        underscore path, stopping at the first non-relation attribute.
+        """
+        node = self
+        for part in path.replace('__', '.').split('.'):
+            node = node.child(part)
+            if node is None:
+                return
+
+    def compile(self, prefix=''):
+        """
+        Turn the tree into (select_related paths, prefetch lookups)
+        """
+        select, prefetch = [], []
+        for name, node in self.single.items():
+            path = f'{prefix}{name}'
+            select.append(path)
+            child_select, child_prefetch = node.compile(f'{path}__')
+            select.extend(child_select)
+            prefetch.extend(child_prefetch)
+        for name, node in self.many.items():
+            child_select, child_prefetch = node.compile()
+            queryset = node.model._default_manager.all()
+            if child_select:
+                queryset = queryset.select_related(*child_select)
+            if child_prefetch:
+                queryset = queryset.prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(f'{prefix}{name}', queryset=queryset))
+        return select, prefetch
+
+
+def _walk_serializer(serializer_class, node):
+    """
+    Record the relations a serializer class will touch on ``node.model``.
+
+    Only declared fields are inspected so that building the plan never
+    instantiates the serializer's full field set. Relations read from
+    SerializerMethodFields can be listed in ``Meta.planned_relations``.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    for path in getattr(meta, 'planned_relations', ()):
+        node.add_path(path)
+
+    for name, field in getattr(serializer_class, '_declared_fields', {}).items():
+        if getattr(field, 'write_only', False):
+            continue
+        source = field.source or name
+        if source == '*':
+            continue
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.BaseSerializer):
+            child = node
+            for part in source.split('.'):
+                child = child.child(part) if child is not None else None
+            if child is not None:
+                _walk_serializer(type(nested), child)
+            continue
+
+        if '.' in source:
+            node.add_path(source)
+
+
+_plan_cache = {}
+
+
+def plan_for_serializer(serializer_class):
+    """
+    Return the cached (select_related, prefetch_related) plan for a model serializer
+    """
+    if serializer_class not in _plan_cache:
+        model = serializer_class.Meta.model
+        root = _RelationNode(model)
+        _walk_serializer(serializer_class, root)
+        _plan_cache[serializer_class] = root.compile()
+    return _plan_cache[serializer_class]
+
+
+class SerializerQueryPlanMixin:
+    """
+    Apply select_related/prefetch_related derived from the view's serializer.
+
+    The plan is applied in ``filter_queryset`` so it covers both list
+    endpoints and ``get_object`` on detail endpoints, regardless of how the
+    view builds its base queryset. When ``QUERY_PLAN_DEBUG_HEADER`` is on
+    (defaults to ``DEBUG``) the planned relations are reported in the
+    ``X-Query-Plan`` response header.
+    """
+    query_plan_header = 'X-Query-Plan'
+
+    def get_query_plan(self):
+        serializer_class = self.get_serializer_class()
+        if not hasattr(getattr(serializer_class, 'Meta', None), 'model'):
+            return [], []
+        return plan_for_serializer(serializer_class)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        select, prefetch = self.get_query_plan()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(settings, 'QUERY_PLAN_DEBUG_HEADER', settings.DEBUG) and request.method == 'GET':
+            select, prefetch = self.get_query_plan()
+            response[self.query_plan_header] = 'select={}; prefetch={}'.format(
+                ','.join(select) or '-',
+                ','.join(lookup.prefetch_through for lookup in prefetch) or '-',
+            )
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified handling for list and detail GETs.
+
+    Validators come from one aggregate over the filtered queryset (lists) or
+    the object's row (detail): MAX(updated_at) and COUNT of the rows, plus
+    the newest timestamp and row count of every relation path named in
+    ``conditional_related`` (e.g. ``'category'``, ``'schedules__waitlist_entries'``),
+    so a change to serialized related data also changes the ETag. A matching
+    If-None-Match (or If-Modified-Since on detail) returns 304 before the
+    serializer runs.
+    """
+    conditional_related = ()
+
+    def _etag(self, request, *parts):
+        user = request.user
+        audience = user.role if user.is_authenticated else 'anonymous'
+        raw = '|'.join(str(part) for part in (request.get_full_path(), audience, *parts))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def _not_modified(self, request, etag, last_modified=None):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            matched = '*' in etags or etag in [tag.removeprefix('W/') for tag in etags]
+        elif last_modified is not None and request.META.get('HTTP_IF_MODIFIED_SINCE'):
+            since = parse_http_date_safe(request.META['HTTP_IF_MODIFIED_SINCE'])
+            matched = since is not None and int(last_modified.timestamp()) <= since
+        else:
+            matched = False
+        if matched:
+            return self._with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return None
+
+    def _with_validators(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def _related_stamp(self, path):
+        """
+        Timestamp lookup for the model at the end of relation ``path``
+        """
+        model = self.get_queryset().model
+        for name in path.split('__'):
+            model = model._meta.get_field(name).related_model
+        try:
+            model._meta.get_field('updated_at')
+        except FieldDoesNotExist:
+            return f'{path}__created_at'
+        return f'{path}__updated_at'
+
+    def get_conditional_stats(self, queryset):
+        """
+        (newest timestamp, validator parts) for ``queryset`` and its ``conditional_related`` paths
+        """
+        aggregates = {'modified_0': Max('updated_at'), 'count_0': Count('pk', distinct=True)}
+        for i, path in enumerate(self.conditional_related, start=1):
+            aggregates[f'modified_{i}'] = Max(self._related_stamp(path))
+            aggregates[f'count_{i}'] = Count(path, distinct=True)
+        stats = queryset.order_by().aggregate(**aggregates)
+        stamps = [stats[f'modified_{i}'] for i in range(len(self.conditional_related) + 1)]
+        present = [stamp for stamp in stamps if stamp is not None]
+        return max(present) if present else None, [*stamps, *(stats[f'count_{i}'] for i in range(len(stamps)))]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        _, parts = self.get_conditional_stats(queryset)
+        etag = self._etag(request, *parts)
+        # Deletions do not move MAX(updated_at), so lists only honour the ETag
+        not_modified = self._not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return self._with_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        last_modified, parts = self.get_conditional_stats(
+            type(instance)._default_manager.filter(pk=instance.pk)
+        )
+        etag = self._etag(request, *parts)
+        not_modified = self._not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self._with_validators(Response(serializer.data), etag, last_modified)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Shared cache for anonymous GETs on list and detail endpoints.
+
+    Anonymous users all see the same response, so it is cached per path and
+    normalized query string under the versions of ``response_cache_groups``.
+    Call ``gym_api.common.cache.invalidate(group)`` when the data behind a
+    group changes. Stored ETags are still honoured on a cache hit.
+    """
+    response_cache_groups = ()
+    response_cache_header = 'X-Cache'
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        if request.user.is_authenticated or not self.response_cache_groups:
+            return handler(request, *args, **kwargs)
+
+        def build():
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                self._uncached_response = response
+                return None
+            headers = {name: response[name] for name in ('ETag', 'Last-Modified') if response.has_header(name)}
+            return {'data': response.data, 'headers': headers}
+
+        self._uncached_response = None
+        key = response_cache.response_key(request, self.response_cache_groups)
+        entry, hit = response_cache.get_or_build(key, build)
+        if entry is None:
+            return self._uncached_response
+
+        etag = entry['headers'].get('ETag')
+        if hit and etag and hasattr(self, '_not_modified'):
+            not_modified = self._not_modified(request, etag)
+            if not_modified is not None:
+                for name, value in entry['headers'].items():
+                    not_modified[name] = value
+                not_modified[self.response_cache_header] = 'HIT'
+                return not_modified
+
+        response = Response(entry['data'])
+        for name, value in entry['headers'].items():
+            response[name] = value
+        response[self.response_cache_header] = 'HIT' if hit else 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
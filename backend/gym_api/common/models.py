@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import os
 import uuid
@@ -47,6 +50,9 @@ class UploadedImage(models.Model):
         verbose_name_plural = _('上传图片')
         db_table = 'gym_uploaded_image'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['business_type', 'business_id', 'is_active'], name='gym_image_business'),
+        ]
         
     def __str__(self):
         return f"{self.get_business_type_display()} - {self.title or self.id}"
@@ -57,4 +63,67 @@ class UploadedImage(models.Model):
     
     @property
     def file_url(self):
-        return self.image.url if self.image else None 
\ No newline at end of file
+        return self.image.url if self.image else None 
+
+class IdempotencyKey(models.Model):
+    """
+    写接口的幂等键记录
+
+    同一用户在同一接口上重复提交相同的 Idempotency-Key 时，直接返回首次响应，
+    不再重复执行业务逻辑。response_status 为空表示首次请求仍在处理中。
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    key = models.CharField(_('幂等键'), max_length=255)
+    scope = models.CharField(_('接口'), max_length=255, help_text=_('请求方法和路径，如 POST /api/orders/'))
+    request_hash = models.CharField(_('请求摘要'), max_length=32)
+    response_status = models.PositiveSmallIntegerField(_('响应状态码'), null=True, blank=True)
+    response_body = models.JSONField(_('响应内容'), null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('过期时间'), db_index=True)
+
+    class Meta:
+        verbose_name = _('幂等键')
+        verbose_name_plural = _('幂等键')
+        db_table = 'gym_idempotency_key'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='gym_idempotency_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
+
+
+class OutboxEvent(models.Model):
+    """
+    事务发件箱事件
+
+    业务代码在自己的事务里写入事件，后台进程（process_outbox 命令）批量取出并调用
+    对应的处理函数，失败按退避策略重试，保证至少执行一次。
+    """
+    STATUS_CHOICES = (
+        ('pending', '待处理'),
+        ('done', '已完成'),
+        ('failed', '失败'),
+    )
+
+    topic = models.CharField(_('事件类型'), max_length=100)
+    payload = models.JSONField(_('事件内容'), default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(_('状态'), max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(_('尝试次数'), default=0)
+    available_at = models.DateTimeField(_('可处理时间'), default=timezone.now)
+    claimed_by = models.CharField(_('处理进程'), max_length=64, blank=True, default='')
+    last_error = models.TextField(_('最近错误'), blank=True, default='')
+    processed_at = models.DateTimeField(_('处理时间'), null=True, blank=True)
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('发件箱事件')
+        verbose_name_plural = _('发件箱事件')
+        db_table = 'gym_outbox_event'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='gym_outbox_due'),
+            models.Index(fields=['claimed_by'], name='gym_outbox_claim'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id} ({self.status})"
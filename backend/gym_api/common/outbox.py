@@ -0,0 +1,142 @@
+"""
+Transactional outbox.
+
+``publish`` writes an event in the caller's transaction, so the event
+exists exactly when the business change committed. The process_outbox
+command drains due events in batches and runs the handler registered for
+each topic. Handlers must tolerate running more than once: a worker that
+dies mid-batch leaves its claim to expire and the events are retried.
+"""
+import datetime
+import os
+import socket
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+_handlers = {}
+
+
+def handler(topic):
+    """
+    Register the function that processes events of ``topic``
+    """
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def publish(topic, **payload):
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _worker_id():
+    return f'{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def claim_batch(worker, batch_size=100):
+    """
+    Lease up to ``batch_size`` due events to ``worker`` with one UPDATE.
+    The lease (OUTBOX_LEASE_SECONDS) is pushed into ``available_at`` so a
+    crashed worker's events become due again on their own.
+    """
+    now = timezone.now()
+    due = list(
+        OutboxEvent.objects.filter(status='pending', available_at__lte=now)
+        .order_by('available_at', 'id').values_list('pk', flat=True)[:batch_size]
+    )
+    if not due:
+        return []
+    OutboxEvent.objects.filter(pk__in=due, status='pending', available_at__lte=now).update(
+        claimed_by=worker,
+        attempts=F('attempts') + 1,
+        available_at=now + datetime.timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300)),
+    )
+    return list(OutboxEvent.objects.filter(pk__in=due, claimed_by=worker, status='pending').order_by('id'))
+
+
+def _backoff(attempts):
+    base = _setting('OUTBOX_RETRY_BASE_SECONDS', 30)
+    return datetime.timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def _run(event):
+    func = _handlers.get(event.topic)
+    if func is None:
+        raise LookupError(f'No outbox handler registered for {event.topic!r}')
+    with transaction.atomic():
+        func(**event.payload)
+
+
+def process_batch(worker=None, batch_size=100):
+    """
+    Claim and process one batch. Returns (succeeded, failed) counts;
+    failed events are rescheduled with exponential backoff until
+    OUTBOX_MAX_ATTEMPTS, then parked as ``failed`` for replay.
+    """
+    worker = worker or _worker_id()
+    succeeded = failed = 0
+    for event in claim_batch(worker, batch_size):
+        try:
+            _run(event)
+        except Exception as exc:
+            failed += 1
+            now = timezone.now()
+            give_up = event.attempts >= _setting('OUTBOX_MAX_ATTEMPTS', 8)
+            OutboxEvent.objects.filter(pk=event.pk, claimed_by=worker).update(
+                status='failed' if give_up else 'pending',
+                available_at=now if give_up else now + _backoff(event.attempts),
+                last_error=f'{type(exc).__name__}: {exc}'[:2000],
+                claimed_by='',
+            )
+        else:
+            succeeded += 1
+            OutboxEvent.objects.filter(pk=event.pk, claimed_by=worker).update(
+                status='done', processed_at=timezone.now(), last_error='', claimed_by='',
+            )
+    return succeeded, failed
+
+
+def process_outbox(batch_size=100, max_batches=None):
+    """
+    Drain every due event. Returns (succeeded, failed) totals.
+    """
+    worker = _worker_id()
+    totals = [0, 0]
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        succeeded, failed = process_batch(worker, batch_size)
+        if not succeeded and not failed:
+            break
+        totals[0] += succeeded
+        totals[1] += failed
+        batches += 1
+    return tuple(totals)
+
+
+def replay_failed(topic=None):
+    """
+    Put parked events back in the queue; returns how many were requeued
+    """
+    events = OutboxEvent.objects.filter(status='failed')
+    if topic:
+        events = events.filter(topic=topic)
+    return events.update(status='pending', attempts=0, available_at=timezone.now(), claimed_by='')
+
+
+def purge_done(older_than_days=7):
+    """
+    Delete processed events older than ``older_than_days``
+    """
+    before = timezone.now() - datetime.timedelta(days=older_than_days)
+    return OutboxEvent.objects.filter(status='done', processed_at__lt=before).delete()[0]
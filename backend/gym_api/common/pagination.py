@@ -0,0 +1,180 @@
+import base64
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as FieldValidationError
+from django.db import connections
+from django.db.models import Max, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset):
+    """
+    Cheap row estimate for a queryset, or None when no estimate is available.
+
+    PostgreSQL: the planner's row estimate for the filtered query.
+    SQLite: MAX(id) of the table, used only when the queryset is unfiltered.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    if queryset.query.where:
+        return None
+    return queryset.model._default_manager.using(queryset.db).aggregate(n=Max('pk'))['n'] or 0
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (ordering field, id).
+
+    Each page is a range query on the composite key, so page N costs the same
+    as page 1. ``count`` is an estimate by default; pass ``?count=exact`` to
+    run COUNT(*). Views may set ``keyset_ordering`` to change the key and
+    ``keyset_ordering_fields`` to let clients pick another key field; clients
+    choose the field and direction with ``?ordering=<field>`` or ``-<field>``.
+    Page numbers are rejected: clients follow the ``next``/``previous`` links.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE', 10)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = 'ordering'
+    page_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.page_query_param in request.query_params:
+            raise ValidationError({
+                self.page_query_param: 'This list uses cursor pagination; follow the next and previous links',
+            })
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.key, self.descending = self.get_key(request, view)
+
+        self.count, self.count_is_exact = None, False
+        if request.query_params.get(self.count_query_param) == 'exact':
+            self.count, self.count_is_exact = queryset.order_by().count(), True
+        else:
+            self.count = estimate_count(queryset)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        backwards = bool(cursor and cursor.get('p'))
+        queryset = queryset.order_by(*self.order_by(reverse=backwards))
+        if cursor:
+            queryset = queryset.filter(self.after(cursor, backwards))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else True
+        self.has_previous = bool(cursor) and (has_more if backwards else True)
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_key(self, request, view):
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        key = ordering[0].lstrip('-')
+        descending = ordering[0].startswith('-')
+        requested = request.query_params.get(self.ordering_query_param)
+        if requested and requested.lstrip('-') in getattr(view, 'keyset_ordering_fields', (key,)):
+            key = requested.lstrip('-')
+            descending = requested.startswith('-')
+        return key, descending
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [f'{prefix}{self.key}', f'{prefix}id']
+
+    def after(self, cursor, backwards):
+        """
+        Rows strictly after the cursor position in the current direction
+        """
+        descending = self.descending != backwards
+        op = 'lt' if descending else 'gt'
+        value, pk = cursor['v'], cursor['id']
+        return Q(**{f'{self.key}__{op}': value}) | Q(**{self.key: value, f'id__{op}': pk})
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the cursor parameter; the key value is checked against the
+        key field's type so a tampered cursor is a 404, not a database error
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            value = cursor['v']
+            if value is None or isinstance(value, (list, dict)):
+                raise ValueError(value)
+            return {
+                'v': model._meta.get_field(self.key).to_python(value),
+                'id': int(cursor['id']),
+                'p': bool(cursor.get('p')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, FieldValidationError, FieldDoesNotExist):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row, previous=False):
+        value = getattr(row, self.key)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload = {'v': value, 'id': row.pk}
+        if previous:
+            payload['p'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], previous=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_is_exact', self.count_is_exact),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'count_is_exact': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
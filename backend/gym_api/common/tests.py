@@ -0,0 +1,98 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from io import StringIO
+from gym_api.utils.query_plan import QueryPlanAssertionsMixin
+from .models import IdempotencyKey, OutboxEvent, UploadedImage
+
+
+class ImageQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    def setUp(self):
+        for business_id in range(5):
+            UploadedImage.objects.create(
+                image=f'uploads/course/2024/01/course{business_id}.gif',
+                business_type='course',
+                business_id=business_id,
+            )
+
+    def test_image_by_business_uses_business_index(self):
+        with self.assertNoFullScan('gym_uploaded_image'):
+            response = self.client.get(reverse('uploads:image-by-business', args=['course', 3]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class IdempotencyKeyTests(APITestCase):
+    def test_expired_keys_are_purged_and_can_be_reused(self):
+        import datetime
+        from django.core.management import call_command
+        from django.utils import timezone
+        from gym_api.users.models import User
+        user = User.objects.create_user(username='purger', email='purger@example.com', password='testpass123')
+        past = timezone.now() - datetime.timedelta(seconds=1)
+        for key in ('a', 'b'):
+            IdempotencyKey.objects.create(
+                user=user, key=key, scope='POST /api/orders/', request_hash='x',
+                response_status=201, response_body={}, expires_at=past
+            )
+        IdempotencyKey.objects.create(
+            user=user, key='c', scope='POST /api/orders/', request_hash='x',
+            expires_at=timezone.now() + datetime.timedelta(hours=1)
+        )
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['c'])
+
+    def test_in_flight_key_returns_conflict(self):
+        from gym_api.users.models import User
+        from gym_api.common.idempotency import _reserve
+        user = User.objects.create_user(username='racer', email='racer@example.com', password='testpass123')
+        first, _ = _reserve(user, 'POST /api/orders/', 'k', 'digest')
+        self.assertIsNotNone(first)
+        record, response = _reserve(user, 'POST /api/orders/', 'k', 'digest')
+        self.assertIsNone(record)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
+class OutboxTests(APITestCase):
+    def test_leased_events_are_not_claimed_twice(self):
+        from . import outbox
+        for i in range(3):
+            outbox.publish('test.noop', n=i)
+        first = outbox.claim_batch('worker-a', batch_size=2)
+        second = outbox.claim_batch('worker-b', batch_size=5)
+        self.assertEqual(len(first), 2)
+        self.assertEqual([event.payload['n'] for event in second], [2])
+        self.assertFalse(outbox.claim_batch('worker-c'))
+
+    def test_unknown_topic_is_recorded_as_failure(self):
+        from . import outbox
+        outbox.publish('test.unhandled')
+        self.assertEqual(outbox.process_outbox(), (0, 1))
+        self.assertIn('No outbox handler', OutboxEvent.objects.get().last_error)
+
+
+class TestModuleLintTests(SimpleTestCase):
+    """
+    A test class or function defined twice in one module silently replaces
+    the first one, so its tests are never collected
+    """
+
+    def test_no_test_classes_or_functions_are_redefined(self):
+        from pathlib import Path
+        try:
+            from pyflakes import checker, messages
+        except ImportError:
+            self.skipTest('pyflakes is not installed')
+        import ast
+        root = Path(__file__).resolve().parent.parent
+        problems = []
+        for path in sorted(root.glob('*/tests*.py')):
+            source = path.read_text(encoding='utf-8')
+            lines = source.splitlines()
+            for message in checker.Checker(ast.parse(source, str(path)), str(path)).messages:
+                if not isinstance(message, messages.RedefinedWhileUnused):
+                    continue
+                line = lines[message.lineno - 1].lstrip()
+                if line.startswith(('class ', 'def ', 'async def ')):
+                    problems.append(f'{path.relative_to(root)}:{message.lineno}: {message.message % message.message_args}')
+        self.assertFalse(problems, '\n'.join(problems))
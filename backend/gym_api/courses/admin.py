@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Course, CourseCategory, CourseSchedule, CourseEnrollment
+from .models import Course, CourseCategory, CourseSchedule, CourseEnrollment, CourseWaitlistEntry
 
 @admin.register(CourseCategory)
 class CourseCategoryAdmin(admin.ModelAdmin):
@@ -53,4 +53,11 @@ class CourseEnrollmentAdmin(admin.ModelAdmin):
         ('Enrollment Information', {
             'fields': ('user', 'schedule', 'status')
         }),
-    ) 
\ No newline at end of file
+    ) 
+
+@admin.register(CourseWaitlistEntry)
+class CourseWaitlistEntryAdmin(admin.ModelAdmin):
+    """Course Waitlist Management"""
+    list_display = ('user', 'schedule', 'ticket', 'created_at')
+    search_fields = ('user__username', 'schedule__course__name')
+    ordering = ('schedule', 'ticket')
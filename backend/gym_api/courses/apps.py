@@ -5,4 +5,7 @@ class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gym_api.courses'
     verbose_name = _('Course Management')
- 
\ No newline at end of file
+    
+    def ready(self):
+        # Import signal handlers
+        import gym_api.courses.signals
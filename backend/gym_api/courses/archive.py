@@ -0,0 +1,113 @@
+"""
+Hot/cold split of course enrollments.
+
+Enrollments whose schedule ended more than ``ENROLLMENT_ARCHIVE_AFTER_DAYS``
+ago are moved to ArchivedCourseEnrollment in batches. Seat accounting and
+the enrollment endpoints only touch the hot table; history reads both.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, F, Value
+from django.utils import timezone
+
+from gym_api.common import cache as response_cache
+from .models import ArchivedCourseEnrollment, CourseEnrollment, EnrollmentAdmissionTicket
+from . import ical
+
+COPIED_FIELDS = ['user_id', 'schedule_id', 'status', 'attendance', 'feedback', 'rating', 'created_at', 'updated_at']
+
+HISTORY_FIELDS = [
+    'id', 'user', 'schedule', 'course_id', 'course_name', 'start_time',
+    'end_time', 'location', 'status', 'attendance', 'rating', 'feedback',
+    'created_at', 'archived',
+]
+
+
+def cutoff(days=None):
+    """
+    Schedules that ended before this moment are eligible for archiving
+    """
+    if days is None:
+        days = getattr(settings, 'ENROLLMENT_ARCHIVE_AFTER_DAYS', 365)
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+def archive_batch(before, batch_size=1000):
+    """
+    Move one batch of eligible enrollments in its own transaction.
+    Returns the number of enrollments moved.
+
+    The hot rows are removed with a raw DELETE rather than per-row
+    post_delete signals; the caches those signals would evict are
+    invalidated once for the whole batch instead.
+    """
+    with transaction.atomic():
+        rows = list(
+            CourseEnrollment.objects.filter(schedule__end_time__lt=before)
+            .order_by('pk').values('pk', *COPIED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedCourseEnrollment.objects.bulk_create(
+            [
+                ArchivedCourseEnrollment(original_id=row['pk'], **{field: row[field] for field in COPIED_FIELDS})
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+        moved = [row['pk'] for row in rows]
+        EnrollmentAdmissionTicket.objects.filter(enrollment_id__in=moved).update(enrollment=None)
+        # QuerySet.delete() would load every row to send post_delete, costing a cache
+        # eviction and a calendar bump per enrollment. Skipping the collector is safe:
+        # the only relation (admission tickets) was detached above, seat counters of
+        # ended schedules are left as they were, and both caches are evicted once below.
+        hot = CourseEnrollment.objects.filter(pk__in=moved)
+        hot._raw_delete(hot.db)
+        ical.bump(pk__in={row['user_id'] for row in rows})
+        response_cache.invalidate('courses')
+    return len(rows)
+
+
+def archive_enrollments(days=None, batch_size=1000, max_batches=None):
+    """
+    Archive every eligible enrollment, one short transaction per batch.
+    Returns the total number moved.
+    """
+    before = cutoff(days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(before, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+    return total
+
+
+def _history_values(queryset, id_field, archived):
+    return queryset.annotate(
+        history_id=F(id_field),
+        course_id=F('schedule__course_id'),
+        course_name=F('schedule__course__name'),
+        start_time=F('schedule__start_time'),
+        end_time=F('schedule__end_time'),
+        location=F('schedule__location'),
+        archived=Value(archived, output_field=BooleanField()),
+    ).values_list(
+        'history_id', 'user_id', 'schedule_id', 'course_id', 'course_name', 'start_time',
+        'end_time', 'location', 'status', 'attendance', 'rating', 'feedback',
+        'created_at', 'archived',
+    )
+
+
+def history(**filters):
+    """
+    Enrollments from the hot and archive tables as one UNION ALL query of
+    tuples in HISTORY_FIELDS order, newest first. ``filters`` apply to both
+    sides (e.g. user_id=..., status=...).
+    """
+    hot = _history_values(CourseEnrollment.objects.filter(**filters), 'id', False)
+    cold = _history_values(ArchivedCourseEnrollment.objects.filter(**filters), 'original_id', True)
+    return hot.union(cold, all=True).order_by('-created_at', '-history_id')
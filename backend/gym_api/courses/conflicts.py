@@ -0,0 +1,94 @@
+"""
+Overlap detection for schedules sharing an instructor or a location.
+
+A batch of proposed sessions is checked with one range query per
+dimension plus a sorted sweep, so the cost is O(n log n) in the batch
+size rather than one query per pair.
+"""
+from collections import namedtuple
+from itertools import groupby
+
+from rest_framework.exceptions import ValidationError
+
+from .models import CourseSchedule
+
+Slot = namedtuple('Slot', ['pk', 'instructor_id', 'location', 'start_time', 'end_time', 'proposed'])
+
+DIMENSIONS = (
+    ('location', 'location', 'Location'),
+    ('instructor_id', 'course__instructor_id', 'Instructor'),
+)
+
+
+def slot_for(schedule, pk=None):
+    """
+    Proposed Slot for an unsaved (or about to be updated) CourseSchedule
+    """
+    return Slot(
+        pk=pk if pk is not None else schedule.pk,
+        instructor_id=schedule.course.instructor_id,
+        location=schedule.location,
+        start_time=schedule.start_time,
+        end_time=schedule.end_time,
+        proposed=True,
+    )
+
+
+def _existing(proposals, attr, lookup):
+    """
+    Saved schedules that could overlap the batch along one dimension.
+    Served by the (location, start_time, end_time) and
+    (course, start_time, end_time) indexes.
+    """
+    keys = {getattr(slot, attr) for slot in proposals}
+    own = [slot.pk for slot in proposals if slot.pk is not None]
+    rows = CourseSchedule.objects.filter(
+        **{f'{lookup}__in': keys},
+        start_time__lt=max(slot.end_time for slot in proposals),
+        end_time__gt=min(slot.start_time for slot in proposals),
+    ).exclude(pk__in=own).values_list('pk', 'course__instructor_id', 'location', 'start_time', 'end_time')
+    return [Slot(*row, proposed=False) for row in rows]
+
+
+def _sweep(slots, attr):
+    """
+    Yield overlapping (earlier, later) pairs within each key, by start time
+    """
+    ordered = sorted(slots, key=lambda slot: (getattr(slot, attr), slot.start_time, slot.end_time))
+    for _, group in groupby(ordered, key=lambda slot: getattr(slot, attr)):
+        reach = None  # the slot ending last among those seen so far
+        for slot in group:
+            if reach is not None and slot.start_time < reach.end_time:
+                if slot.proposed or reach.proposed:
+                    yield reach, slot
+            if reach is None or slot.end_time > reach.end_time:
+                reach = slot
+
+
+def find_conflicts(proposals):
+    """
+    Return a message for every proposed slot that overlaps another proposed
+    or saved schedule with the same instructor or location
+    """
+    proposals = list(proposals)
+    if not proposals:
+        return []
+    messages = []
+    for attr, lookup, label in DIMENSIONS:
+        slots = proposals + _existing(proposals, attr, lookup)
+        for earlier, later in _sweep(slots, attr):
+            messages.append(
+                f'{label} {getattr(later, attr)} is already booked from '
+                f'{earlier.start_time:%Y-%m-%d %H:%M} to {earlier.end_time:%H:%M}'
+                + (f' (schedule #{earlier.pk})' if earlier.pk and not earlier.proposed else '')
+            )
+    return messages
+
+
+def validate(proposals):
+    """
+    Raise ValidationError listing every conflict in the batch
+    """
+    messages = find_conflicts(proposals)
+    if messages:
+        raise ValidationError({'conflicts': messages})
@@ -0,0 +1,33 @@
+import django_filters
+from django.utils import timezone
+from rest_framework import filters
+
+from .models import CourseSchedule
+
+
+class CourseScheduleFilter(django_filters.FilterSet):
+    """
+    Schedule list filters, all evaluated in SQL on indexed columns
+    """
+    min_available = django_filters.NumberFilter(field_name='available_slots', lookup_expr='gte')
+    start_after = django_filters.IsoDateTimeFilter(field_name='start_time', lookup_expr='gte')
+    start_before = django_filters.IsoDateTimeFilter(field_name='start_time', lookup_expr='lt')
+
+    class Meta:
+        model = CourseSchedule
+        fields = ['course', 'min_available', 'start_after', 'start_before']
+
+
+class CourseScheduleOrderingFilter(filters.OrderingFilter):
+    """
+    Adds ``?ordering=soonest``: upcoming sessions with at least one open
+    seat, earliest first. Served by the (start_time, available_slots) index.
+    """
+    soonest_param = 'soonest'
+
+    def filter_queryset(self, request, queryset, view):
+        if request.query_params.get(self.ordering_param) == self.soonest_param:
+            return queryset.filter(
+                start_time__gte=timezone.now(), available_slots__gt=0,
+            ).order_by('start_time', 'id')
+        return super().filter_queryset(request, queryset, view)
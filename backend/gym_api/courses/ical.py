@@ -0,0 +1,101 @@
+"""
+iCalendar (RFC 5545) subscription feeds of a member's upcoming classes
+"""
+import datetime
+import secrets
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CalendarFeed
+
+PRODID = '-//Gym Management System//Course Schedule//EN'
+
+
+def feed_for(user):
+    """
+    The member's feed, created with a fresh token on first use
+    """
+    feed, _ = CalendarFeed.objects.get_or_create(user=user, defaults={'token': secrets.token_urlsafe(32)})
+    return feed
+
+
+def rotate_token(feed):
+    feed.token = secrets.token_urlsafe(32)
+    feed.version = F('version') + 1
+    feed.save(update_fields=['token', 'version', 'updated_at'])
+    feed.refresh_from_db(fields=['version'])
+    return feed
+
+
+def bump(**user_filter):
+    """
+    Invalidate the feeds of users matching ``user_filter`` (lookups on User)
+    """
+    lookup = {f'user__{key}': value for key, value in user_filter.items()}
+    CalendarFeed.objects.filter(**lookup).update(version=F('version') + 1)
+
+
+def etag(feed):
+    """
+    Validator for a feed; rolls over daily so finished classes drop out
+    """
+    return f'"{feed.user_id}-{feed.version}-{timezone.localdate():%Y%m%d}"'
+
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """
+    Fold a content line at 75 octets as required by RFC 5545
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, limit = [], 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # do not split a multi-byte character
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded, limit = encoded[cut:], 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(enrollment):
+    schedule = enrollment.schedule
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:enrollment-{enrollment.pk}@gym',
+        f'DTSTAMP:{_stamp(enrollment.updated_at)}',
+        f'DTSTART:{_stamp(schedule.start_time)}',
+        f'DTEND:{_stamp(schedule.end_time)}',
+        f'SUMMARY:{_escape(schedule.course.name)}',
+        f'LOCATION:{_escape(schedule.location)}',
+        'STATUS:CONFIRMED',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def stream(user, chunk_size=200):
+    """
+    Yield the calendar piece by piece; enrollments are read with a
+    server-side iterator so large histories never sit in memory
+    """
+    yield ''.join(_fold(line) for line in [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', f'X-WR-CALNAME:{_escape("Gym classes")}',
+    ])
+    enrollments = user.get_enrolled_courses().exclude(status='cancelled').order_by('schedule__start_time', 'pk')
+    for enrollment in enrollments.iterator(chunk_size=chunk_size):
+        yield _event(enrollment)
+    yield _fold('END:VCALENDAR')
@@ -0,0 +1,59 @@
+"""
+Batch status transitions for enrollments on schedules that have ended
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from gym_api.common import cache as response_cache
+from .models import CourseEnrollment, CourseSchedule
+
+
+def _pending(before):
+    return CourseEnrollment.objects.filter(status='enrolled', schedule__end_time__lt=before)
+
+
+def complete_window(start, end):
+    """
+    Close out enrollments on schedules that ended in [start, end) with two
+    set-based UPDATEs in one short transaction: members marked absent
+    become no-shows, everyone else is completed.
+    Returns (completed, no_show).
+    """
+    schedules = CourseSchedule.objects.filter(end_time__gte=start, end_time__lt=end).values('pk')
+    enrollments = CourseEnrollment.objects.filter(status='enrolled', schedule__in=schedules)
+    now = timezone.now()
+    with transaction.atomic():
+        no_show = enrollments.filter(attendance=False).update(status='no_show', updated_at=now)
+        completed = enrollments.update(status='completed', updated_at=now)
+    return completed, no_show
+
+
+def complete_past_enrollments(window=datetime.timedelta(hours=24), grace=datetime.timedelta(0), max_windows=None):
+    """
+    Walk ended schedules oldest first, one time window per transaction.
+
+    Only ``enrolled`` rows are touched, so the job is idempotent; it keeps
+    no state and resumes from the oldest pending schedule on every run.
+    Empty stretches are skipped with a MIN() lookup instead of scanned.
+    Returns a dict of totals.
+    """
+    before = timezone.now() - grace
+    report = {'windows': 0, 'completed': 0, 'no_show': 0}
+    start = _pending(before).aggregate(first=Min('schedule__end_time'))['first']
+    while start is not None and (max_windows is None or report['windows'] < max_windows):
+        end = min(start + window, before)
+        completed, no_show = complete_window(start, end)
+        report['windows'] += 1
+        report['completed'] += completed
+        report['no_show'] += no_show
+        if end >= before:
+            break
+        start = _pending(before).filter(schedule__end_time__gte=end).aggregate(
+            first=Min('schedule__end_time')
+        )['first']
+    if report['completed'] or report['no_show']:
+        response_cache.invalidate('courses')
+    return report
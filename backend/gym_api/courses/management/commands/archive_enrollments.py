@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import archive
+
+
+class Command(BaseCommand):
+    help = 'Move enrollments for long-finished schedules into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Archive schedules that ended this many days ago '
+                                 '(default: ENROLLMENT_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Enrollments moved per transaction')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Stop after this many batches')
+
+    def handle(self, *args, **options):
+        total = archive.archive_enrollments(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} enrollments'))
@@ -0,0 +1,28 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import lifecycle
+
+
+class Command(BaseCommand):
+    help = 'Mark enrollments on finished schedules as completed or no-show'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-hours', type=int, default=24,
+                            help='Schedule end times covered per transaction')
+        parser.add_argument('--grace-minutes', type=int, default=0,
+                            help='Leave classes that ended within this many minutes alone')
+        parser.add_argument('--max-windows', type=int, default=None,
+                            help='Stop after this many windows; the next run resumes')
+
+    def handle(self, *args, **options):
+        report = lifecycle.complete_past_enrollments(
+            window=datetime.timedelta(hours=options['window_hours']),
+            grace=datetime.timedelta(minutes=options['grace_minutes']),
+            max_windows=options['max_windows'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {report['windows']} windows: {report['completed']} completed, "
+            f"{report['no_show']} no-show"
+        ))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gym_api.courses.services import process_admission_batch
+
+
+class Command(BaseCommand):
+    help = 'Admit queued enrollment requests for schedules in burst mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Tickets admitted per transaction')
+        parser.add_argument('--interval', type=float, default=0.5,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            processed = process_admission_batch(batch_size)
+            if processed:
+                self.stdout.write(f'Processed {processed} admission tickets')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rating sum, count and histogram stored on every course'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Courses written per bulk update')
+
+    def handle(self, *args, **options):
+        total = ratings.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates for {total} courses'))
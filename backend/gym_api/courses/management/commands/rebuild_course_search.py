@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite full-text index used by course search'
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write('Full-text index is only used on SQLite; nothing to do')
+            return
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Course search index rebuilt'))
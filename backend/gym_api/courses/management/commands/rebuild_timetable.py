@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import timetable
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized weekly timetable from course schedules'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Schedules upserted per statement')
+
+    def handle(self, *args, **options):
+        total = timetable.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} timetable entries'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.courses import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount enrolled seats per schedule and repair drifted current_capacity counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Schedules checked per grouped aggregate')
+        parser.add_argument('--all', action='store_true',
+                            help='Include schedules that have already ended, back to the archive cutoff')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        report = reconcile.reconcile_seats(
+            chunk_size=options['chunk_size'],
+            fix=not options['dry_run'],
+            include_past=options['all'],
+        )
+        for row in report['schedules']:
+            self.stdout.write(
+                f"Schedule #{row['schedule']}: recorded {row['recorded']}, actual {row['actual']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {report['checked']} schedules, {report['drifted']} drifted, {report['fixed']} fixed"
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_add_sample_courses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseschedule',
+            name='waitlist_head',
+            field=models.IntegerField(default=1, help_text='Ticket of the next member to be promoted', verbose_name='Waitlist Head'),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='waitlist_tail',
+            field=models.IntegerField(default=1, help_text='Ticket handed to the next member joining the waitlist', verbose_name='Waitlist Tail'),
+        ),
+        migrations.CreateModel(
+            name='CourseWaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket', models.IntegerField(verbose_name='Ticket')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='courses.courseschedule', verbose_name='Schedule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Course Waitlist Entry',
+                'verbose_name_plural': 'Course Waitlist Entries',
+                'db_table': 'gym_course_waitlist',
+                'indexes': [models.Index(fields=['schedule', 'ticket'], name='gym_waitlist_schedule_ticket')],
+                'unique_together': {('user', 'schedule')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseschedule',
+            name='burst_mode',
+            field=models.BooleanField(default=False, help_text='Queue enrollment requests and admit them in batches', verbose_name='Burst Mode'),
+        ),
+        migrations.CreateModel(
+            name='EnrollmentAdmissionTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('admitted', 'Admitted'), ('rejected', 'Rejected')], default='queued', max_length=15, verbose_name='Status')),
+                ('with_order', models.BooleanField(default=False, help_text='Create a paid course order on admission', verbose_name='Create Order')),
+                ('message', models.CharField(blank=True, default='', max_length=200, verbose_name='Message')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+                ('enrollment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='courses.courseenrollment', verbose_name='Enrollment')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admission_tickets', to='courses.courseschedule', verbose_name='Schedule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='admission_tickets', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Enrollment Admission Ticket',
+                'verbose_name_plural': 'Enrollment Admission Tickets',
+                'db_table': 'gym_course_admission_ticket',
+                'indexes': [models.Index(fields=['status', 'id'], name='gym_admission_status_id'), models.Index(fields=['schedule', 'status', 'id'], name='gym_admission_schedule_queue')],
+            },
+        ),
+    ]
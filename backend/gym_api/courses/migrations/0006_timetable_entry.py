@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:04
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_timetable(apps, schema_editor):
+    CourseSchedule = apps.get_model('courses', 'CourseSchedule')
+    TimetableEntry = apps.get_model('courses', 'TimetableEntry')
+
+    entries = []
+    for schedule in CourseSchedule.objects.select_related('course__category', 'course__instructor'):
+        course = schedule.course
+        instructor = course.instructor
+        local_date = timezone.localtime(schedule.start_time).date()
+        entries.append(TimetableEntry(
+            schedule_id=schedule.pk,
+            week_start=local_date - datetime.timedelta(days=local_date.weekday()),
+            location=schedule.location,
+            start_time=schedule.start_time,
+            end_time=schedule.end_time,
+            course_id=course.pk,
+            course_name=course.name,
+            category_name=course.category.name,
+            instructor_id=instructor.pk,
+            instructor_name=f'{instructor.first_name} {instructor.last_name}'.strip() or instructor.username,
+            difficulty=course.difficulty,
+            capacity=course.capacity,
+            current_capacity=schedule.current_capacity,
+            is_active=course.is_active,
+        ))
+    TimetableEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_enrollment_admission_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimetableEntry',
+            fields=[
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timetable_entry', serialize=False, to='courses.courseschedule', verbose_name='Schedule')),
+                ('week_start', models.DateField(verbose_name='Week Start')),
+                ('location', models.CharField(max_length=100, verbose_name='Location')),
+                ('start_time', models.DateTimeField(verbose_name='Start Time')),
+                ('end_time', models.DateTimeField(verbose_name='End Time')),
+                ('course_id', models.BigIntegerField(verbose_name='Course ID')),
+                ('course_name', models.CharField(max_length=100, verbose_name='Course Name')),
+                ('category_name', models.CharField(max_length=50, verbose_name='Category Name')),
+                ('instructor_id', models.BigIntegerField(verbose_name='Instructor ID')),
+                ('instructor_name', models.CharField(max_length=150, verbose_name='Instructor Name')),
+                ('difficulty', models.CharField(max_length=15, verbose_name='Difficulty Level')),
+                ('capacity', models.IntegerField(verbose_name='Capacity')),
+                ('current_capacity', models.IntegerField(default=0, verbose_name='Current Capacity')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is Active')),
+            ],
+            options={
+                'verbose_name': 'Timetable Entry',
+                'verbose_name_plural': 'Timetable Entries',
+                'db_table': 'gym_course_timetable',
+                'indexes': [models.Index(fields=['week_start', 'location', 'start_time'], name='gym_timetable_week_location')],
+            },
+        ),
+        migrations.RunPython(backfill_timetable, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS gym_course_search USING fts5("
+        "name, description, category_name, instructor_name, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO gym_course_search (rowid, name, description, category_name, instructor_name) "
+        "SELECT c.id, c.name, c.description, cat.name, "
+        "TRIM(u.first_name || ' ' || u.last_name || ' ' || u.username) "
+        "FROM gym_course c "
+        "JOIN gym_course_category cat ON cat.id = c.category_id "
+        "JOIN gym_user u ON u.id = c.instructor_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS gym_course_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_timetable_entry'),
+        ('users', '0012_user_address_user_birth_date_user_gender'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_course_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseScheduleRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.JSONField(default=list, help_text='Days of the week, 0 = Monday ... 6 = Sunday', verbose_name='Weekdays')),
+                ('start_time', models.TimeField(verbose_name='Start Time')),
+                ('end_time', models.TimeField(verbose_name='End Time')),
+                ('location', models.CharField(max_length=100, verbose_name='Location')),
+                ('start_date', models.DateField(verbose_name='Start Date')),
+                ('end_date', models.DateField(verbose_name='End Date')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_rules', to='courses.course', verbose_name='Course')),
+            ],
+            options={
+                'verbose_name': 'Course Schedule Rule',
+                'verbose_name_plural': 'Course Schedule Rules',
+                'db_table': 'gym_course_schedule_rule',
+            },
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='courses.courseschedulerule', verbose_name='Recurrence Rule'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_course_schedule_rule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['location', 'start_time', 'end_time'], name='gym_schedule_location_time'),
+        ),
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['course', 'start_time', 'end_time'], name='gym_schedule_course_time'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:19
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_available_slots(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseSchedule = apps.get_model('courses', 'CourseSchedule')
+    capacity = Course.objects.filter(pk=OuterRef('course_id')).values('capacity')[:1]
+    CourseSchedule.objects.update(available_slots=Subquery(capacity) - F('current_capacity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_schedule_conflict_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseschedule',
+            name='available_slots',
+            field=models.IntegerField(db_index=True, default=0, help_text='Effective capacity minus current capacity, kept in step by the seat services', verbose_name='Available Slots'),
+        ),
+        migrations.AddField(
+            model_name='courseschedule',
+            name='capacity_override',
+            field=models.PositiveIntegerField(blank=True, help_text='Seats for this session; defaults to the course capacity', null=True, verbose_name='Capacity Override'),
+        ),
+        migrations.AddIndex(
+            model_name='courseschedule',
+            index=models.Index(fields=['start_time', 'available_slots'], name='gym_schedule_start_available'),
+        ),
+        migrations.RunPython(backfill_available_slots, migrations.RunPython.noop),
+    ]
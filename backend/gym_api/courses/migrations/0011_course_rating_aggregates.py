@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:27
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+    stars = range(1, 6)
+    fields = ['rating_sum', 'rating_count'] + [f'rating_{star}_count' for star in stars]
+    rows = CourseEnrollment.objects.filter(rating__isnull=False).order_by().values('schedule__course').annotate(
+        rating_sum=Sum('rating'),
+        rating_count=Count('id'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in stars},
+    )
+    for row in rows:
+        Course.objects.filter(pk=row['schedule__course']).update(**{field: row[field] for field in fields})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_schedule_available_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_1_count',
+            field=models.IntegerField(default=0, verbose_name='1-Star Ratings'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_2_count',
+            field=models.IntegerField(default=0, verbose_name='2-Star Ratings'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_3_count',
+            field=models.IntegerField(default=0, verbose_name='3-Star Ratings'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_4_count',
+            field=models.IntegerField(default=0, verbose_name='4-Star Ratings'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_5_count',
+            field=models.IntegerField(default=0, verbose_name='5-Star Ratings'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.IntegerField(default=0, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.IntegerField(default=0, verbose_name='Rating Sum'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_course_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCourseEnrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='Original ID')),
+                ('status', models.CharField(choices=[('enrolled', 'Enrolled'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], max_length=15, verbose_name='Status')),
+                ('attendance', models.BooleanField(blank=True, null=True, verbose_name='Attendance')),
+                ('feedback', models.TextField(blank=True, null=True, verbose_name='Feedback')),
+                ('rating', models.IntegerField(blank=True, choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)], null=True, verbose_name='Rating')),
+                ('created_at', models.DateTimeField(verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(verbose_name='Updated At')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archived At')),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_enrollments', to='courses.courseschedule', verbose_name='Schedule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_enrollments', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Archived Course Enrollment',
+                'verbose_name_plural': 'Archived Course Enrollments',
+                'db_table': 'gym_course_enrollment_archive',
+                'indexes': [models.Index(fields=['user', 'created_at'], name='gym_enroll_archive_user')],
+            },
+        ),
+    ]
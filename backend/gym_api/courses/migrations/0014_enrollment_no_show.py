@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcourseenrollment',
+            name='status',
+            field=models.CharField(choices=[('enrolled', 'Enrolled'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('no_show', 'No-show')], max_length=15, verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='courseenrollment',
+            name='status',
+            field=models.CharField(choices=[('enrolled', 'Enrolled'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('no_show', 'No-show')], default='enrolled', max_length=15, verbose_name='Status'),
+        ),
+    ]
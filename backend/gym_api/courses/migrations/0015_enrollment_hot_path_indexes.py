@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_enrollment_no_show'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['user', 'status'], name='gym_enroll_user_status'),
+        ),
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['schedule', 'status'], name='gym_enroll_schedule_status'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from gym_api.users.models import User
 
@@ -44,6 +44,15 @@ class Course(models.Model):
     difficulty = models.CharField(_('Difficulty Level'), max_length=15, choices=DIFFICULTY_CHOICES, default='beginner')
     is_active = models.BooleanField(_('Is Active'), default=True)
     
+    # Rating aggregates, maintained by gym_api.courses.ratings
+    rating_sum = models.IntegerField(_('Rating Sum'), default=0)
+    rating_count = models.IntegerField(_('Rating Count'), default=0)
+    rating_1_count = models.IntegerField(_('1-Star Ratings'), default=0)
+    rating_2_count = models.IntegerField(_('2-Star Ratings'), default=0)
+    rating_3_count = models.IntegerField(_('3-Star Ratings'), default=0)
+    rating_4_count = models.IntegerField(_('4-Star Ratings'), default=0)
+    rating_5_count = models.IntegerField(_('5-Star Ratings'), default=0)
+    
     # Metadata
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
@@ -66,6 +75,18 @@ class CourseSchedule(models.Model):
     end_time = models.DateTimeField(_('End Time'))
     location = models.CharField(_('Location'), max_length=100)
     current_capacity = models.IntegerField(_('Current Capacity'), default=0)
+    capacity_override = models.PositiveIntegerField(_('Capacity Override'), null=True, blank=True,
+                                                 help_text=_('Seats for this session; defaults to the course capacity'))
+    available_slots = models.IntegerField(_('Available Slots'), default=0, db_index=True,
+                                       help_text=_('Effective capacity minus current capacity, kept in step by the seat services'))
+    waitlist_head = models.IntegerField(_('Waitlist Head'), default=1,
+                                     help_text=_('Ticket of the next member to be promoted'))
+    waitlist_tail = models.IntegerField(_('Waitlist Tail'), default=1,
+                                     help_text=_('Ticket handed to the next member joining the waitlist'))
+    burst_mode = models.BooleanField(_('Burst Mode'), default=False,
+                                  help_text=_('Queue enrollment requests and admit them in batches'))
+    rule = models.ForeignKey('CourseScheduleRule', on_delete=models.SET_NULL, null=True, blank=True,
+                          related_name='occurrences', verbose_name=_('Recurrence Rule'))
     
     # Metadata
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
@@ -75,9 +96,78 @@ class CourseSchedule(models.Model):
         verbose_name = _('Course Schedule')
         verbose_name_plural = _('Course Schedules')
         db_table = 'gym_course_schedule'
+        indexes = [
+            # Overlap lookups in gym_api.courses.conflicts
+            models.Index(fields=['location', 'start_time', 'end_time'], name='gym_schedule_location_time'),
+            models.Index(fields=['course', 'start_time', 'end_time'], name='gym_schedule_course_time'),
+            models.Index(fields=['start_time', 'available_slots'], name='gym_schedule_start_available'),
+        ]
         
     def __str__(self):
         return f"{self.course.name} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
+    
+    @property
+    def effective_capacity(self):
+        """Seats on offer: the override when set, else the course capacity"""
+        if self.capacity_override is not None:
+            return self.capacity_override
+        return self.course.capacity
+    
+    COUNTER_FIELDS = ('current_capacity', 'available_slots', 'waitlist_head', 'waitlist_tail')
+    
+    def refresh_available_slots(self):
+        self.available_slots = self.effective_capacity - self.current_capacity
+    
+    def save(self, *args, **kwargs):
+        """
+        Updates never write the seat and waitlist counters from memory: the seat
+        services move them with conditional UPDATEs, and a stale instance would
+        undo those. available_slots is recomputed in SQL from the stored count.
+        """
+        if self._state.adding or kwargs.get('force_insert'):
+            self.refresh_available_slots()
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        kwargs['update_fields'] = [name for name in update_fields if name not in self.COUNTER_FIELDS]
+        with transaction.atomic():
+            CourseSchedule.objects.filter(pk=self.pk).update(
+                available_slots=self.effective_capacity - models.F('current_capacity'),
+            )
+            super().save(*args, **kwargs)
+        counters = CourseSchedule.objects.filter(pk=self.pk).values(*self.COUNTER_FIELDS).first()
+        for name, value in (counters or {}).items():
+            setattr(self, name, value)
+
+class CourseScheduleRule(models.Model):
+    """
+    Course Schedule Rule Model
+
+    Weekly recurrence such as "every Mon/Wed 18:00-19:00 at Studio A until
+    Dec 31". Expanded into CourseSchedule rows by gym_api.courses.recurrence.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='schedule_rules',
+                            verbose_name=_('Course'))
+    weekdays = models.JSONField(_('Weekdays'), default=list,
+                             help_text=_('Days of the week, 0 = Monday ... 6 = Sunday'))
+    start_time = models.TimeField(_('Start Time'))
+    end_time = models.TimeField(_('End Time'))
+    location = models.CharField(_('Location'), max_length=100)
+    start_date = models.DateField(_('Start Date'))
+    end_date = models.DateField(_('End Date'))
+    
+    # Metadata
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Course Schedule Rule')
+        verbose_name_plural = _('Course Schedule Rules')
+        db_table = 'gym_course_schedule_rule'
+        
+    def __str__(self):
+        return f"{self.course.name} - {self.start_time:%H:%M} ({self.location})"
 
 class CourseEnrollment(models.Model):
     """
@@ -87,6 +177,7 @@ class CourseEnrollment(models.Model):
         ('enrolled', 'Enrolled'),
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
+        ('no_show', 'No-show'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='enrollments',
@@ -107,6 +198,174 @@ class CourseEnrollment(models.Model):
         verbose_name_plural = _('Course Enrollments')
         db_table = 'gym_course_enrollment'
         unique_together = ('user', 'schedule')  # Ensure users cannot enroll in the same course twice
+        indexes = [
+            models.Index(fields=['user', 'status'], name='gym_enroll_user_status'),
+            models.Index(fields=['schedule', 'status'], name='gym_enroll_schedule_status'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.schedule.course.name}" 
+
+class ArchivedCourseEnrollment(models.Model):
+    """
+    Archived Course Enrollment Model
+
+    Cold copy of enrollments for long-finished schedules, moved out of
+    gym_course_enrollment by gym_api.courses.archive so the hot table only
+    holds recent and upcoming classes.
+    """
+    original_id = models.BigIntegerField(_('Original ID'), unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_enrollments',
+                          verbose_name=_('User'))
+    schedule = models.ForeignKey(CourseSchedule, on_delete=models.CASCADE, related_name='archived_enrollments',
+                              verbose_name=_('Schedule'))
+    status = models.CharField(_('Status'), max_length=15, choices=CourseEnrollment.STATUS_CHOICES)
+    attendance = models.BooleanField(_('Attendance'), null=True, blank=True)
+    feedback = models.TextField(_('Feedback'), null=True, blank=True)
+    rating = models.IntegerField(_('Rating'), null=True, blank=True, choices=[(i, i) for i in range(1, 6)])
+    
+    # Metadata (created_at/updated_at are copied from the original row)
+    created_at = models.DateTimeField(_('Created At'))
+    updated_at = models.DateTimeField(_('Updated At'))
+    archived_at = models.DateTimeField(_('Archived At'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Archived Course Enrollment')
+        verbose_name_plural = _('Archived Course Enrollments')
+        db_table = 'gym_course_enrollment_archive'
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='gym_enroll_archive_user'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.schedule} (archived)"
+
+class CalendarFeed(models.Model):
+    """
+    Calendar Feed Model
+
+    Secret token for a member's iCalendar subscription. ``version`` is
+    bumped whenever the member's bookings change so calendar apps can poll
+    with If-None-Match.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='calendar_feed',
+                             verbose_name=_('User'))
+    token = models.CharField(_('Token'), max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(_('Version'), default=1)
+    
+    # Metadata
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Calendar Feed')
+        verbose_name_plural = _('Calendar Feeds')
+        db_table = 'gym_course_calendar_feed'
+        
+    def __str__(self):
+        return f"{self.user.username} calendar feed"
+
+class CourseWaitlistEntry(models.Model):
+    """
+    Course Waitlist Entry Model
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries',
+                          verbose_name=_('User'))
+    schedule = models.ForeignKey(CourseSchedule, on_delete=models.CASCADE, related_name='waitlist_entries',
+                              verbose_name=_('Schedule'))
+    ticket = models.IntegerField(_('Ticket'))
+    
+    # Metadata
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Course Waitlist Entry')
+        verbose_name_plural = _('Course Waitlist Entries')
+        db_table = 'gym_course_waitlist'
+        unique_together = ('user', 'schedule')
+        indexes = [
+            models.Index(fields=['schedule', 'ticket'], name='gym_waitlist_schedule_ticket'),
+        ]
+        
+    def __str__(self):
+        return f"{self.user.username} - {self.schedule} (#{self.ticket})"
+    
+    @property
+    def position(self):
+        """1-based place in the queue; reads the schedule head, no counting"""
+        return self.ticket - self.schedule.waitlist_head + 1
+
+class EnrollmentAdmissionTicket(models.Model):
+    """
+    Enrollment Admission Ticket Model
+
+    Enrollment requests for schedules in burst mode are queued here and
+    admitted in FIFO order by a single writer.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('admitted', 'Admitted'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='admission_tickets',
+                          verbose_name=_('User'))
+    schedule = models.ForeignKey(CourseSchedule, on_delete=models.CASCADE, related_name='admission_tickets',
+                              verbose_name=_('Schedule'))
+    status = models.CharField(_('Status'), max_length=15, choices=STATUS_CHOICES, default='queued')
+    with_order = models.BooleanField(_('Create Order'), default=False,
+                                  help_text=_('Create a paid course order on admission'))
+    message = models.CharField(_('Message'), max_length=200, blank=True, default='')
+    enrollment = models.ForeignKey(CourseEnrollment, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='+', verbose_name=_('Enrollment'))
+    
+    # Metadata
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    processed_at = models.DateTimeField(_('Processed At'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('Enrollment Admission Ticket')
+        verbose_name_plural = _('Enrollment Admission Tickets')
+        db_table = 'gym_course_admission_ticket'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='gym_admission_status_id'),
+            models.Index(fields=['schedule', 'status', 'id'], name='gym_admission_schedule_queue'),
+        ]
+        
+    def __str__(self):
+        return f"#{self.id} {self.user.username} - {self.schedule} ({self.status})"
+
+class TimetableEntry(models.Model):
+    """
+    Timetable Entry Model
+
+    Denormalized copy of a schedule with its course, category, instructor
+    and seat counts, so the weekly timetable is one indexed lookup.
+    Maintained by gym_api.courses.timetable.
+    """
+    schedule = models.OneToOneField(CourseSchedule, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='timetable_entry', verbose_name=_('Schedule'))
+    week_start = models.DateField(_('Week Start'))
+    location = models.CharField(_('Location'), max_length=100)
+    start_time = models.DateTimeField(_('Start Time'))
+    end_time = models.DateTimeField(_('End Time'))
+    course_id = models.BigIntegerField(_('Course ID'))
+    course_name = models.CharField(_('Course Name'), max_length=100)
+    category_name = models.CharField(_('Category Name'), max_length=50)
+    instructor_id = models.BigIntegerField(_('Instructor ID'))
+    instructor_name = models.CharField(_('Instructor Name'), max_length=150)
+    difficulty = models.CharField(_('Difficulty Level'), max_length=15)
+    capacity = models.IntegerField(_('Capacity'))
+    current_capacity = models.IntegerField(_('Current Capacity'), default=0)
+    is_active = models.BooleanField(_('Is Active'), default=True)
+    
+    class Meta:
+        verbose_name = _('Timetable Entry')
+        verbose_name_plural = _('Timetable Entries')
+        db_table = 'gym_course_timetable'
+        indexes = [
+            models.Index(fields=['week_start', 'location', 'start_time'], name='gym_timetable_week_location'),
+        ]
         
     def __str__(self):
-        return f"{self.user.username} - {self.schedule.course.name}" 
\ No newline at end of file
+        return f"{self.course_name} - {self.start_time:%Y-%m-%d %H:%M} ({self.location})"
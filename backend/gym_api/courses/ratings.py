@@ -0,0 +1,83 @@
+"""
+Maintenance of the denormalized rating aggregates on Course
+"""
+from collections import Counter
+
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from gym_api.common import cache as response_cache
+from .models import ArchivedCourseEnrollment, Course, CourseEnrollment
+
+STARS = range(1, 6)
+AGGREGATE_FIELDS = ['rating_sum', 'rating_count'] + [f'rating_{star}_count' for star in STARS]
+
+
+def apply_change(schedule_id, old_rating, new_rating):
+    """
+    Move one enrollment's rating from ``old_rating`` to ``new_rating``
+    (either may be None) with a single UPDATE on the schedule's course.
+    Call it inside the transaction that writes the enrollment.
+    """
+    if old_rating == new_rating:
+        return
+    changes = {
+        'rating_sum': F('rating_sum') + (new_rating or 0) - (old_rating or 0),
+        'rating_count': F('rating_count') + (new_rating is not None) - (old_rating is not None),
+        'updated_at': timezone.now(),
+    }
+    if old_rating is not None:
+        changes[f'rating_{old_rating}_count'] = F(f'rating_{old_rating}_count') - 1
+    if new_rating is not None:
+        changes[f'rating_{new_rating}_count'] = F(f'rating_{new_rating}_count') + 1
+    Course.objects.filter(schedules=schedule_id).update(**changes)
+
+
+def histogram(course):
+    return {star: getattr(course, f'rating_{star}_count') for star in STARS}
+
+
+def average(course):
+    if not course.rating_count:
+        return None
+    return round(course.rating_sum / course.rating_count, 2)
+
+
+def with_average(queryset):
+    """
+    Annotate ``rating_average`` from the stored columns so lists can sort on it
+    """
+    return queryset.annotate(
+        rating_average=Coalesce(
+            Cast('rating_sum', FloatField()) / NullIf('rating_count', 0),
+            Value(0.0),
+        )
+    )
+
+
+def rebuild(chunk_size=500):
+    """
+    Recompute every course's aggregates from one grouped query per
+    enrollment table (hot and archive), then write them back with chunked
+    bulk_update.
+    Returns the number of courses written.
+    """
+    totals = {}
+    for model in (CourseEnrollment, ArchivedCourseEnrollment):
+        rows = model.objects.filter(rating__isnull=False).order_by().values('schedule__course').annotate(
+            rating_sum=Sum('rating'),
+            rating_count=Count('id'),
+            **{f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in STARS},
+        )
+        for row in rows:
+            total = totals.setdefault(row['schedule__course'], Counter())
+            total.update({field: row[field] for field in AGGREGATE_FIELDS})
+    courses = list(Course.objects.only('pk', *AGGREGATE_FIELDS))
+    for course in courses:
+        row = totals.get(course.pk, {})
+        for field in AGGREGATE_FIELDS:
+            setattr(course, field, row.get(field, 0))
+    Course.objects.bulk_update(courses, AGGREGATE_FIELDS, batch_size=chunk_size)
+    response_cache.invalidate('courses')
+    return len(courses)
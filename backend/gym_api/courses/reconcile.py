@@ -0,0 +1,88 @@
+"""
+Repair drift between CourseSchedule.current_capacity and the enrollments that hold a seat
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from gym_api.common import cache as response_cache
+from .models import CourseEnrollment, CourseSchedule
+from . import archive, timetable
+
+DETAIL_LIMIT = 100
+
+
+def _seat_holders():
+    """
+    Enrollments that occupy a seat (see services.holds_seat)
+    """
+    return CourseEnrollment.objects.exclude(status='cancelled')
+
+
+def _true_count():
+    """
+    Correlated subquery counting a schedule's seat holders at UPDATE time
+    """
+    return Coalesce(
+        Subquery(
+            _seat_holders().filter(schedule_id=OuterRef('pk'))
+            .order_by().values('schedule_id').annotate(n=Count('id')).values('n')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def reconcile_seats(chunk_size=500, fix=True, include_past=False):
+    """
+    Compare every schedule's counter with a grouped count of its seat holders.
+
+    Schedules are walked in primary-key chunks; each chunk costs one grouped
+    aggregate and, when it has drift and ``fix`` is set, one UPDATE in its own
+    short transaction. The UPDATE recounts with a correlated subquery, so
+    seats claimed between the check and the fix are not lost.
+    Returns a report dict with totals and the first drifted schedules.
+    """
+    # Schedules past the archive cutoff have moved their enrollments to the
+    # cold table, so their counters are history and are left alone.
+    since = archive.cutoff() if include_past else timezone.now()
+    schedules = CourseSchedule.objects.filter(end_time__gte=since).order_by('pk')
+
+    report = {'checked': 0, 'drifted': 0, 'fixed': 0, 'schedules': []}
+    last_pk = 0
+    while True:
+        chunk = list(schedules.filter(pk__gt=last_pk).values_list('pk', 'current_capacity')[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        ids = [pk for pk, _ in chunk]
+        actual = dict(
+            _seat_holders().filter(schedule_id__in=ids)
+            .order_by().values_list('schedule_id').annotate(n=Count('id')).values_list('schedule_id', 'n')
+        )
+        drifted = []
+        for pk, recorded in chunk:
+            count = actual.get(pk, 0)
+            if count != recorded:
+                drifted.append(pk)
+                if len(report['schedules']) < DETAIL_LIMIT:
+                    report['schedules'].append(
+                        {'schedule': pk, 'recorded': recorded, 'actual': count, 'drift': recorded - count}
+                    )
+        report['checked'] += len(chunk)
+        report['drifted'] += len(drifted)
+
+        if fix and drifted:
+            with transaction.atomic():
+                true_count = _true_count()
+                report['fixed'] += CourseSchedule.objects.filter(pk__in=drifted).update(
+                    available_slots=F('available_slots') + F('current_capacity') - true_count,
+                    current_capacity=true_count,
+                    updated_at=timezone.now(),
+                )
+                timetable.sync_seats(*drifted)
+
+    if report['fixed']:
+        response_cache.invalidate('courses')
+    return report
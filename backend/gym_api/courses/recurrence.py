@@ -0,0 +1,98 @@
+"""
+Expansion of weekly CourseScheduleRule rows into CourseSchedule occurrences
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from gym_api.common import cache as response_cache
+from .models import CourseEnrollment, CourseSchedule
+from . import conflicts, timetable
+
+
+def occurrences(rule, since=None):
+    """
+    Yield (start, end) aware datetimes for every day the rule covers.
+    Times are wall-clock in the current time zone; only starts after
+    ``since`` are yielded.
+    """
+    tz = timezone.get_current_timezone()
+    weekdays = set(rule.weekdays)
+    day = rule.start_date
+    while day <= rule.end_date:
+        if day.weekday() in weekdays:
+            start = timezone.make_aware(datetime.datetime.combine(day, rule.start_time), tz)
+            if since is None or start > since:
+                end = timezone.make_aware(datetime.datetime.combine(day, rule.end_time), tz)
+                yield start, end
+        day += datetime.timedelta(days=1)
+
+
+def remove_future_unbooked(rule):
+    """
+    Delete the future occurrences of ``rule`` that nobody has enrolled in.
+    Returns the number of schedules deleted.
+    """
+    _, deleted = CourseSchedule.objects.filter(
+        rule=rule, start_time__gt=timezone.now(),
+    ).exclude(
+        Exists(CourseEnrollment.objects.filter(schedule=OuterRef('pk')))
+    ).delete()
+    return deleted.get(CourseSchedule._meta.label, 0)
+
+
+@transaction.atomic
+def expand(rule):
+    """
+    Write the rule's missing future occurrences with one bulk_create.
+    Returns the number of schedules created.
+    """
+    now = timezone.now()
+    existing = set(
+        CourseSchedule.objects.filter(rule=rule, start_time__gt=now).values_list('start_time', flat=True)
+    )
+    schedules = [
+        CourseSchedule(
+            course=rule.course, rule=rule, location=rule.location,
+            start_time=start, end_time=end,
+        )
+        for start, end in occurrences(rule, since=now)
+        if start not in existing
+    ]
+    conflicts.validate(conflicts.slot_for(schedule) for schedule in schedules)
+    for schedule in schedules:
+        schedule.refresh_available_slots()
+    schedules = CourseSchedule.objects.bulk_create(schedules)
+    # bulk_create skips post_save, so do the signal handlers' work here
+    if schedules:
+        if schedules[0].pk is None:
+            ids = CourseSchedule.objects.filter(rule=rule, start_time__gt=now).values_list('pk', flat=True)
+        else:
+            ids = [schedule.pk for schedule in schedules]
+        timetable.sync_schedules(ids)
+        response_cache.invalidate('courses')
+    return len(schedules)
+
+
+@transaction.atomic
+def regenerate(rule):
+    """
+    Replace the rule's future occurrences after an edit.
+    Occurrences in the past or with enrollments are left alone.
+    Returns (removed, created).
+    """
+    removed = remove_future_unbooked(rule)
+    return removed, expand(rule)
+
+
+@transaction.atomic
+def withdraw_rule(rule):
+    """
+    Delete a rule together with its future unbooked occurrences.
+    Returns the number of occurrences removed.
+    """
+    removed = remove_future_unbooked(rule)
+    rule.delete()
+    return removed
@@ -0,0 +1,132 @@
+"""
+Ranked course search backed by an SQLite FTS5 index
+
+The index (gym_course_search) holds course name, description, category
+name and instructor name keyed by course id. It is created by migration
+and kept in sync by the course signals. On other databases the search
+filter falls back to DRF's LIKE-based SearchFilter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import CharField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from rest_framework import filters
+
+from .models import Course
+
+FTS_TABLE = 'gym_course_search'
+
+# bm25 column weights: name, description, category name, instructor name
+RANK_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+
+INDEX_SELECT = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, description, category_name, instructor_name)
+    SELECT c.id, c.name, c.description, cat.name,
+           TRIM(u.first_name || ' ' || u.last_name || ' ' || u.username)
+    FROM gym_course c
+    JOIN gym_course_category cat ON cat.id = c.category_id
+    JOIN gym_user u ON u.id = c.instructor_id
+"""
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def _id_list(ids):
+    ids = [int(pk) for pk in ids]
+    return ids, ', '.join(['%s'] * len(ids))
+
+
+def index_courses(course_ids):
+    """
+    Re-index the given courses: one DELETE and one INSERT ... SELECT
+    """
+    ids, placeholders = _id_list(course_ids)
+    if not ids or not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', ids)
+        cursor.execute(f'{INDEX_SELECT} WHERE c.id IN ({placeholders})', ids)
+
+
+def remove_courses(course_ids):
+    ids, placeholders = _id_list(course_ids)
+    if not ids or not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', ids)
+
+
+def rebuild():
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(INDEX_SELECT)
+
+
+def match_expression(terms):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix
+    """
+    words = re.findall(r'\w+', terms)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+# Highlight markers from the private use area, swapped for <mark> only after
+# the indexed text has been HTML-escaped
+MARK_OPEN, MARK_CLOSE = '\ue000', '\ue001'
+
+
+def render(text):
+    """
+    HTML-escape a highlighted fragment, then turn the FTS markers into <mark> tags
+    """
+    if text is None:
+        return None
+    return escape(text).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+
+def _match_subquery(select, expression, output_field):
+    """
+    Correlated lookup of ``select`` for the outer course row in the FTS index
+    """
+    return RawSQL(
+        f'SELECT {select} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {Course._meta.db_table}.id',
+        [expression],
+        output_field=output_field,
+    )
+
+
+class CourseFullTextSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text course search with prefix matching and highlighting.
+    Results come back best match first unless an explicit ordering is requested.
+    The match runs in the database alongside the view's other filters, so
+    every matching course is reachable through pagination.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '')
+        if not terms.strip() or not is_enabled():
+            return super().filter_queryset(request, queryset, view)
+
+        expression = match_expression(terms)
+        if not expression:
+            return queryset.none()
+
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression])
+        ).annotate(
+            search_rank=_match_subquery(f'bm25({FTS_TABLE}, {weights})', expression, FloatField()),
+            search_name=_match_subquery(
+                f"highlight({FTS_TABLE}, 0, '{MARK_OPEN}', '{MARK_CLOSE}')", expression, CharField()
+            ),
+            search_snippet=_match_subquery(
+                f"snippet({FTS_TABLE}, 1, '{MARK_OPEN}', '{MARK_CLOSE}', '...', 16)", expression, CharField()
+            ),
+        ).order_by('search_rank', 'pk')
@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import CourseCategory, Course, CourseSchedule, CourseEnrollment
+from .models import (
+    CourseCategory, Course, CourseSchedule, CourseScheduleRule, CourseEnrollment, EnrollmentAdmissionTicket,
+)
 from gym_api.users.serializers import UserSerializer
+from . import conflicts, ratings, search, services
 
 class CourseCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,47 +14,127 @@ class CourseCategorySerializer(serializers.ModelSerializer):
 class CourseSerializer(serializers.ModelSerializer):
     category_name = serializers.ReadOnlyField(source='category.name')
     instructor_name = serializers.ReadOnlyField(source='instructor.get_full_name')
+    search_highlight = serializers.SerializerMethodField()
+    rating_average = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'name', 'description', 'category', 'category_name',
             'instructor', 'instructor_name', 'image', 'price', 'duration',
-            'capacity', 'difficulty', 'is_active', 'created_at', 'updated_at'
+            'capacity', 'difficulty', 'is_active', 'search_highlight',
+            'rating_average', 'rating_count', 'rating_histogram',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'rating_count', 'created_at', 'updated_at']
+    
+    def get_rating_average(self, obj):
+        return ratings.average(obj)
+    
+    def get_rating_histogram(self, obj):
+        return ratings.histogram(obj)
+    
+    def get_search_highlight(self, obj):
+        """
+        Highlighted name and description snippet when listed by full-text search
+        """
+        if not hasattr(obj, 'search_rank'):
+            return None
+        return {'name': search.render(obj.search_name), 'description': search.render(obj.search_snippet)}
 
 class CourseScheduleSerializer(serializers.ModelSerializer):
     course_name = serializers.ReadOnlyField(source='course.name')
     course_instructor = serializers.ReadOnlyField(source='course.instructor.get_full_name')
-    available_slots = serializers.SerializerMethodField()
-    capacity = serializers.IntegerField(source='course.capacity', read_only=True)
+    capacity = serializers.IntegerField(source='effective_capacity', read_only=True)
+    waitlist_length = serializers.SerializerMethodField()
     
     class Meta:
         model = CourseSchedule
         fields = [
             'id', 'course', 'course_name', 'course_instructor',
             'start_time', 'end_time', 'location', 'current_capacity',
-            'capacity', 'available_slots', 'created_at', 'updated_at'
+            'capacity', 'capacity_override', 'available_slots', 'waitlist_length',
+            'burst_mode', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'current_capacity', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'current_capacity', 'available_slots', 'created_at', 'updated_at']
+        planned_relations = ['course']
+    
+    def validate(self, data):
+        """
+        Reject sessions that overlap another one for the same instructor or location
+        """
+        get = lambda name: data.get(name, getattr(self.instance, name, None))
+        start_time, end_time = get('start_time'), get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError('End time must be after start time')
+        if get('course') and start_time and end_time:
+            proposal = CourseSchedule(
+                course=get('course'), location=get('location'),
+                start_time=start_time, end_time=end_time,
+            )
+            conflicts.validate([conflicts.slot_for(proposal, pk=getattr(self.instance, 'pk', None))])
+        return data
     
-    def get_available_slots(self, obj):
-        return obj.course.capacity - obj.current_capacity
+    def get_waitlist_length(self, obj):
+        return obj.waitlist_tail - obj.waitlist_head
 
 class CourseDetailSerializer(serializers.ModelSerializer):
     category = CourseCategorySerializer(read_only=True)
     instructor = UserSerializer(read_only=True)
     schedules = CourseScheduleSerializer(many=True, read_only=True)
+    rating_average = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'name', 'description', 'category', 'instructor',
             'image', 'price', 'duration', 'capacity', 'difficulty',
-            'is_active', 'schedules', 'created_at', 'updated_at'
+            'is_active', 'schedules', 'rating_average', 'rating_count',
+            'rating_histogram', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'rating_count', 'created_at', 'updated_at']
+    
+    def get_rating_average(self, obj):
+        return ratings.average(obj)
+    
+    def get_rating_histogram(self, obj):
+        return ratings.histogram(obj)
+
+class CourseScheduleRuleSerializer(serializers.ModelSerializer):
+    course_name = serializers.ReadOnlyField(source='course.name')
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), allow_empty=False
+    )
+    
+    MAX_SPAN_DAYS = 366
+    
+    class Meta:
+        model = CourseScheduleRule
+        fields = [
+            'id', 'course', 'course_name', 'weekdays', 'start_time', 'end_time',
+            'location', 'start_date', 'end_date', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        planned_relations = ['course']
+    
+    def validate_weekdays(self, value):
+        return sorted(set(value))
+    
+    def validate(self, data):
+        """
+        Check the time window and keep the expansion bounded
+        """
+        get = lambda name: data.get(name, getattr(self.instance, name, None))
+        if get('end_time') <= get('start_time'):
+            raise serializers.ValidationError('End time must be after start time')
+        span = (get('end_date') - get('start_date')).days
+        if span < 0:
+            raise serializers.ValidationError('End date must not be before start date')
+        if span > self.MAX_SPAN_DAYS:
+            raise serializers.ValidationError(f'A rule may cover at most {self.MAX_SPAN_DAYS} days')
+        return data
 
 class CourseEnrollmentSerializer(serializers.ModelSerializer):
     user_name = serializers.ReadOnlyField(source='user.get_full_name')
@@ -66,6 +149,7 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
             'rating', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        planned_relations = ['schedule']
     
     def get_schedule_time(self, obj):
         return {
@@ -76,19 +160,72 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         """
-        Check if the course is full
+        Check if the course is full when enrolling
         """
+        if self.instance is not None:
+            return data
         schedule = data.get('schedule')
-        if schedule.current_capacity >= schedule.course.capacity:
+        if schedule.available_slots <= 0:
             raise serializers.ValidationError('This course is full')
         return data
     
     def create(self, validated_data):
         """
-        Create enrollment record and update course capacity
+        Create enrollment record and claim a seat on the schedule
+        """
+        user = validated_data.pop('user')
+        schedule = validated_data.pop('schedule')
+        return services.enroll(user, schedule, **validated_data) 
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """
+    Input for the admin bulk-enroll endpoint
+    """
+    MAX_ROWS = 10000
+    
+    schedule_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=200)
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=1000)
+    member_ids = serializers.ListField(child=serializers.CharField(max_length=20), required=False, default=list, max_length=1000)
+    
+    def validate(self, data):
+        members = len(data['user_ids']) + len(data['member_ids'])
+        if not members:
+            raise serializers.ValidationError('Provide user_ids or member_ids')
+        if members * len(data['schedule_ids']) > self.MAX_ROWS:
+            raise serializers.ValidationError(f'A bulk enrollment may cover at most {self.MAX_ROWS} rows')
+        return data
+
+class CheckInSerializer(serializers.Serializer):
+    """
+    Input for the front-desk check-in endpoint
+    """
+    enrollment_ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=1000)
+    member_ids = serializers.ListField(child=serializers.CharField(max_length=20), required=False, default=list, max_length=1000)
+    all_except = serializers.BooleanField(required=False, default=False,
+                                          help_text='Mark everyone present except the listed members')
+    
+    def validate(self, data):
+        if not data['all_except'] and not (data['enrollment_ids'] or data['member_ids']):
+            raise serializers.ValidationError('Provide enrollment_ids or member_ids, or set all_except')
+        return data
+
+class EnrollmentAdmissionTicketSerializer(serializers.ModelSerializer):
+    position = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = EnrollmentAdmissionTicket
+        fields = [
+            'id', 'schedule', 'status', 'position', 'message',
+            'enrollment', 'created_at', 'processed_at'
+        ]
+        read_only_fields = fields
+    
+    def get_position(self, obj):
+        """
+        Place in the schedule's queue; an indexed count over queued tickets
         """
-        enrollment = super().create(validated_data)
-        schedule = enrollment.schedule
-        schedule.current_capacity += 1
-        schedule.save()
-        return enrollment 
\ No newline at end of file
+        if obj.status != 'queued':
+            return None
+        return EnrollmentAdmissionTicket.objects.filter(
+            schedule_id=obj.schedule_id, status='queued', id__lte=obj.id
+        ).count()
@@ -0,0 +1,441 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from gym_api.common import cache as response_cache
+from gym_api.orders.models import Order, OrderItem
+from gym_api.orders.numbering import next_order_number
+from gym_api.users.models import User
+from .models import CourseSchedule, CourseEnrollment, CourseWaitlistEntry, EnrollmentAdmissionTicket
+from . import ical, ratings, timetable
+
+
+class ScheduleFull(ValidationError):
+    """
+    Raised when a seat cannot be claimed because the schedule is full
+    """
+    default_detail = 'This course is full'
+
+
+def claim_seat(schedule_id):
+    """
+    Take one seat with a single conditional UPDATE.
+    Returns True when the seat was claimed.
+    """
+    claimed = CourseSchedule.objects.filter(
+        pk=schedule_id,
+        available_slots__gt=0,
+    ).update(
+        current_capacity=F('current_capacity') + 1,
+        available_slots=F('available_slots') - 1,
+        updated_at=timezone.now(),
+    )
+    if claimed:
+        timetable.sync_seats(schedule_id)
+    return claimed == 1
+
+
+def release_seat(schedule_id):
+    """
+    Give one seat back. Never drops the counter below zero.
+    """
+    released = CourseSchedule.objects.filter(
+        pk=schedule_id,
+        current_capacity__gt=0,
+    ).update(
+        current_capacity=F('current_capacity') - 1,
+        available_slots=F('available_slots') + 1,
+        updated_at=timezone.now(),
+    )
+    if released:
+        timetable.sync_seats(schedule_id)
+    return released == 1
+
+
+def resize_course(course):
+    """
+    Recompute available_slots after a course capacity change and hand any
+    new seats to the waitlist. Schedules with their own capacity override
+    are unaffected.
+    """
+    schedules = CourseSchedule.objects.filter(course=course, capacity_override__isnull=True)
+    resized = schedules.update(available_slots=course.capacity - F('current_capacity'))
+    fill_from_waitlist(schedules.values_list('pk', flat=True))
+    return resized
+
+
+def holds_seat(status):
+    """
+    Enrolled, completed and no-show enrollments occupy a seat; cancelled ones do not
+    """
+    return status != 'cancelled'
+
+
+def transition_seat(schedule_id, old_status, new_status):
+    """
+    Claim or release a seat for an enrollment moving between statuses
+    """
+    if holds_seat(old_status) == holds_seat(new_status):
+        return
+    if holds_seat(new_status):
+        if not claim_seat(schedule_id):
+            raise ScheduleFull()
+    elif release_seat(schedule_id):
+        promote_next(schedule_id)
+
+
+@transaction.atomic
+def enroll(user, schedule, **fields):
+    """
+    Create an enrollment and claim its seat in the same transaction.
+    A member who cancelled earlier keeps their row because of
+    unique_together, so that row is reactivated instead.
+    """
+    status = fields.get('status', 'enrolled')
+    if holds_seat(status) and not claim_seat(schedule.pk):
+        raise ScheduleFull()
+    enrollment = CourseEnrollment.objects.filter(user=user, schedule=schedule, status='cancelled').first()
+    if enrollment is None:
+        old_rating = None
+        enrollment = CourseEnrollment.objects.create(user=user, schedule=schedule, **fields)
+    else:
+        old_rating = enrollment.rating
+        for name, value in {**fields, 'status': status}.items():
+            setattr(enrollment, name, value)
+        enrollment.save()
+    ratings.apply_change(schedule.pk, old_rating, enrollment.rating)
+    if holds_seat(status):
+        drop_waitlist_entries([(user.pk, schedule.pk)])
+    return enrollment
+
+
+@transaction.atomic
+def update_enrollment(serializer, old_status):
+    """
+    Save an enrollment update, adjust the seat count for a status change
+    and move the course rating aggregates if the rating changed
+    """
+    old_schedule_id, old_rating = serializer.instance.schedule_id, serializer.instance.rating
+    enrollment = serializer.save()
+    transition_seat(enrollment.schedule_id, old_status, enrollment.status)
+    if holds_seat(enrollment.status) and not holds_seat(old_status):
+        drop_waitlist_entries([(enrollment.user_id, enrollment.schedule_id)])
+    if enrollment.schedule_id != old_schedule_id:
+        ratings.apply_change(old_schedule_id, old_rating, None)
+        old_rating = None
+    ratings.apply_change(enrollment.schedule_id, old_rating, enrollment.rating)
+    return enrollment
+
+
+@transaction.atomic
+def withdraw(enrollment):
+    """
+    Delete an enrollment, release its seat and promote from the waitlist
+    """
+    enrollment.delete()
+    ratings.apply_change(enrollment.schedule_id, enrollment.rating, None)
+    if holds_seat(enrollment.status) and release_seat(enrollment.schedule_id):
+        promote_next(enrollment.schedule_id)
+
+
+def promote_next(schedule_id):
+    """
+    Move the member at the head of the waitlist into a free seat.
+    Must run inside the transaction that released the seat.
+    """
+    while True:
+        head = CourseSchedule.objects.values_list('waitlist_head', flat=True).get(pk=schedule_id)
+        entry = CourseWaitlistEntry.objects.filter(schedule_id=schedule_id, ticket=head).first()
+        if entry is None:
+            return None
+        seated = CourseEnrollment.objects.filter(
+            user_id=entry.user_id, schedule_id=schedule_id,
+        ).exclude(status='cancelled').exists()
+        if not seated:
+            break
+        # Already holds a seat: drop the stale entry and look at the next one
+        entry.delete()
+        CourseSchedule.objects.filter(pk=schedule_id).update(waitlist_head=F('waitlist_head') + 1)
+    if not claim_seat(schedule_id):
+        return None
+    # A member who cancelled earlier keeps their row because of unique_together
+    enrollment, _ = CourseEnrollment.objects.update_or_create(
+        user_id=entry.user_id, schedule_id=schedule_id,
+        defaults={'status': 'enrolled'},
+    )
+    entry.delete()
+    CourseSchedule.objects.filter(pk=schedule_id).update(waitlist_head=F('waitlist_head') + 1)
+    return enrollment
+
+
+@transaction.atomic
+def fill_from_waitlist(schedule_ids):
+    """
+    Promote waiting members, in queue order, into seats freed by a capacity increase
+    """
+    waiting = CourseSchedule.objects.filter(
+        pk__in=list(schedule_ids), available_slots__gt=0, waitlist_tail__gt=F('waitlist_head'),
+    ).values_list('pk', flat=True)
+    for schedule_id in list(waiting):
+        while promote_next(schedule_id) is not None:
+            pass
+
+
+@transaction.atomic
+def join_waitlist(user, schedule):
+    """
+    Enroll straight away if a seat is free, otherwise queue the member.
+    Returns the created enrollment or waitlist entry.
+    """
+    if CourseEnrollment.objects.filter(user=user, schedule=schedule, status='enrolled').exists():
+        raise ValidationError('Already enrolled in this schedule')
+    if CourseWaitlistEntry.objects.filter(user=user, schedule=schedule).exists():
+        raise ValidationError('Already on the waitlist for this schedule')
+
+    if claim_seat(schedule.pk):
+        enrollment, _ = CourseEnrollment.objects.update_or_create(
+            user=user, schedule=schedule, defaults={'status': 'enrolled'},
+        )
+        return enrollment
+
+    CourseSchedule.objects.filter(pk=schedule.pk).update(waitlist_tail=F('waitlist_tail') + 1)
+    tail = CourseSchedule.objects.values_list('waitlist_tail', flat=True).get(pk=schedule.pk)
+    return CourseWaitlistEntry.objects.create(user=user, schedule=schedule, ticket=tail - 1)
+
+
+@transaction.atomic
+def leave_waitlist(entry):
+    """
+    Remove a member from the queue and close the gap behind them
+    """
+    entry.delete()
+    CourseWaitlistEntry.objects.filter(
+        schedule_id=entry.schedule_id, ticket__gt=entry.ticket,
+    ).update(ticket=F('ticket') - 1)
+    CourseSchedule.objects.filter(pk=entry.schedule_id).update(waitlist_tail=F('waitlist_tail') - 1)
+
+
+def drop_waitlist_entries(pairs):
+    """
+    Take members who got a seat some other way off the waitlist.
+    ``pairs`` are (user_id, schedule_id) tuples.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    entries = CourseWaitlistEntry.objects.filter(
+        user_id__in={user_id for user_id, _ in pairs},
+        schedule_id__in={schedule_id for _, schedule_id in pairs},
+    ).order_by('-ticket')
+    for entry in entries:
+        if (entry.user_id, entry.schedule_id) in pairs:
+            leave_waitlist(entry)
+
+
+def _seat_counts(schedule_ids, user_ids):
+    return Counter(dict(
+        CourseEnrollment.objects.filter(schedule_id__in=schedule_ids, user_id__in=user_ids)
+        .values_list('schedule_id').annotate(n=Count('id')).values_list('schedule_id', 'n')
+    ))
+
+
+@transaction.atomic
+def bulk_enroll(schedule_ids, user_ids=(), member_ids=()):
+    """
+    Enroll a group of members into a set of schedules with set-based queries.
+
+    Members are given seats in request order until a schedule is full.
+    Cancelled enrollments are reactivated; new rows are inserted with one
+    bulk_create(ignore_conflicts=True) and each schedule's counters move
+    with a single UPDATE. Returns one outcome row per (member, schedule).
+    """
+    schedules = {
+        schedule.pk: schedule
+        for schedule in CourseSchedule.objects.select_for_update().filter(pk__in=schedule_ids)
+    }
+    members = [('user', user_id) for user_id in dict.fromkeys(user_ids)]
+    members += [('member_id', member_id) for member_id in dict.fromkeys(member_ids)]
+    found = {('user', pk): pk for pk in User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)}
+    found.update(
+        (('member_id', member_id), pk)
+        for pk, member_id in User.objects.filter(member_id__in=member_ids).values_list('pk', 'member_id')
+    )
+    resolved = list(dict.fromkeys(found.values()))
+    existing = {
+        (user_id, schedule_id): (pk, status)
+        for pk, user_id, schedule_id, status in CourseEnrollment.objects.filter(
+            schedule_id__in=schedules, user_id__in=resolved,
+        ).values_list('pk', 'user_id', 'schedule_id', 'status')
+    }
+
+    results, to_create, to_reactivate = [], [], []
+    claimed, reactivated = Counter(), Counter()
+    seen = set()
+    for schedule_id in dict.fromkeys(schedule_ids):
+        schedule = schedules.get(schedule_id)
+        for kind, identifier in members:
+            user_id = found.get((kind, identifier))
+            row = {kind: identifier, 'schedule': schedule_id}
+            if kind == 'member_id':
+                row['user'] = user_id
+            if schedule is None:
+                row['result'] = 'schedule_not_found'
+            elif user_id is None:
+                row['result'] = 'user_not_found'
+            elif (user_id, schedule_id) in seen:
+                row['result'] = 'duplicate'
+            elif holds_seat(existing.get((user_id, schedule_id), (None, 'cancelled'))[1]):
+                row['result'] = 'already_enrolled'
+            elif claimed[schedule_id] >= schedule.available_slots:
+                row['result'] = 'schedule_full'
+            else:
+                claimed[schedule_id] += 1
+                if (user_id, schedule_id) in existing:
+                    to_reactivate.append(existing[(user_id, schedule_id)][0])
+                    reactivated[schedule_id] += 1
+                    row['result'] = 'reactivated'
+                else:
+                    to_create.append(CourseEnrollment(user_id=user_id, schedule_id=schedule_id))
+                    row['result'] = 'enrolled'
+            if user_id is not None:
+                seen.add((user_id, schedule_id))
+            results.append(row)
+
+    before = _seat_counts(claimed, resolved)
+    CourseEnrollment.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    inserted = _seat_counts(claimed, resolved) - before
+    CourseEnrollment.objects.filter(pk__in=to_reactivate).update(status='enrolled', updated_at=timezone.now())
+
+    now = timezone.now()
+    for schedule_id, seats in (inserted + reactivated).items():
+        CourseSchedule.objects.filter(pk=schedule_id).update(
+            current_capacity=F('current_capacity') + seats,
+            available_slots=F('available_slots') - seats,
+            updated_at=now,
+        )
+    drop_waitlist_entries(
+        (row['user'], row['schedule']) for row in results if row['result'] in ('enrolled', 'reactivated')
+    )
+    if claimed:
+        timetable.sync_seats(*claimed)
+        response_cache.invalidate('courses')
+        ical.bump(pk__in=resolved)
+    return results
+
+
+def roster(schedule_id):
+    """
+    Enrollments that hold a seat on a schedule, for the front desk
+    """
+    return CourseEnrollment.objects.filter(schedule_id=schedule_id).exclude(status='cancelled')
+
+
+def check_in(schedule_id, enrollment_ids=(), member_ids=(), all_except=False):
+    """
+    Record attendance for a class with one conditional UPDATE.
+
+    Listed members (by enrollment ID or member ID) are marked present, or,
+    with ``all_except``, everyone on the roster is marked present except
+    the listed members, who are marked absent.
+    Returns (rows updated, unknown enrollment IDs, unknown member IDs).
+    """
+    members = dict(
+        roster(schedule_id).filter(user__member_id__in=member_ids).values_list('user__member_id', 'pk')
+    )
+    known = set(roster(schedule_id).filter(pk__in=enrollment_ids).values_list('pk', flat=True))
+    listed = known | set(members.values())
+
+    now = timezone.now()
+    if all_except:
+        updated = roster(schedule_id).update(
+            attendance=Case(When(pk__in=listed, then=Value(False)), default=Value(True)),
+            updated_at=now,
+        )
+    else:
+        updated = roster(schedule_id).filter(pk__in=listed).update(attendance=True, updated_at=now)
+    return (
+        updated,
+        [pk for pk in enrollment_ids if pk not in known],
+        [member_id for member_id in member_ids if member_id not in members],
+    )
+
+
+def create_course_order(user, course):
+    """
+    Create the paid order that goes with a direct course enrollment
+    """
+    order = Order.objects.create(
+        user=user,
+        order_number=next_order_number('COURSE'),
+        total_amount=course.price,
+        status='paid',
+        payment_method='credit_card'
+    )
+    OrderItem.objects.create(
+        order=order,
+        item_type='course',
+        item_id=course.id,
+        quantity=1,
+        price=course.price
+    )
+    return order
+
+
+def enqueue_admission(user, schedule, with_order=False):
+    """
+    Queue an enrollment request for a schedule in burst mode.
+    A member keeps a single queued ticket per schedule.
+    """
+    ticket = EnrollmentAdmissionTicket.objects.filter(
+        user=user, schedule=schedule, status='queued'
+    ).first()
+    if ticket is None:
+        ticket = EnrollmentAdmissionTicket.objects.create(
+            user=user, schedule=schedule, with_order=with_order
+        )
+    return ticket
+
+
+def _admit(ticket):
+    """
+    Try to turn one ticket into an enrollment inside its own savepoint
+    """
+    try:
+        with transaction.atomic():
+            enrollment = enroll(ticket.user, ticket.schedule)
+            if ticket.with_order:
+                create_course_order(ticket.user, ticket.schedule.course)
+    except ScheduleFull:
+        return 'rejected', 'Schedule is full', None
+    except IntegrityError:
+        # Only an active enrollment for the same schedule means a duplicate; anything else is a real failure
+        active = CourseEnrollment.objects.filter(
+            user_id=ticket.user_id, schedule_id=ticket.schedule_id,
+        ).exclude(status='cancelled')
+        if not active.exists():
+            raise
+        return 'rejected', 'Already enrolled in this schedule', None
+    return 'admitted', '', enrollment
+
+
+def process_admission_batch(batch_size=50):
+    """
+    Admit the oldest queued tickets in one transaction.
+    Returns the number of tickets processed.
+    """
+    with transaction.atomic():
+        tickets = list(
+            EnrollmentAdmissionTicket.objects.filter(status='queued')
+            .select_related('user', 'schedule__course')
+            .order_by('id')[:batch_size]
+        )
+        now = timezone.now()
+        for ticket in tickets:
+            ticket.status, ticket.message, ticket.enrollment = _admit(ticket)
+            ticket.processed_at = now
+        EnrollmentAdmissionTicket.objects.bulk_update(
+            tickets, ['status', 'message', 'enrollment', 'processed_at']
+        )
+    return len(tickets)
@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from gym_api.common import cache as response_cache
+from gym_api.users.models import User
+from .models import Course, CourseCategory, CourseEnrollment, CourseSchedule, CourseWaitlistEntry
+from . import ical, search, services, timetable
+
+@receiver(post_save, sender=CourseSchedule)
+def sync_schedule_timetable(sender, instance, **kwargs):
+    """
+    Keep the timetable row in step with the schedule
+    """
+    timetable.sync_schedules([instance.pk])
+
+@receiver(post_save, sender=CourseSchedule)
+def fill_schedule_waitlist(sender, instance, created, **kwargs):
+    """
+    A raised capacity override frees seats: offer them to the waitlist first
+    """
+    if not created:
+        services.fill_from_waitlist([instance.pk])
+
+@receiver(post_save, sender=Course)
+def sync_course_timetable(sender, instance, created, **kwargs):
+    """
+    Re-index a course and resync its schedules when it changes
+    """
+    search.index_courses([instance.pk])
+    if not created:
+        services.resize_course(instance)
+        timetable.sync_courses({'pk': instance.pk})
+
+@receiver(post_delete, sender=Course)
+def remove_course_search(sender, instance, **kwargs):
+    """
+    Drop a deleted course from the search index
+    """
+    search.remove_courses([instance.pk])
+
+@receiver(post_save, sender=CourseCategory)
+def sync_category_timetable(sender, instance, created, **kwargs):
+    """
+    Resync schedules and search rows when a category is renamed
+    """
+    if not created:
+        timetable.sync_courses({'category_id': instance.pk})
+        search.index_courses(instance.courses.values_list('pk', flat=True))
+
+@receiver(post_save, sender=User)
+def sync_instructor_timetable(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Resync schedules and search rows when an instructor's name changes
+    """
+    if created or instance.role != 'staff':
+        return
+    if update_fields is not None and not {'first_name', 'last_name', 'username'} & set(update_fields):
+        return
+    timetable.sync_courses({'instructor_id': instance.pk})
+    search.index_courses(instance.taught_courses.values_list('pk', flat=True))
+    response_cache.invalidate('courses')
+
+def invalidate_course_cache(sender, **kwargs):
+    """
+    Evict cached anonymous course and schedule responses
+    """
+    response_cache.invalidate('courses')
+
+for model in (Course, CourseCategory, CourseSchedule, CourseEnrollment, CourseWaitlistEntry):
+    post_save.connect(invalidate_course_cache, sender=model, dispatch_uid=f'course-cache-save-{model.__name__}')
+    post_delete.connect(invalidate_course_cache, sender=model, dispatch_uid=f'course-cache-delete-{model.__name__}')
+
+@receiver([post_save, post_delete], sender=CourseEnrollment)
+def bump_enrollment_calendar(sender, instance, **kwargs):
+    """
+    A booking changed: the member's calendar feed is stale
+    """
+    ical.bump(pk=instance.user_id)
+
+@receiver(post_save, sender=CourseSchedule)
+def bump_schedule_calendars(sender, instance, created, **kwargs):
+    """
+    Time or place changed: every enrolled member's feed is stale
+    """
+    if not created:
+        ical.bump(enrollments__schedule=instance)
+
+@receiver(post_save, sender=Course)
+def bump_course_calendars(sender, instance, created, **kwargs):
+    """
+    Course renamed: feeds of members booked on any of its schedules are stale
+    """
+    if not created:
+        ical.bump(enrollments__schedule__course=instance)
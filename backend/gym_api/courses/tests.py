@@ -1,10 +1,12 @@
 from django.test import TestCase
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
-from .models import Course, CourseCategory, CourseSchedule, CourseEnrollment
+from .models import Course, CourseCategory, CourseSchedule, CourseEnrollment, CourseWaitlistEntry, EnrollmentAdmissionTicket, TimetableEntry
 from gym_api.users.models import User
 from gym_api.utils.test_report import TestReport
+from gym_api.utils.query_plan import QueryPlanAssertionsMixin
 from django.contrib.auth import get_user_model
+from io import StringIO
 
 User = get_user_model()
 
@@ -82,4 +84,1397 @@ class CourseAPITests(APITestCase):
         url = f'/api/courses/{self.course.id}/'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['name'], 'Basic Yoga')
\ No newline at end of file
+        self.assertEqual(response.data['name'], 'Basic Yoga')
+
+class CourseQueryPlanTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='instructor',
+            email='instructor@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        self.category = CourseCategory.objects.create(name='Pilates')
+        CourseSchedule.objects.all().delete()
+        self.client.force_authenticate(user=self.instructor)
+
+    def _add_courses(self, count):
+        for i in range(count):
+            course = Course.objects.create(
+                name=f'Pilates {i}',
+                description='Core work',
+                category=self.category,
+                instructor=self.instructor,
+                price=20,
+                duration=45,
+                capacity=10
+            )
+            CourseSchedule.objects.create(
+                course=course,
+                start_time='2030-01-01T10:00:00Z',
+                end_time='2030-01-01T11:00:00Z',
+                location=f'Studio {i}'
+            )
+
+    def _count_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_independent_of_rows(self):
+        self._add_courses(2)
+        few = self._count_queries('/api/courses/schedules/')
+        self._add_courses(8)
+        many = self._count_queries('/api/courses/schedules/')
+        self.assertEqual(few, many)
+        # The course list adds one aggregate for its conditional GET validator
+        self.assertEqual(few + 1, self._count_queries('/api/courses/'))
+
+    def test_detail_prefetches_schedules(self):
+        self._add_courses(1)
+        course = Course.objects.get(name='Pilates 0')
+        for hour in range(11, 15):
+            CourseSchedule.objects.create(
+                course=course,
+                start_time=f'2030-01-02T{hour}:00:00Z',
+                end_time=f'2030-01-02T{hour}:30:00Z',
+                location='Studio 0'
+            )
+        # course, schedules (+ course/instructor join) and nothing per schedule
+        self.assertLessEqual(self._count_queries(f'/api/courses/{course.id}/'), 3)
+
+    def test_debug_header_reports_plan(self):
+        from django.test import override_settings
+        with override_settings(QUERY_PLAN_DEBUG_HEADER=True):
+            response = self.client.get('/api/courses/schedules/')
+        self.assertIn('course__instructor', response['X-Query-Plan'])
+
+
+class SeatAccountingTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='instructor',
+            email='instructor@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        self.member = User.objects.create_user(
+            username='seatmember',
+            email='seatmember@example.com',
+            password='testpass123',
+            role='member'
+        )
+        category = CourseCategory.objects.create(name='Spin')
+        self.course = Course.objects.create(
+            name='Spin Class',
+            description='Cycling',
+            category=category,
+            instructor=self.instructor,
+            price=15,
+            duration=45,
+            capacity=1
+        )
+        self.schedule = CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T11:00:00Z',
+            location='Studio 2'
+        )
+        self.client.force_authenticate(user=self.member)
+
+    def test_enrollment_claims_exactly_one_seat(self):
+        response = self.client.post('/api/courses/enrollments/', {'schedule': self.schedule.id, 'user': self.member.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 1)
+
+    def test_enrollment_retry_with_idempotency_key_claims_one_seat(self):
+        url = '/api/courses/enrollments/'
+        data = {'schedule': self.schedule.id, 'user': self.member.id}
+        first = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='enroll-1')
+        retry = self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='enroll-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 1)
+
+    def test_enrollment_created_as_completed_claims_a_seat(self):
+        from .reconcile import reconcile_seats
+        response = self.client.post('/api/courses/enrollments/', {
+            'schedule': self.schedule.id, 'user': self.member.id, 'status': 'completed'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 1)
+        self.assertEqual(reconcile_seats(fix=False)['drifted'], 0)
+
+    def test_saving_a_stale_schedule_keeps_concurrent_seat_claims(self):
+        from .services import enroll
+        stale = CourseSchedule.objects.get(pk=self.schedule.pk)
+        enroll(self.member, self.schedule)
+        stale.location = 'Studio 9'
+        stale.capacity_override = 3
+        stale.save()
+        self.assertEqual((stale.current_capacity, stale.available_slots), (1, 2))
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.location, 'Studio 9')
+        self.assertEqual((self.schedule.current_capacity, self.schedule.available_slots), (1, 2))
+
+    def test_cancel_and_delete_release_seat(self):
+        response = self.client.post('/api/courses/enrollments/', {'schedule': self.schedule.id, 'user': self.member.id}, format='json')
+        url = f"/api/courses/enrollments/{response.data['id']}/"
+        self.client.patch(url, {'status': 'cancelled'}, format='json')
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 0)
+        self.client.delete(url)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 0)
+
+    def test_conditional_claim_rejects_overbooking(self):
+        from .services import ScheduleFull, enroll
+        enroll(self.member, self.schedule)
+        other = User.objects.create_user(username='late', email='late@example.com', password='testpass123')
+        with self.assertRaises(ScheduleFull):
+            enroll(other, self.schedule)
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 1)
+        self.assertFalse(CourseEnrollment.objects.filter(user=other).exists())
+
+
+class WaitlistTests(APITestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            username='instructor',
+            email='instructor@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='HIIT')
+        course = Course.objects.create(
+            name='HIIT Blast',
+            description='Intervals',
+            category=category,
+            instructor=instructor,
+            price=15,
+            duration=30,
+            capacity=1
+        )
+        self.schedule = CourseSchedule.objects.create(
+            course=course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T10:30:00Z',
+            location='Studio 3'
+        )
+        self.url = f'/api/courses/schedules/{self.schedule.id}/waitlist/'
+        self.members = [
+            User.objects.create_user(username=f'wait{i}', email=f'wait{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    def join(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(self.url)
+
+    def test_join_enrolls_when_seat_free_then_queues(self):
+        self.assertEqual(self.join(self.members[0]).data['status'], 'enrolled')
+        response = self.join(self.members[1])
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['position'], 1)
+        self.assertEqual(self.join(self.members[2]).data['position'], 2)
+
+    def test_cancel_promotes_head_of_queue(self):
+        self.join(self.members[0])
+        self.join(self.members[1])
+        self.join(self.members[2])
+        enrollment = CourseEnrollment.objects.get(user=self.members[0])
+        self.client.force_authenticate(user=self.members[0])
+        self.client.patch(f'/api/courses/enrollments/{enrollment.id}/', {'status': 'cancelled'}, format='json')
+
+        self.assertEqual(CourseEnrollment.objects.get(user=self.members[1]).status, 'enrolled')
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 1)
+        self.client.force_authenticate(user=self.members[2])
+        self.assertEqual(self.client.get(self.url).data['position'], 1)
+
+    def test_leaving_closes_gap(self):
+        self.join(self.members[0])
+        self.join(self.members[1])
+        self.join(self.members[2])
+        self.client.force_authenticate(user=self.members[1])
+        self.assertEqual(self.client.delete(self.url).status_code, status.HTTP_204_NO_CONTENT)
+        self.client.force_authenticate(user=self.members[2])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['position'], 1)
+        self.assertEqual(response.data['waitlist_length'], 1)
+
+    def test_raising_capacity_promotes_from_the_queue(self):
+        for member in self.members:
+            self.join(member)
+        self.schedule.refresh_from_db()
+        self.schedule.capacity_override = 2
+        self.schedule.save()
+        self.assertEqual(CourseEnrollment.objects.get(user=self.members[1]).status, 'enrolled')
+        self.assertFalse(CourseEnrollment.objects.filter(user=self.members[2]).exists())
+        self.schedule.refresh_from_db()
+        self.assertEqual((self.schedule.current_capacity, self.schedule.available_slots), (2, 0))
+
+        course = self.schedule.course
+        course.capacity = 3
+        course.save()
+        self.schedule.capacity_override = None
+        self.schedule.save()
+        self.assertEqual(CourseEnrollment.objects.get(user=self.members[2]).status, 'enrolled')
+        self.assertFalse(CourseWaitlistEntry.objects.exists())
+
+    def test_direct_enrollment_leaves_the_queue(self):
+        from .services import enroll
+        self.join(self.members[0])
+        self.join(self.members[1])
+        self.join(self.members[2])
+        # A seat frees up without going through the waitlist
+        CourseSchedule.objects.filter(pk=self.schedule.pk).update(available_slots=1, capacity_override=2)
+        enroll(self.members[1], self.schedule)
+        self.assertFalse(CourseWaitlistEntry.objects.filter(user=self.members[1]).exists())
+        self.client.force_authenticate(user=self.members[2])
+        self.assertEqual(self.client.get(self.url).data['position'], 1)
+
+    def test_promotion_skips_members_who_already_hold_a_seat(self):
+        self.join(self.members[0])
+        self.join(self.members[1])
+        self.join(self.members[2])
+        # Seated without leaving the queue, as older data may be
+        CourseEnrollment.objects.create(user=self.members[1], schedule=self.schedule)
+        CourseSchedule.objects.filter(pk=self.schedule.pk).update(current_capacity=2, capacity_override=2)
+        enrollment = CourseEnrollment.objects.get(user=self.members[0])
+        self.client.force_authenticate(user=self.members[0])
+        self.client.patch(f'/api/courses/enrollments/{enrollment.id}/', {'status': 'cancelled'}, format='json')
+
+        self.assertEqual(CourseEnrollment.objects.get(user=self.members[2]).status, 'enrolled')
+        self.assertFalse(CourseWaitlistEntry.objects.exists())
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 2)
+
+
+class AdmissionQueueTests(APITestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            username='instructor',
+            email='instructor@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='Boxing')
+        course = Course.objects.create(
+            name='Boxing Drop',
+            description='Popular class',
+            category=category,
+            instructor=instructor,
+            price=25,
+            duration=60,
+            capacity=2
+        )
+        self.schedule = CourseSchedule.objects.create(
+            course=course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T11:00:00Z',
+            location='Ring',
+            burst_mode=True
+        )
+        self.members = [
+            User.objects.create_user(username=f'burst{i}', email=f'burst{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+
+    def request_seat(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(
+            '/api/courses/enrollments/', {'schedule': self.schedule.id, 'user': user.id}, format='json'
+        )
+
+    def test_burst_mode_queues_and_admits_in_fifo_order(self):
+        from django.core.management import call_command
+        tickets = [self.request_seat(member) for member in self.members]
+        self.assertTrue(all(t.status_code == status.HTTP_202_ACCEPTED for t in tickets))
+        self.assertEqual([t.data['position'] for t in tickets], [1, 2, 3])
+        self.assertFalse(CourseEnrollment.objects.filter(schedule=self.schedule).exists())
+
+        call_command('process_admissions', once=True, batch_size=2, stdout=StringIO())
+
+        statuses = list(EnrollmentAdmissionTicket.objects.order_by('id').values_list('status', flat=True))
+        self.assertEqual(statuses, ['admitted', 'admitted', 'rejected'])
+        response = self.client.get(f"/api/courses/admission-tickets/{tickets[2].data['id']}/")
+        self.assertEqual(response.data['message'], 'Schedule is full')
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.current_capacity, 2)
+
+    def test_duplicates_are_rejected_but_other_integrity_errors_surface(self):
+        from unittest import mock
+        from django.db import IntegrityError
+        from .services import enroll, process_admission_batch
+        member = self.members[0]
+        enroll(member, self.schedule)
+        EnrollmentAdmissionTicket.objects.create(user=member, schedule=self.schedule)
+        process_admission_batch()
+        ticket = EnrollmentAdmissionTicket.objects.get(user=member)
+        self.assertEqual((ticket.status, ticket.message), ('rejected', 'Already enrolled in this schedule'))
+
+        EnrollmentAdmissionTicket.objects.create(user=self.members[1], schedule=self.schedule, with_order=True)
+        with mock.patch('gym_api.courses.services.create_course_order', side_effect=IntegrityError('order_number')):
+            with self.assertRaises(IntegrityError):
+                process_admission_batch()
+        self.assertEqual(EnrollmentAdmissionTicket.objects.get(user=self.members[1]).status, 'queued')
+
+    def test_member_who_cancelled_earlier_is_admitted_again(self):
+        from .services import enroll, process_admission_batch
+        member = self.members[0]
+        enrollment = enroll(member, self.schedule)
+        CourseEnrollment.objects.filter(pk=enrollment.pk).update(status='cancelled')
+        CourseSchedule.objects.filter(pk=self.schedule.pk).update(current_capacity=0, available_slots=2)
+        EnrollmentAdmissionTicket.objects.create(user=member, schedule=self.schedule)
+        process_admission_batch()
+        ticket = EnrollmentAdmissionTicket.objects.get(user=member)
+        self.assertEqual((ticket.status, ticket.enrollment_id), ('admitted', enrollment.pk))
+        self.assertEqual(CourseEnrollment.objects.get(pk=enrollment.pk).status, 'enrolled')
+        self.schedule.refresh_from_db()
+        self.assertEqual((self.schedule.current_capacity, self.schedule.available_slots), (1, 1))
+
+
+class TimetableTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='coach',
+            email='coach@example.com',
+            password='testpass123',
+            first_name='Ada',
+            last_name='Coach',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='Barre')
+        self.course = Course.objects.create(
+            name='Barre Basics',
+            description='Ballet-inspired',
+            category=category,
+            instructor=self.instructor,
+            price=18,
+            duration=50,
+            capacity=12
+        )
+        # 2030-01-09 is a Wednesday; the week starts on 2030-01-07
+        self.schedule = CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-01-09T18:00:00Z',
+            end_time='2030-01-09T18:50:00Z',
+            location='Studio B'
+        )
+
+    def fetch(self, **params):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/courses/timetable/', {'week': '2030-01-10', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return response.data
+
+    def test_week_lookup_is_single_query(self):
+        data = self.fetch(location='Studio B')
+        self.assertEqual(str(data['week_start']), '2030-01-07')
+        entry = data['entries'][0]
+        self.assertEqual(entry['course_name'], 'Barre Basics')
+        self.assertEqual(entry['instructor_name'], 'Ada Coach')
+        self.assertEqual(entry['available_slots'], 12)
+
+    def test_entries_follow_course_and_seat_changes(self):
+        from .services import enroll
+        self.course.name = 'Barre Flow'
+        self.course.save()
+        member = User.objects.create_user(username='barre', email='barre@example.com', password='testpass123')
+        enroll(member, self.schedule)
+        entry = self.fetch()['entries'][0]
+        self.assertEqual(entry['course_name'], 'Barre Flow')
+        self.assertEqual(entry['current_capacity'], 1)
+
+    def test_moving_schedule_changes_week(self):
+        self.schedule.start_time = '2030-01-16T18:00:00Z'
+        self.schedule.end_time = '2030-01-16T18:50:00Z'
+        self.schedule.save()
+        self.assertEqual(self.fetch()['entries'], [])
+
+    def test_invalid_week_is_rejected(self):
+        for week in ('next week', '2030-02-30'):
+            response = self.client.get('/api/courses/timetable/', {'week': week})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, week)
+
+
+class CourseSearchTests(APITestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            username='searchcoach',
+            email='searchcoach@example.com',
+            password='testpass123',
+            first_name='Maya',
+            last_name='Stretch',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='Mobility')
+        self.flow = Course.objects.create(
+            name='Mobility Flow',
+            description='Gentle stretching for recovery',
+            category=category,
+            instructor=instructor,
+            price=10,
+            duration=30,
+            capacity=10
+        )
+        self.power = Course.objects.create(
+            name='Power Lifting',
+            description='Heavy lifts with mobility warm-up',
+            category=CourseCategory.objects.create(name='Strength'),
+            instructor=instructor,
+            price=30,
+            duration=60,
+            capacity=8
+        )
+
+    def search(self, terms):
+        response = self.client.get('/api/courses/', {'search': terms})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_ranked_prefix_search_with_highlight(self):
+        results = self.search('mobil')
+        self.assertEqual([r['id'] for r in results], [self.flow.id, self.power.id])
+        self.assertEqual(results[0]['search_highlight']['name'], '<mark>Mobility</mark> Flow')
+
+    def test_index_follows_instructor_and_deletes(self):
+        self.assertCountEqual([r['id'] for r in self.search('maya')], [self.flow.id, self.power.id])
+        self.power.delete()
+        self.assertEqual([r['id'] for r in self.search('lifting')], [])
+
+    def test_highlight_escapes_indexed_text(self):
+        self.flow.name = 'Mobility <script>alert(1)</script>'
+        self.flow.save()
+        name = self.search('mobility')[0]['search_highlight']['name']
+        self.assertEqual(name, '<mark>Mobility</mark> &lt;script&gt;alert(1)&lt;/script&gt;')
+
+    def test_every_match_is_reachable_past_the_first_page(self):
+        category = CourseCategory.objects.create(name='Drills')
+        for i in range(30):
+            Course.objects.create(
+                name=f'Agility Drill {i}', category=category, instructor=self.flow.instructor,
+                price=10, duration=30, capacity=10
+            )
+        seen, params = [], {'search': 'agility', 'page_size': 100}
+        response = self.client.get('/api/courses/', params)
+        while True:
+            seen.extend(r['id'] for r in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(set(seen)), 30)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(
+            username='etagcoach',
+            email='etagcoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        self.course = Course.objects.create(
+            name='Kettlebell',
+            description='Swings',
+            category=CourseCategory.objects.create(name='Conditioning'),
+            instructor=instructor,
+            price=20,
+            duration=45,
+            capacity=10
+        )
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        from unittest import mock
+        first = self.client.get('/api/courses/')
+        etag = first['ETag']
+        with mock.patch('gym_api.courses.views.CourseSerializer.to_representation') as to_representation:
+            second = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+        self.course.price = 25
+        self.course.save()
+        third = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third['ETag'], etag)
+
+    def test_list_validator_follows_category_and_instructor(self):
+        url = '/api/courses/'
+        etag = self.client.get(url)['ETag']
+        self.course.category.name = 'Strength'
+        self.course.category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+        etag = self.client.get(url)['ETag']
+        self.course.instructor.first_name = 'Kira'
+        self.course.instructor.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_detail_validator_follows_schedules(self):
+        url = f'/api/courses/{self.course.id}/'
+        first = self.client.get(url)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T11:00:00Z',
+            location='Studio K'
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, status.HTTP_200_OK)
+
+    def test_detail_validator_follows_waitlist(self):
+        from .models import CourseWaitlistEntry
+        schedule = CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T11:00:00Z',
+            location='Studio K'
+        )
+        url = f'/api/courses/{self.course.id}/'
+        etag = self.client.get(url)['ETag']
+        member = User.objects.create_user(username='waiting', email='waiting@example.com', password='testpass123')
+        CourseWaitlistEntry.objects.create(user=member, schedule=schedule, ticket=1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.instructor = User.objects.create_user(
+            username='cachecoach',
+            email='cachecoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        self.course = Course.objects.create(
+            name='Rowing',
+            description='Erg intervals',
+            category=CourseCategory.objects.create(name='Cardio'),
+            instructor=self.instructor,
+            price=20,
+            duration=45,
+            capacity=10
+        )
+
+    def test_anonymous_list_is_served_from_cache_until_invalidated(self):
+        first = self.client.get('/api/courses/', {'page': 1, 'difficulty': 'beginner'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/courses/', {'difficulty': 'beginner', 'page': 1})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        self.course.name = 'Indoor Rowing'
+        self.course.save()
+        third = self.client.get('/api/courses/', {'page': 1, 'difficulty': 'beginner'})
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertIn('Indoor Rowing', [row['name'] for row in third.data['results']])
+
+    def test_enrollment_evicts_schedule_list(self):
+        schedule = CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-01-01T10:00:00Z',
+            end_time='2030-01-01T11:00:00Z',
+            location='Boathouse'
+        )
+        from .services import enroll
+        self.client.get('/api/courses/schedules/', {'course': self.course.id})
+        enroll(self.instructor, schedule)
+        response = self.client.get('/api/courses/schedules/', {'course': self.course.id})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['current_capacity'], 1)
+
+    def test_authenticated_requests_bypass_cache(self):
+        self.client.force_authenticate(user=self.instructor)
+        response = self.client.get('/api/courses/')
+        self.assertNotIn('X-Cache', response)
+
+    def test_concurrent_miss_waits_for_single_rebuild(self):
+        import threading
+        from django.core.cache import cache
+        from gym_api.common import cache as response_cache
+        cache.add('single-flight:lock', 1, 5)
+        threading.Timer(0.1, cache.set, args=('single-flight', 'built elsewhere')).start()
+        builds = []
+        value, hit = response_cache.get_or_build('single-flight', lambda: builds.append(1) or 'rebuilt')
+        self.assertEqual((value, hit), ('built elsewhere', True))
+        self.assertEqual(builds, [])
+
+
+class ScheduleRuleTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='ruleadmin',
+            email='ruleadmin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        self.course = Course.objects.create(
+            name='Spin',
+            description='Bike intervals',
+            category=CourseCategory.objects.create(name='Cycling'),
+            instructor=self.admin,
+            price=20,
+            duration=60,
+            capacity=10
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/api/courses/admin/schedule-rules/'
+
+    def _create_rule(self):
+        # 2030-01-07 is a Monday: Mon/Wed over two weeks gives four classes
+        return self.client.post(self.url, {
+            'course': self.course.id,
+            'weekdays': [2, 0],
+            'start_time': '18:00',
+            'end_time': '19:00',
+            'location': 'Studio A',
+            'start_date': '2030-01-07',
+            'end_date': '2030-01-20',
+        }, format='json')
+
+    def test_create_expands_rule_in_one_insert(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._create_rule()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 4)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "gym_course_schedule"')]
+        self.assertEqual(len(inserts), 1)
+
+        schedules = CourseSchedule.objects.filter(rule_id=response.data['id']).order_by('start_time')
+        self.assertEqual(
+            [(s.start_time.weekday(), s.start_time.hour) for s in schedules],
+            [(0, 18), (2, 18), (0, 18), (2, 18)]
+        )
+        self.assertEqual(TimetableEntry.objects.filter(schedule__in=schedules).count(), 4)
+
+    def test_edit_regenerates_only_unbooked_future_occurrences(self):
+        from .services import enroll
+        rule_id = self._create_rule().data['id']
+        booked = CourseSchedule.objects.filter(rule_id=rule_id).order_by('start_time').first()
+        enroll(self.admin, booked)
+
+        response = self.client.patch(f'{self.url}{rule_id}/', {'start_time': '07:00', 'end_time': '08:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['removed'], response.data['created']), (3, 4))
+        hours = sorted(s.start_time.hour for s in CourseSchedule.objects.filter(rule_id=rule_id))
+        self.assertEqual(hours, [7, 7, 7, 7, 18])
+        self.assertTrue(CourseSchedule.objects.filter(pk=booked.pk, start_time__hour=18).exists())
+
+    def test_rule_span_is_bounded(self):
+        response = self.client.post(self.url, {
+            'course': self.course.id,
+            'weekdays': [0],
+            'start_time': '18:00',
+            'end_time': '19:00',
+            'location': 'Studio A',
+            'start_date': '2030-01-01',
+            'end_date': '2032-01-01',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScheduleConflictTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='conflictadmin',
+            email='conflictadmin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        self.instructor = User.objects.create_user(
+            username='conflictcoach',
+            email='conflictcoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='Strength')
+        self.course, self.other_course = [
+            Course.objects.create(
+                name=name,
+                description='Lifting',
+                category=category,
+                instructor=self.instructor,
+                price=20,
+                duration=60,
+                capacity=10
+            )
+            for name in ('Squat Clinic', 'Deadlift Clinic')
+        ]
+        self.existing = CourseSchedule.objects.create(
+            course=self.course,
+            start_time='2030-03-04T10:00:00Z',
+            end_time='2030-03-04T11:00:00Z',
+            location='Rack Room'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _create(self, **overrides):
+        data = {
+            'course': self.other_course.id,
+            'start_time': '2030-03-04T10:30:00Z',
+            'end_time': '2030-03-04T11:30:00Z',
+            'location': 'Platform',
+        }
+        data.update(overrides)
+        return self.client.post('/api/courses/admin/schedules/create/', data, format='json')
+
+    def test_overlapping_instructor_or_location_is_rejected(self):
+        response = self._create()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('conflicts', response.data)
+
+        other = User.objects.create_user(
+            username='othercoach', email='othercoach@example.com', password='testpass123', role='staff'
+        )
+        self.other_course.instructor = other
+        self.other_course.save()
+        self.assertEqual(self._create().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._create(location='Rack Room', start_time='2030-03-04T12:00:00Z', end_time='2030-03-04T13:00:00Z').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._create(location='Rack Room', start_time='2030-03-04T10:45:00Z').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_back_to_back_sessions_and_self_updates_are_allowed(self):
+        response = self._create(start_time='2030-03-04T11:00:00Z', end_time='2030-03-04T12:00:00Z')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.patch(
+            f'/api/courses/admin/schedules/{self.existing.id}/',
+            {'start_time': '2030-03-04T09:30:00Z', 'end_time': '2030-03-04T10:30:00Z'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_validation_sweeps_batch_in_constant_queries(self):
+        import datetime
+        from . import conflicts
+        base = datetime.datetime(2031, 1, 1, tzinfo=datetime.timezone.utc)
+        proposals = [
+            conflicts.Slot(None, self.instructor.id, f'Room {i % 5}',
+                           base + datetime.timedelta(hours=i), base + datetime.timedelta(hours=i, minutes=50), True)
+            for i in range(300)
+        ]
+        with self.assertNumQueries(2):
+            self.assertEqual(conflicts.find_conflicts(proposals), [])
+        proposals.append(proposals[150]._replace(location='Annex', start_time=proposals[150].start_time + datetime.timedelta(minutes=10)))
+        with self.assertNumQueries(2):
+            self.assertEqual(len(conflicts.find_conflicts(proposals)), 1)
+
+
+class AvailableSeatTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='seatcoach',
+            email='seatcoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        self.course = Course.objects.create(
+            name='Barre',
+            description='Ballet conditioning',
+            category=CourseCategory.objects.create(name='Barre'),
+            instructor=self.instructor,
+            price=20,
+            duration=60,
+            capacity=5
+        )
+        self.schedules = [
+            CourseSchedule.objects.create(
+                course=self.course,
+                start_time=f'2030-05-0{day}T10:00:00Z',
+                end_time=f'2030-05-0{day}T11:00:00Z',
+                location='Barre Studio',
+                capacity_override=override
+            )
+            for day, override in ((1, None), (2, 2), (3, 1))
+        ]
+
+    def test_override_and_course_resize_keep_column_in_step(self):
+        from .services import ScheduleFull, enroll
+        small = self.schedules[2]
+        self.assertEqual(small.available_slots, 1)
+        enroll(self.instructor, small)
+        with self.assertRaises(ScheduleFull):
+            enroll(User.objects.create_user(username='late', email='late@example.com', password='testpass123'), small)
+
+        self.course.capacity = 8
+        self.course.save()
+        slots = dict(CourseSchedule.objects.filter(course=self.course).values_list('id', 'available_slots'))
+        self.assertEqual([slots[s.id] for s in self.schedules], [8, 2, 0])
+
+    def test_filters_and_soonest_ordering_run_in_sql(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/courses/schedules/', {
+                'course': self.course.id,
+                'min_available': 2,
+                'start_after': '2030-05-02T00:00:00Z',
+                'start_before': '2030-05-04T00:00:00Z',
+            })
+        self.assertEqual([row['id'] for row in response.data['results']], [self.schedules[1].id])
+        self.assertTrue(any('"available_slots" >=' in q['sql'] for q in ctx.captured_queries))
+
+        CourseSchedule.objects.filter(pk=self.schedules[0].pk).update(available_slots=0)
+        response = self.client.get('/api/courses/schedules/', {'course': self.course.id, 'ordering': 'soonest'})
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.schedules[1].id, self.schedules[2].id]
+        )
+
+
+class BulkEnrollmentTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='bulkadmin',
+            email='bulkadmin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        course = Course.objects.create(
+            name='Corporate Yoga',
+            description='Team sessions',
+            category=CourseCategory.objects.create(name='Corporate'),
+            instructor=self.admin,
+            price=20,
+            duration=60,
+            capacity=5
+        )
+        self.small, self.large = [
+            CourseSchedule.objects.create(
+                course=course,
+                start_time=f'2030-06-0{day}T10:00:00Z',
+                end_time=f'2030-06-0{day}T11:00:00Z',
+                location='Office',
+                capacity_override=override
+            )
+            for day, override in ((1, 3), (2, None))
+        ]
+        self.members = [
+            User.objects.create_user(
+                username=f'employee{i}',
+                email=f'employee{i}@example.com',
+                password='testpass123',
+                member_id=f'M-{i}'
+            )
+            for i in range(4)
+        ]
+        from .services import enroll
+        CourseEnrollment.objects.create(user=self.members[0], schedule=self.large, status='cancelled')
+        enroll(self.members[1], self.large)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_enroll_reports_per_row_outcomes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/courses/admin/enrollments/bulk/', {
+                'user_ids': [m.id for m in self.members[:3]] + [999999],
+                'member_ids': ['M-3'],
+                'schedule_ids': [self.small.id, self.large.id, 999999],
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        outcomes = [row['result'] for row in response.data['results']]
+        self.assertEqual(outcomes[:10], [
+            'enrolled', 'enrolled', 'enrolled', 'user_not_found', 'schedule_full',
+            'reactivated', 'already_enrolled', 'enrolled', 'user_not_found', 'enrolled',
+        ])
+        self.assertEqual(outcomes[10:], ['schedule_not_found'] * 5)
+        self.assertEqual(response.data['summary']['enrolled'], 5)
+
+        inserts = [q for q in ctx.captured_queries
+                   if q['sql'].startswith('INSERT') and 'INTO "gym_course_enrollment"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.small.refresh_from_db()
+        self.large.refresh_from_db()
+        self.assertEqual((self.small.current_capacity, self.small.available_slots), (3, 0))
+        self.assertEqual((self.large.current_capacity, self.large.available_slots), (4, 1))
+        self.assertEqual(CourseEnrollment.objects.filter(schedule=self.large, status='enrolled').count(), 4)
+
+    def test_requires_members(self):
+        response = self.client.post('/api/courses/admin/enrollments/bulk/', {
+            'schedule_ids': [self.small.id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SeatReconcileTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='reconcileadmin',
+            email='reconcileadmin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        course = Course.objects.create(
+            name='Boxing',
+            description='Pad work',
+            category=CourseCategory.objects.create(name='Combat'),
+            instructor=self.admin,
+            price=20,
+            duration=60,
+            capacity=10
+        )
+        self.schedules = [
+            CourseSchedule.objects.create(
+                course=course,
+                start_time=f'2030-07-0{day}T10:00:00Z',
+                end_time=f'2030-07-0{day}T11:00:00Z',
+                location='Ring'
+            )
+            for day in range(1, 4)
+        ]
+        members = [
+            User.objects.create_user(username=f'boxer{i}', email=f'boxer{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        # Rows written without going through the seat services
+        for member, state in zip(members, ('enrolled', 'completed', 'cancelled')):
+            CourseEnrollment.objects.create(user=member, schedule=self.schedules[0], status=state)
+        CourseSchedule.objects.filter(pk=self.schedules[1].pk).update(current_capacity=4, available_slots=6)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_endpoint_reports_then_fixes_drift(self):
+        url = '/api/courses/admin/schedules/reconcile/'
+        report = self.client.get(url, {'all': 'true'}).data
+        drift = {row['schedule']: (row['recorded'], row['actual']) for row in report['schedules']}
+        self.assertEqual(drift, {self.schedules[0].id: (0, 2), self.schedules[1].id: (4, 0)})
+        self.assertEqual(report['fixed'], 0)
+
+        report = self.client.post(f'{url}?all=true').data
+        self.assertEqual(report['fixed'], 2)
+        counters = CourseSchedule.objects.filter(pk__in=[s.id for s in self.schedules]).order_by('pk')
+        self.assertEqual(
+            list(counters.values_list('current_capacity', 'available_slots')),
+            [(2, 8), (0, 10), (0, 10)]
+        )
+        self.assertEqual(self.client.get(url, {'all': 'true'}).data['drifted'], 0)
+
+    def test_command_walks_schedules_in_chunks(self):
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('reconcile_seats', '--all', '--chunk-size', '1', stdout=out)
+        self.assertIn('2 drifted, 2 fixed', out.getvalue())
+
+
+class CheckInTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='deskcoach',
+            email='deskcoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        course = Course.objects.create(
+            name='HIIT',
+            description='Intervals',
+            category=CourseCategory.objects.create(name='HIIT'),
+            instructor=self.instructor,
+            price=20,
+            duration=45,
+            capacity=40
+        )
+        self.schedule = CourseSchedule.objects.create(
+            course=course,
+            start_time='2030-08-01T10:00:00Z',
+            end_time='2030-08-01T11:00:00Z',
+            location='Floor'
+        )
+        self.enrollments = [
+            CourseEnrollment.objects.create(
+                user=User.objects.create_user(
+                    username=f'hiit{i}', email=f'hiit{i}@example.com', password='testpass123', member_id=f'H-{i}'
+                ),
+                schedule=self.schedule,
+                status='cancelled' if i == 4 else 'enrolled'
+            )
+            for i in range(5)
+        ]
+        self.url = f'/api/courses/schedules/{self.schedule.id}/check-in/'
+        self.client.force_authenticate(user=self.instructor)
+
+    def attendance(self):
+        return [e.attendance for e in CourseEnrollment.objects.filter(schedule=self.schedule).order_by('id')]
+
+    def test_mark_listed_members_present(self):
+        response = self.client.post(self.url, {
+            'member_ids': ['H-0', 'H-9'],
+            'enrollment_ids': [self.enrollments[1].id, self.enrollments[4].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['unknown'], {'enrollment_ids': [self.enrollments[4].id], 'member_ids': ['H-9']})
+        self.assertEqual(len(response.data['roster']), 4)
+        self.assertEqual(self.attendance(), [True, True, None, None, None])
+
+    def test_all_except_uses_a_single_update(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {'all_except': True, 'member_ids': ['H-2']}, format='json')
+        self.assertEqual(response.data['present'], 3)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "gym_course_enrollment"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.attendance(), [True, True, False, True, None])
+
+    def test_members_cannot_check_in(self):
+        self.client.force_authenticate(user=self.enrollments[0].user)
+        response = self.client.post(self.url, {'all_except': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RatingAggregateTests(APITestCase):
+    def setUp(self):
+        self.instructor = User.objects.create_user(
+            username='ratingcoach',
+            email='ratingcoach@example.com',
+            password='testpass123',
+            role='staff'
+        )
+        category = CourseCategory.objects.create(name='Dance')
+        self.salsa, self.tango = [
+            Course.objects.create(
+                name=name,
+                description='Partner dance',
+                category=category,
+                instructor=self.instructor,
+                price=20,
+                duration=60,
+                capacity=10
+            )
+            for name in ('Salsa', 'Tango')
+        ]
+        self.members = [
+            User.objects.create_user(username=f'dancer{i}', email=f'dancer{i}@example.com', password='testpass123')
+            for i in range(2)
+        ]
+        from .services import enroll
+        self.enrollments = [
+            enroll(member, CourseSchedule.objects.create(
+                course=course,
+                start_time='2030-09-01T10:00:00Z',
+                end_time='2030-09-01T11:00:00Z',
+                location=f'{course.name} Hall'
+            ))
+            for member, course in zip(self.members, (self.salsa, self.tango))
+        ]
+
+    def aggregates(self, course):
+        course.refresh_from_db()
+        return course.rating_sum, course.rating_count, course.rating_3_count, course.rating_5_count
+
+    def test_rating_changes_update_course_incrementally(self):
+        enrollment = self.enrollments[0]
+        url = f'/api/courses/enrollments/{enrollment.id}/'
+        self.client.force_authenticate(user=self.members[0])
+        self.client.patch(url, {'rating': 5}, format='json')
+        self.assertEqual(self.aggregates(self.salsa), (5, 1, 0, 1))
+        self.client.patch(url, {'rating': 3}, format='json')
+        self.assertEqual(self.aggregates(self.salsa), (3, 1, 1, 0))
+        self.client.delete(url)
+        self.assertEqual(self.aggregates(self.salsa), (0, 0, 0, 0))
+
+    def test_list_sorts_by_average_and_rebuild_recomputes(self):
+        from django.core.management import call_command
+        CourseEnrollment.objects.filter(pk=self.enrollments[0].pk).update(rating=2)
+        CourseEnrollment.objects.filter(pk=self.enrollments[1].pk).update(rating=4)
+        call_command('rebuild_course_ratings', stdout=StringIO())
+        self.assertEqual(self.aggregates(self.tango), (4, 1, 0, 0))
+
+        response = self.client.get('/api/courses/', {'ordering': '-rating_average', 'instructor': self.instructor.id})
+        rows = response.data['results']
+        self.assertEqual([row['name'] for row in rows], ['Tango', 'Salsa'])
+        self.assertEqual(rows[0]['rating_average'], 4.0)
+        self.assertEqual(rows[1]['rating_histogram'][2], 1)
+
+
+class EnrollmentArchiveTests(APITestCase):
+    def setUp(self):
+        import datetime
+        from django.utils import timezone
+        self.member = User.objects.create_user(
+            username='veteran',
+            email='veteran@example.com',
+            password='testpass123'
+        )
+        self.course = Course.objects.create(
+            name='Tai Chi',
+            description='Slow forms',
+            category=CourseCategory.objects.create(name='Mind & Body'),
+            instructor=User.objects.create_user(
+                username='taichicoach', email='taichicoach@example.com', password='testpass123', role='staff'
+            ),
+            price=20,
+            duration=60,
+            capacity=10
+        )
+        now = timezone.now()
+        self.schedules = [
+            CourseSchedule.objects.create(
+                course=self.course,
+                start_time=now + datetime.timedelta(days=offset),
+                end_time=now + datetime.timedelta(days=offset, hours=1),
+                location='Garden'
+            )
+            for offset in (-800, -700, 30)
+        ]
+        for schedule, rating in zip(self.schedules, (4, 2, None)):
+            CourseEnrollment.objects.create(
+                user=self.member, schedule=schedule,
+                status='enrolled' if rating is None else 'completed', rating=rating
+            )
+
+    def test_archive_moves_old_rows_and_history_reads_both(self):
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import ArchivedCourseEnrollment
+        from . import ical
+        feed = ical.feed_for(self.member)
+        with CaptureQueriesContext(connection) as ctx:
+            call_command('archive_enrollments', '--batch-size', '2', stdout=StringIO())
+        bumps = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "gym_course_calendar_feed"')]
+        self.assertEqual(len(bumps), 1)
+        feed.refresh_from_db()
+        self.assertEqual(feed.version, 2)
+        self.assertEqual(list(CourseEnrollment.objects.values_list('schedule_id', flat=True)), [self.schedules[2].id])
+        self.assertEqual(ArchivedCourseEnrollment.objects.count(), 2)
+
+        self.client.force_authenticate(user=self.member)
+        response = self.client.get('/api/courses/enrollments/history/')
+        rows = response.data['results']
+        self.assertEqual([row['schedule'] for row in rows], [s.id for s in reversed(self.schedules)])
+        self.assertEqual(sorted(row['archived'] for row in rows), [False, True, True])
+        self.assertEqual({row['course_name'] for row in rows}, {'Tai Chi'})
+        completed = self.client.get('/api/courses/enrollments/history/', {'status': 'completed'}).data
+        self.assertEqual(completed['count'], 2)
+
+        self.assertEqual(len(self.client.get('/api/courses/enrollments/').data['results']), 1)
+
+        self.client.force_authenticate(user=self.course.instructor)
+        self.assertEqual(self.client.get('/api/courses/enrollments/history/', {'user': self.member.id}).data['count'], 3)
+        response = self.client.get('/api/courses/enrollments/history/', {'user': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        call_command('rebuild_course_ratings', stdout=StringIO())
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.rating_sum, self.course.rating_count), (6, 2))
+
+
+class CalendarFeedTests(APITestCase):
+    def setUp(self):
+        self.member = User.objects.create_user(
+            username='subscriber',
+            email='subscriber@example.com',
+            password='testpass123'
+        )
+        self.course = Course.objects.create(
+            name='Aqua Aerobics; Deep Water, Long Session ' + 'Ü' * 40,
+            description='Pool work',
+            category=CourseCategory.objects.create(name='Aquatics'),
+            instructor=User.objects.create_user(
+                username='poolcoach', email='poolcoach@example.com', password='testpass123', role='staff'
+            ),
+            price=20,
+            duration=60,
+            capacity=10
+        )
+        self.schedules = [
+            CourseSchedule.objects.create(
+                course=self.course,
+                start_time=f'2030-10-0{day}T10:00:00Z',
+                end_time=f'2030-10-0{day}T11:00:00Z',
+                location='Pool'
+            )
+            for day in (1, 2, 3)
+        ]
+        CourseEnrollment.objects.create(user=self.member, schedule=self.schedules[0])
+        CourseEnrollment.objects.create(user=self.member, schedule=self.schedules[1], status='cancelled')
+        self.client.force_authenticate(user=self.member)
+        self.url = self.client.get('/api/courses/calendar-feed/').data['url']
+        self.client.force_authenticate(user=None)
+
+    def fetch(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_feed_streams_upcoming_bookings(self):
+        response = self.fetch()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn('DTSTART:20301001T100000Z', body)
+        self.assertIn(r'SUMMARY:Aqua Aerobics\; Deep Water\, Long', body)
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in body.split('\r\n')))
+
+    def test_if_none_match_until_bookings_change(self):
+        etag = self.fetch()['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        CourseEnrollment.objects.create(user=self.member, schedule=self.schedules[2])
+        response = self.fetch(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content).count(b'BEGIN:VEVENT'), 2)
+
+    def test_rotating_token_revokes_old_url(self):
+        old_url = self.url
+        self.client.force_authenticate(user=self.member)
+        new_url = self.client.post('/api/courses/calendar-feed/').data['url']
+        self.client.force_authenticate(user=None)
+        self.assertNotEqual(new_url, old_url)
+        self.assertEqual(self.client.get(old_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(new_url).status_code, status.HTTP_200_OK)
+
+
+class EnrollmentLifecycleTests(TestCase):
+    def setUp(self):
+        import datetime
+        from django.utils import timezone
+        self.course = Course.objects.create(
+            name='Spin',
+            description='Indoor cycling',
+            category=CourseCategory.objects.create(name='Cardio'),
+            instructor=User.objects.create_user(
+                username='spincoach', email='spincoach@example.com', password='testpass123', role='staff'
+            ),
+            price=15,
+            duration=45,
+            capacity=10
+        )
+        now = timezone.now()
+        self.schedules = [
+            CourseSchedule.objects.create(
+                course=self.course,
+                start_time=now + datetime.timedelta(days=offset, hours=-1),
+                end_time=now + datetime.timedelta(days=offset, minutes=-5),
+                location='Studio 3'
+            )
+            for offset in (-10, -3, 0, 2)
+        ]
+        members = [
+            User.objects.create_user(username=f'rider{i}', email=f'rider{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        self.enrollments = {}
+        for schedule in self.schedules:
+            for member, attendance in zip(members, (True, False, None)):
+                self.enrollments[schedule.pk, member.pk] = CourseEnrollment.objects.create(
+                    user=member, schedule=schedule, attendance=attendance
+                )
+        self.members = members
+
+    def statuses(self, schedule):
+        return list(
+            CourseEnrollment.objects.filter(schedule=schedule)
+            .order_by('user_id').values_list('status', flat=True)
+        )
+
+    def test_finished_schedules_are_closed_out_per_window(self):
+        import datetime
+        from .lifecycle import complete_past_enrollments
+        from .reconcile import reconcile_seats
+        CourseEnrollment.objects.filter(schedule=self.schedules[0], user=self.members[2]).update(status='cancelled')
+        reconcile_seats(include_past=True)
+
+        report = complete_past_enrollments(window=datetime.timedelta(hours=1))
+
+        self.assertEqual(self.statuses(self.schedules[0]), ['completed', 'no_show', 'cancelled'])
+        for schedule in self.schedules[1:3]:
+            self.assertEqual(self.statuses(schedule), ['completed', 'no_show', 'completed'])
+        self.assertEqual(self.statuses(self.schedules[3]), ['enrolled'] * 3)
+        self.assertGreaterEqual(report['windows'], 3)
+        self.assertGreaterEqual(report['completed'], 5)
+        self.assertGreaterEqual(report['no_show'], 3)
+        # Seats stay taken: no-shows and completions still hold their seat
+        self.assertEqual(reconcile_seats(fix=False, include_past=True)['drifted'], 0)
+
+        # Running again is a no-op
+        self.assertEqual(
+            complete_past_enrollments(), {'windows': 0, 'completed': 0, 'no_show': 0}
+        )
+
+    def test_resumes_after_partial_run_and_respects_grace(self):
+        import datetime
+        from .lifecycle import complete_past_enrollments
+        CourseEnrollment.objects.exclude(schedule__in=self.schedules).filter(status='enrolled').update(status='completed')
+
+        report = complete_past_enrollments(window=datetime.timedelta(hours=1), max_windows=1)
+        self.assertEqual(report['windows'], 1)
+        self.assertEqual(self.statuses(self.schedules[0]), ['completed', 'no_show', 'completed'])
+        self.assertEqual(self.statuses(self.schedules[1]), ['enrolled'] * 3)
+
+        complete_past_enrollments(grace=datetime.timedelta(hours=1))
+        self.assertEqual(self.statuses(self.schedules[1]), ['completed', 'no_show', 'completed'])
+        self.assertEqual(self.statuses(self.schedules[2]), ['enrolled'] * 3)
+
+    def test_management_command(self):
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('complete_past_enrollments', '--window-hours', '48', stdout=out)
+        self.assertIn('completed', out.getvalue())
+        self.assertEqual(self.statuses(self.schedules[2]), ['completed', 'no_show', 'completed'])
+
+
+class HotPathIndexQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    def setUp(self):
+        import datetime
+        from django.utils import timezone
+        self.member = User.objects.create_user(
+            username='planmember', email='planmember@example.com', password='testpass123'
+        )
+        self.course = Course.objects.create(
+            name='Barre',
+            description='Ballet-inspired workout',
+            category=CourseCategory.objects.create(name='Toning'),
+            instructor=User.objects.create_user(
+                username='barrecoach', email='barrecoach@example.com', password='testpass123', role='staff'
+            ),
+            price=18,
+            duration=50,
+            capacity=12
+        )
+        now = timezone.now()
+        for day in range(1, 6):
+            schedule = CourseSchedule.objects.create(
+                course=self.course,
+                start_time=now + datetime.timedelta(days=day),
+                end_time=now + datetime.timedelta(days=day, hours=1),
+                location='Studio 4'
+            )
+            CourseEnrollment.objects.create(user=self.member, schedule=schedule)
+        self.client.force_authenticate(user=self.member)
+
+    def test_schedules_by_course_use_course_index(self):
+        with self.assertNoFullScan('gym_course_schedule'):
+            response = self.client.get('/api/courses/schedules/', {'course': self.course.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_member_enrollments_by_status_use_user_index(self):
+        with self.assertNoFullScan('gym_course_enrollment'):
+            response = self.client.get('/api/courses/enrollments/', {'status': 'enrolled'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_roster_uses_schedule_index(self):
+        from . import services
+        schedule = CourseSchedule.objects.filter(course=self.course).first()
+        with self.assertNoFullScan('gym_course_enrollment'):
+            list(services.roster(schedule.id))
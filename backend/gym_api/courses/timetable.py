@@ -0,0 +1,93 @@
+"""
+Maintenance of the denormalized weekly timetable (TimetableEntry)
+"""
+import datetime
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CourseSchedule, TimetableEntry
+
+TIMETABLE_FIELDS = [
+    'week_start', 'location', 'start_time', 'end_time', 'course_id',
+    'course_name', 'category_name', 'instructor_id', 'instructor_name',
+    'difficulty', 'capacity', 'current_capacity', 'is_active',
+]
+
+
+def week_start_for(value):
+    """
+    Monday of the week containing ``value`` (a datetime or date) in local time
+    """
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value - datetime.timedelta(days=value.weekday())
+
+
+def build_entry(schedule):
+    """
+    Build an unsaved TimetableEntry from a schedule with course, category and instructor loaded
+    """
+    course = schedule.course
+    return TimetableEntry(
+        schedule_id=schedule.pk,
+        week_start=week_start_for(schedule.start_time),
+        location=schedule.location,
+        start_time=schedule.start_time,
+        end_time=schedule.end_time,
+        course_id=course.pk,
+        course_name=course.name,
+        category_name=course.category.name,
+        instructor_id=course.instructor_id,
+        instructor_name=course.instructor.get_full_name() or course.instructor.username,
+        difficulty=course.difficulty,
+        capacity=schedule.effective_capacity,
+        current_capacity=schedule.current_capacity,
+        is_active=course.is_active,
+    )
+
+
+def sync_schedules(schedule_ids):
+    """
+    Upsert the timetable rows for the given schedules in one statement
+    """
+    schedules = CourseSchedule.objects.filter(pk__in=list(schedule_ids)).select_related(
+        'course__category', 'course__instructor'
+    )
+    entries = [build_entry(schedule) for schedule in schedules]
+    if entries:
+        TimetableEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['schedule'],
+            update_fields=TIMETABLE_FIELDS,
+        )
+    return len(entries)
+
+
+def sync_courses(course_filter):
+    """
+    Resync every schedule of the courses matching ``course_filter`` (filter kwargs on Course)
+    """
+    lookup = {f'course__{key}': value for key, value in course_filter.items()}
+    return sync_schedules(CourseSchedule.objects.filter(**lookup).values_list('pk', flat=True))
+
+
+def sync_seats(*schedule_ids):
+    """
+    Copy current_capacity from the schedules with a single UPDATE
+    """
+    current = CourseSchedule.objects.filter(pk=OuterRef('schedule_id')).values('current_capacity')[:1]
+    TimetableEntry.objects.filter(schedule_id__in=schedule_ids).update(current_capacity=Subquery(current))
+
+
+def rebuild(chunk_size=500):
+    """
+    Rebuild the whole timetable in chunks of schedules
+    """
+    ids = list(CourseSchedule.objects.order_by('pk').values_list('pk', flat=True))
+    total = 0
+    for start in range(0, len(ids), chunk_size):
+        total += sync_schedules(ids[start:start + chunk_size])
+    TimetableEntry.objects.exclude(schedule_id__in=CourseSchedule.objects.values('pk')).delete()
+    return total
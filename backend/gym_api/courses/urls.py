@@ -8,6 +8,14 @@ from .views import (
     CourseScheduleDetailView,
     CourseEnrollmentListCreateView,
     CourseEnrollmentDetailView,
+    CourseEnrollmentHistoryView,
+    AdminBulkEnrollmentView,
+    CourseWaitlistView,
+    CourseScheduleCheckInView,
+    EnrollmentAdmissionTicketDetailView,
+    TimetableView,
+    CalendarFeedView,
+    CalendarFeedIcsView,
     # 管理员视图
     AdminCourseListView,
     AdminCourseCreateView,
@@ -15,6 +23,9 @@ from .views import (
     AdminCourseScheduleListView,
     AdminCourseScheduleCreateView,
     AdminCourseScheduleDetailView,
+    AdminScheduleSeatReconcileView,
+    AdminCourseScheduleRuleListCreateView,
+    AdminCourseScheduleRuleDetailView,
     # 管理员课程分类视图
     AdminCourseCategoryListView,
     AdminCourseCategoryCreateView,
@@ -35,10 +46,18 @@ urlpatterns = [
     # 课程排课
     path('schedules/', CourseScheduleListCreateView.as_view(), name='schedule-list-create'),
     path('schedules/<int:pk>/', CourseScheduleDetailView.as_view(), name='schedule-detail'),
+    path('timetable/', TimetableView.as_view(), name='timetable'),
+    path('calendar-feed/', CalendarFeedView.as_view(), name='calendar-feed'),
+    path('calendar/<str:token>.ics', CalendarFeedIcsView.as_view(), name='calendar-ics'),
+    path('schedules/<int:pk>/waitlist/', CourseWaitlistView.as_view(), name='schedule-waitlist'),
+    path('schedules/<int:pk>/check-in/', CourseScheduleCheckInView.as_view(), name='schedule-check-in'),
     
     # 课程报名
     path('enrollments/', CourseEnrollmentListCreateView.as_view(), name='enrollment-list-create'),
     path('enrollments/<int:pk>/', CourseEnrollmentDetailView.as_view(), name='enrollment-detail'),
+    path('enrollments/history/', CourseEnrollmentHistoryView.as_view(), name='enrollment-history'),
+    path('admin/enrollments/bulk/', AdminBulkEnrollmentView.as_view(), name='admin-enrollment-bulk'),
+    path('admission-tickets/<int:pk>/', EnrollmentAdmissionTicketDetailView.as_view(), name='admission-ticket-detail'),
     
     # 管理员课程管理
     path('admin/courses/', AdminCourseListView.as_view(), name='admin-course-list'),
@@ -54,4 +73,7 @@ urlpatterns = [
     path('admin/schedules/', AdminCourseScheduleListView.as_view(), name='admin-schedule-list'),
     path('admin/schedules/create/', AdminCourseScheduleCreateView.as_view(), name='admin-schedule-create'),
     path('admin/schedules/<int:pk>/', AdminCourseScheduleDetailView.as_view(), name='admin-schedule-detail'),
+    path('admin/schedules/reconcile/', AdminScheduleSeatReconcileView.as_view(), name='admin-schedule-reconcile'),
+    path('admin/schedule-rules/', AdminCourseScheduleRuleListCreateView.as_view(), name='admin-schedule-rule-list-create'),
+    path('admin/schedule-rules/<int:pk>/', AdminCourseScheduleRuleDetailView.as_view(), name='admin-schedule-rule-detail'),
 ] 
\ No newline at end of file
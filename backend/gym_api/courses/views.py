@@ -3,21 +3,47 @@ from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
-from .models import CourseCategory, Course, CourseSchedule, CourseEnrollment
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+from .models import (
+    CalendarFeed,
+    CourseCategory,
+    Course,
+    CourseSchedule,
+    CourseScheduleRule,
+    CourseEnrollment,
+    CourseWaitlistEntry,
+    EnrollmentAdmissionTicket,
+    TimetableEntry,
+)
 from .serializers import (
     CourseCategorySerializer,
     CourseSerializer,
     CourseDetailSerializer,
     CourseScheduleSerializer,
+    CourseScheduleRuleSerializer,
     CourseEnrollmentSerializer,
+    BulkEnrollmentSerializer,
+    CheckInSerializer,
+    EnrollmentAdmissionTicketSerializer,
 )
 from gym_api.auth.permissions import IsAdminUserOrReadOnly, IsOwnerOrAdmin, IsStaffOrAdmin, IsAdmin
-from gym_api.orders.models import Order, OrderItem
+from gym_api.common.idempotency import idempotent
+from gym_api.common.mixins import AnonymousResponseCacheMixin, ConditionalGetMixin, SerializerQueryPlanMixin
+from gym_api.common.pagination import KeysetPagination
+from . import archive, ical, ratings, reconcile, recurrence, services, timetable
+from .filters import CourseScheduleFilter, CourseScheduleOrderingFilter
+from .search import CourseFullTextSearchFilter
 
 # Course Category Views
-class CourseCategoryListCreateView(generics.ListCreateAPIView):
+class CourseCategoryListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     Course Category List and Create View
     """
@@ -65,17 +91,19 @@ class AdminCourseCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdmin]
 
 # Course Views
-class CourseListCreateView(generics.ListCreateAPIView):
+class CourseListCreateView(AnonymousResponseCacheMixin, ConditionalGetMixin, SerializerQueryPlanMixin, generics.ListCreateAPIView):
     """
     Course List and Create View
     """
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsStaffOrAdmin]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, CourseFullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'instructor', 'difficulty', 'is_active']
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'price', 'created_at']
+    ordering_fields = ['name', 'price', 'created_at', 'rating_average', 'rating_count']
+    conditional_related = ('category', 'instructor')
+    response_cache_groups = ('courses',)
     
     def get_permissions(self):
         """
@@ -89,7 +117,7 @@ class CourseListCreateView(generics.ListCreateAPIView):
         """
         Non-staff/admin users can only view active courses
         """
-        queryset = super().get_queryset()
+        queryset = ratings.with_average(super().get_queryset())
         user = self.request.user
         
         if user.is_authenticated and user.role in ['staff', 'admin']:
@@ -97,12 +125,14 @@ class CourseListCreateView(generics.ListCreateAPIView):
         
         return queryset.filter(is_active=True)
 
-class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseDetailView(AnonymousResponseCacheMixin, ConditionalGetMixin, SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Course Detail, Update and Delete View
     """
     queryset = Course.objects.all()
     permission_classes = [IsStaffOrAdmin]
+    conditional_related = ('category', 'instructor', 'schedules', 'schedules__waitlist_entries')
+    response_cache_groups = ('courses',)
     
     def get_serializer_class(self):
         """
@@ -121,17 +151,17 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().get_permissions()
 
 # Admin Course Management Views
-class AdminCourseListView(generics.ListAPIView):
+class AdminCourseListView(SerializerQueryPlanMixin, generics.ListAPIView):
     """
     Admin Course List View
     """
-    queryset = Course.objects.all()
+    queryset = ratings.with_average(Course.objects.all())
     serializer_class = CourseSerializer
     permission_classes = [IsAdmin]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, CourseFullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'instructor', 'difficulty', 'is_active']
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'price', 'created_at']
+    ordering_fields = ['name', 'price', 'created_at', 'rating_average', 'rating_count']
 
 class AdminCourseCreateView(generics.CreateAPIView):
     """
@@ -141,7 +171,7 @@ class AdminCourseCreateView(generics.CreateAPIView):
     serializer_class = CourseSerializer
     permission_classes = [IsAdmin]
 
-class AdminCourseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminCourseDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Admin Course Detail, Update and Delete View
     """
@@ -158,15 +188,16 @@ class AdminCourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         return CourseSerializer
 
 # Course Schedule Views
-class CourseScheduleListCreateView(generics.ListCreateAPIView):
+class CourseScheduleListCreateView(AnonymousResponseCacheMixin, SerializerQueryPlanMixin, generics.ListCreateAPIView):
     """
     Course Schedule List and Create View
     """
     serializer_class = CourseScheduleSerializer
     permission_classes = [IsStaffOrAdmin]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['course']
-    ordering_fields = ['start_time', 'created_at']
+    filter_backends = [DjangoFilterBackend, CourseScheduleOrderingFilter]
+    filterset_class = CourseScheduleFilter
+    ordering_fields = ['start_time', 'available_slots', 'created_at']
+    response_cache_groups = ('courses',)
     
     def get_queryset(self):
         """
@@ -186,7 +217,7 @@ class CourseScheduleListCreateView(generics.ListCreateAPIView):
             return [permissions.AllowAny()]
         return super().get_permissions()
 
-class CourseScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseScheduleDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Course Schedule Detail, Update and Delete View
     """
@@ -203,15 +234,15 @@ class CourseScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().get_permissions()
 
 # Admin Course Schedule Management Views
-class AdminCourseScheduleListView(generics.ListAPIView):
+class AdminCourseScheduleListView(SerializerQueryPlanMixin, generics.ListAPIView):
     """
     Admin Course Schedule List View
     """
     serializer_class = CourseScheduleSerializer
     permission_classes = [IsAdmin]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['course']
-    ordering_fields = ['start_time', 'created_at']
+    filter_backends = [DjangoFilterBackend, CourseScheduleOrderingFilter]
+    filterset_class = CourseScheduleFilter
+    ordering_fields = ['start_time', 'available_slots', 'created_at']
     
     def get_queryset(self):
         """
@@ -231,7 +262,7 @@ class AdminCourseScheduleCreateView(generics.CreateAPIView):
     serializer_class = CourseScheduleSerializer
     permission_classes = [IsAdmin]
 
-class AdminCourseScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
+class AdminCourseScheduleDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Admin Course Schedule Detail, Update and Delete View
     """
@@ -239,16 +270,84 @@ class AdminCourseScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CourseScheduleSerializer
     permission_classes = [IsAdmin]
 
+class AdminScheduleSeatReconcileView(APIView):
+    """
+    Admin Seat Reconciliation View
+
+    GET reports schedules whose current_capacity differs from their seat
+    holders; POST also fixes them. Upcoming schedules only unless
+    ``?all=true`` is passed.
+    """
+    permission_classes = [IsAdmin]
+    
+    def _reconcile(self, request, fix):
+        include_past = request.query_params.get('all') in ('1', 'true')
+        return Response(reconcile.reconcile_seats(fix=fix, include_past=include_past))
+    
+    def get(self, request):
+        return self._reconcile(request, fix=False)
+    
+    def post(self, request):
+        return self._reconcile(request, fix=True)
+
+class AdminCourseScheduleRuleListCreateView(SerializerQueryPlanMixin, generics.ListCreateAPIView):
+    """
+    Admin Recurring Schedule Rule List and Create View
+
+    Creating a rule expands it into schedules with a single bulk insert.
+    """
+    queryset = CourseScheduleRule.objects.all()
+    serializer_class = CourseScheduleRuleSerializer
+    permission_classes = [IsAdmin]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['course', 'location']
+    ordering_fields = ['start_date', 'created_at']
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            rule = serializer.save()
+            created = recurrence.expand(rule)
+        return Response(
+            {**serializer.data, 'created': created, 'removed': 0},
+            status=status.HTTP_201_CREATED
+        )
+
+class AdminCourseScheduleRuleDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    Admin Recurring Schedule Rule Detail, Update and Delete View
+
+    Editing a rule regenerates its future schedules that have no
+    enrollments; past and booked schedules are kept as they are.
+    """
+    queryset = CourseScheduleRule.objects.all()
+    serializer_class = CourseScheduleRuleSerializer
+    permission_classes = [IsAdmin]
+    
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            rule = serializer.save()
+            removed, created = recurrence.regenerate(rule)
+        return Response({**serializer.data, 'created': created, 'removed': removed})
+    
+    def perform_destroy(self, instance):
+        recurrence.withdraw_rule(instance)
+
 # Course Enrollment Views
-class CourseEnrollmentListCreateView(generics.ListCreateAPIView):
+class CourseEnrollmentListCreateView(SerializerQueryPlanMixin, generics.ListCreateAPIView):
     """
     Course Enrollment List and Create View
     """
     serializer_class = CourseEnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    filter_backends = [DjangoFilterBackend]
     filterset_fields = ['user', 'schedule', 'status']
-    ordering_fields = ['created_at']
     
     def get_queryset(self):
         """
@@ -259,17 +358,30 @@ class CourseEnrollmentListCreateView(generics.ListCreateAPIView):
             return CourseEnrollment.objects.all()
         return CourseEnrollment.objects.filter(user=user)
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """
+        Schedules in burst mode hand out an admission ticket instead.
+        Retries carrying the same Idempotency-Key get the first response.
+        """
+        schedule_id = str(request.data.get('schedule', ''))
+        if schedule_id.isdigit():
+            schedule = CourseSchedule.objects.filter(pk=schedule_id, burst_mode=True).first()
+            if schedule is not None:
+                ticket = services.enqueue_admission(request.user, schedule)
+                return Response(
+                    EnrollmentAdmissionTicketSerializer(ticket).data,
+                    status=status.HTTP_202_ACCEPTED
+                )
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """
-        Create enrollment and update course capacity
+        Create enrollment; the serializer claims the seat
         """
-        enrollment = serializer.save(user=self.request.user)
-        schedule = enrollment.schedule
-        schedule.current_capacity += 1
-        schedule.save()
-        return enrollment
+        return serializer.save(user=self.request.user)
 
-class CourseEnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CourseEnrollmentDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Course Enrollment Detail, Update and Delete View
     """
@@ -289,30 +401,241 @@ class CourseEnrollmentDetailView(generics.RetrieveUpdateDestroyAPIView):
         """
         Update enrollment and handle course capacity
         """
-        old_status = self.get_object().status
-        new_status = serializer.validated_data.get('status', old_status)
+        old_status = serializer.instance.status
+        return services.update_enrollment(serializer, old_status)
+    
+    def perform_destroy(self, instance):
+        """
+        Delete enrollment and release its seat
+        """
+        services.withdraw(instance)
+
+class CourseEnrollmentHistoryView(generics.GenericAPIView):
+    """
+    Course Enrollment History View
+
+    Reads current and archived enrollments as one list, newest first.
+    Members see their own history; staff and admins may pass ``?user=``.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        lookup = {'user_id': request.user.pk}
+        if request.user.role in ['staff', 'admin']:
+            user_id = request.query_params.get('user')
+            if user_id and not user_id.isdigit():
+                raise ValidationError({'user': 'A valid user ID is required'})
+            lookup = {'user_id': int(user_id)} if user_id else {}
+        state = request.query_params.get('status')
+        if state:
+            lookup['status'] = state
+        page = self.paginate_queryset(archive.history(**lookup))
+        return self.get_paginated_response([dict(zip(archive.HISTORY_FIELDS, row)) for row in page])
+
+class AdminBulkEnrollmentView(APIView):
+    """
+    Admin Bulk Enrollment View
+
+    Enrolls a group of members (by user ID or member ID) into a set of
+    schedules in one transaction and reports an outcome per row.
+    """
+    permission_classes = [IsAdmin]
+    
+    def post(self, request):
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = services.bulk_enroll(**serializer.validated_data)
+        summary = {}
+        for row in results:
+            summary[row['result']] = summary.get(row['result'], 0) + 1
+        return Response({'summary': summary, 'results': results})
+
+class CourseWaitlistView(APIView):
+    """
+    Course Schedule Waitlist View
+    - GET: current user's position on the waitlist
+    - POST: enroll if a seat is free, otherwise join the waitlist
+    - DELETE: leave the waitlist
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_entry(self, request, pk):
+        return get_object_or_404(
+            CourseWaitlistEntry.objects.select_related('schedule'),
+            schedule_id=pk, user=request.user
+        )
+    
+    def waitlist_payload(self, entry):
+        schedule = entry.schedule
+        return {
+            'status': 'waitlisted',
+            'schedule': schedule.id,
+            'ticket': entry.ticket,
+            'position': entry.position,
+            'waitlist_length': schedule.waitlist_tail - schedule.waitlist_head,
+        }
+    
+    def get(self, request, pk):
+        return Response(self.waitlist_payload(self.get_entry(request, pk)))
+    
+    def post(self, request, pk):
+        schedule = get_object_or_404(CourseSchedule, pk=pk)
+        result = services.join_waitlist(request.user, schedule)
+        if isinstance(result, CourseEnrollment):
+            return Response(
+                {'status': 'enrolled', 'enrollment': CourseEnrollmentSerializer(result).data},
+                status=status.HTTP_201_CREATED
+            )
+        result.schedule.refresh_from_db(fields=['waitlist_head', 'waitlist_tail'])
+        return Response(self.waitlist_payload(result), status=status.HTTP_202_ACCEPTED)
+    
+    def delete(self, request, pk):
+        services.leave_waitlist(self.get_entry(request, pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CourseScheduleCheckInView(APIView):
+    """
+    Course Schedule Check-in View
+    - GET: class roster with attendance
+    - POST: mark members present (or everyone except the listed ones) in one
+      UPDATE and return the updated roster
+    """
+    permission_classes = [IsStaffOrAdmin]
+    
+    def roster_payload(self, schedule):
+        rows = services.roster(schedule.pk).order_by('user__first_name', 'user__last_name', 'id').values(
+            'id', 'user_id', 'user__member_id', 'user__username', 'user__first_name',
+            'user__last_name', 'status', 'attendance'
+        )
+        roster = [
+            {
+                'enrollment': row['id'],
+                'user': row['user_id'],
+                'member_id': row['user__member_id'],
+                'name': f"{row['user__first_name']} {row['user__last_name']}".strip() or row['user__username'],
+                'status': row['status'],
+                'attendance': row['attendance'],
+            }
+            for row in rows
+        ]
+        return {
+            'schedule': schedule.pk,
+            'present': sum(1 for row in roster if row['attendance']),
+            'roster': roster,
+        }
+    
+    def get(self, request, pk):
+        return Response(self.roster_payload(get_object_or_404(CourseSchedule, pk=pk)))
+    
+    def post(self, request, pk):
+        schedule = get_object_or_404(CourseSchedule, pk=pk)
+        serializer = CheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, unknown_enrollments, unknown_members = services.check_in(schedule.pk, **serializer.validated_data)
+        return Response({
+            **self.roster_payload(schedule),
+            'updated': updated,
+            'unknown': {'enrollment_ids': unknown_enrollments, 'member_ids': unknown_members},
+        })
+
+class CalendarFeedView(APIView):
+    """
+    Calendar Feed View
+    - GET: the current user's iCalendar subscription URL
+    - POST: rotate the token, revoking the old URL
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def payload(self, request, feed):
+        return {
+            'url': request.build_absolute_uri(reverse('gym_courses:calendar-ics', args=[feed.token])),
+            'version': feed.version,
+        }
+    
+    def get(self, request):
+        return Response(self.payload(request, ical.feed_for(request.user)))
+    
+    def post(self, request):
+        return Response(self.payload(request, ical.rotate_token(ical.feed_for(request.user))))
+
+class CalendarFeedIcsView(APIView):
+    """
+    Calendar Feed .ics View
+
+    Public, token-authenticated subscription of the member's upcoming
+    classes. Events are streamed; If-None-Match against the feed version
+    answers unchanged polls with 304 without reading any enrollments.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request, token):
+        feed = get_object_or_404(CalendarFeed.objects.select_related('user'), token=token)
+        etag = ical.etag(feed)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(ical.stream(feed.user), content_type='text/calendar; charset=utf-8')
+            response['Content-Disposition'] = 'inline; filename="classes.ics"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=900'
+        return response
+
+class TimetableView(APIView):
+    """
+    Weekly Timetable View
+    - Served from the denormalized timetable table with one indexed lookup
+    - week: any date in the week (YYYY-MM-DD), defaults to the current week
+    - location: optional location filter
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        week = request.query_params.get('week')
+        try:
+            day = parse_date(week) if week else timezone.now()
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({'week': 'Use the YYYY-MM-DD format'})
+        week_start = timetable.week_start_for(day)
         
-        enrollment = serializer.save()
+        entries = TimetableEntry.objects.filter(week_start=week_start, is_active=True)
+        location = request.query_params.get('location')
+        if location:
+            entries = entries.filter(location=location)
         
-        # If status changed from enrolled to cancelled
-        if old_status == 'enrolled' and new_status == 'cancelled':
-            schedule = enrollment.schedule
-            schedule.current_capacity -= 1
-            schedule.save()
+        rows = list(entries.order_by('start_time').values(
+            'schedule_id', 'course_id', 'course_name', 'category_name',
+            'instructor_id', 'instructor_name', 'difficulty', 'location',
+            'start_time', 'end_time', 'capacity', 'current_capacity'
+        ))
+        for row in rows:
+            row['available_slots'] = row['capacity'] - row['current_capacity']
         
-        return enrollment
+        return Response({
+            'week_start': week_start,
+            'location': location,
+            'entries': rows,
+        })
+
+class EnrollmentAdmissionTicketDetailView(generics.RetrieveAPIView):
+    """
+    Admission Ticket Detail View, polled by clients while queued
+    """
+    serializer_class = EnrollmentAdmissionTicketSerializer
+    permission_classes = [permissions.IsAuthenticated]
     
-    def perform_destroy(self, instance):
+    def get_queryset(self):
         """
-        Delete enrollment and update course capacity
+        Users can only poll their own tickets
         """
-        if instance.status == 'enrolled':
-            schedule = instance.schedule
-            schedule.current_capacity -= 1
-            schedule.save()
-        instance.delete()
+        user = self.request.user
+        if user.role in ['staff', 'admin']:
+            return EnrollmentAdmissionTicket.objects.all()
+        return EnrollmentAdmissionTicket.objects.filter(user=user)
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(SerializerQueryPlanMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
@@ -350,13 +673,6 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Check if schedule is full
-        if schedule.current_capacity >= schedule.course.capacity:
-            return Response(
-                {'message': 'Schedule is full'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         # Check if user is already enrolled
         if schedule.enrollments.filter(user=request.user).exists():
             return Response(
@@ -364,30 +680,26 @@ class CourseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create order for course enrollment
-        order = Order.objects.create(
-            user=request.user,
-            order_number=f'COURSE-{timezone.now().strftime("%Y%m%d%H%M%S")}',
-            total_amount=course.price,
-            status='paid',
-            payment_method='credit_card'
-        )
-
-        # Create order item
-        OrderItem.objects.create(
-            order=order,
-            item_type='course',
-            item_id=course.id,
-            quantity=1,
-            price=course.price
-        )
+        # Burst mode: queue the request, the admission worker creates the order
+        if schedule.burst_mode:
+            ticket = services.enqueue_admission(request.user, schedule, with_order=True)
+            return Response(
+                EnrollmentAdmissionTicketSerializer(ticket).data,
+                status=status.HTTP_202_ACCEPTED
+            )
 
-        # Update schedule capacity
-        schedule.current_capacity += 1
-        schedule.save()
+        try:
+            with transaction.atomic():
+                # Claim the seat and create the enrollment
+                services.enroll(request.user, schedule)
 
-        # Add user to schedule enrollments
-        schedule.enrollments.add(request.user)
+                # Create order for course enrollment
+                services.create_course_order(request.user, course)
+        except services.ScheduleFull:
+            return Response(
+                {'message': 'Schedule is full'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
             {'message': 'Successfully enrolled in course'},
@@ -399,10 +711,13 @@ class CourseCategoryViewSet(viewsets.ModelViewSet):
     serializer_class = CourseCategorySerializer
     permission_classes = [IsAuthenticated]
 
-class CourseScheduleViewSet(viewsets.ModelViewSet):
+class CourseScheduleViewSet(SerializerQueryPlanMixin, viewsets.ModelViewSet):
     queryset = CourseSchedule.objects.all()
     serializer_class = CourseScheduleSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, CourseScheduleOrderingFilter]
+    filterset_class = CourseScheduleFilter
+    ordering_fields = ['start_time', 'available_slots', 'created_at']
 
     def get_queryset(self):
         queryset = CourseSchedule.objects.all()
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
+from django.db import transaction
 from .models import MembershipPlan, Order, OrderItem
+from . import events, rollups
 
 @admin.register(MembershipPlan)
 class MembershipPlanAdmin(admin.ModelAdmin):
@@ -41,19 +43,24 @@ class OrderAdmin(admin.ModelAdmin):
     actions = ['mark_as_paid', 'mark_as_delivered', 'mark_as_completed', 'mark_as_refunded']
     
     def mark_as_paid(self, request, queryset):
-        queryset.update(status='paid')
+        with transaction.atomic():
+            pending = list(queryset.filter(status='pending'))
+            rollups.update_status(queryset, 'paid')
+            # Membership activation is handed to the outbox worker
+            for order in pending:
+                events.order_paid(order)
     mark_as_paid.short_description = 'Mark selected orders as paid'
     
     def mark_as_delivered(self, request, queryset):
-        queryset.update(status='delivered')
+        rollups.update_status(queryset, 'delivered')
     mark_as_delivered.short_description = 'Mark selected orders as delivered'
     
     def mark_as_completed(self, request, queryset):
-        queryset.update(status='completed')
+        rollups.update_status(queryset, 'completed')
     mark_as_completed.short_description = 'Mark selected orders as completed'
     
     def mark_as_refunded(self, request, queryset):
-        queryset.update(status='refunded')
+        rollups.update_status(queryset, 'refunded')
     mark_as_refunded.short_description = 'Mark selected orders as refunded'
 
 @admin.register(OrderItem)
@@ -4,4 +4,10 @@ from django.utils.translation import gettext_lazy as _
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gym_api.orders'
-    verbose_name = 'Orders' 
\ No newline at end of file
+    verbose_name = 'Orders'
+    
+    def ready(self):
+        # Import signal handlers
+        import gym_api.orders.signals
+        # Register outbox handlers
+        import gym_api.orders.events
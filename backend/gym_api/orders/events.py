@@ -0,0 +1,44 @@
+"""
+订单相关的发件箱事件
+
+订单变为已支付时，在同一事务中写入 order.paid 事件；后台进程消费事件并开通会员，
+支付请求本身不再承担会员开通的耗时和失败。
+"""
+import datetime
+
+from django.utils import timezone
+
+from gym_api.common import outbox
+from .models import MembershipPlan, Order
+
+ORDER_PAID = 'order.paid'
+
+
+def order_paid(order):
+    """
+    订单包含会员套餐时写入 order.paid 事件，需在保存订单的事务内调用；
+    事件带上支付日期，重试时会员有效期始终从这一天算起
+    """
+    if order.items.filter(item_type='membership').exists():
+        outbox.publish(ORDER_PAID, order_id=order.pk, paid_on=timezone.localdate().isoformat())
+
+
+@outbox.handler(ORDER_PAID)
+def activate_order_membership(order_id, paid_on=None):
+    """
+    按订单中的会员套餐开通会员，有效期从支付日期起算，重复执行结果不变；
+    用户已按更晚的日期开通过会员时跳过，旧事件重放不会覆盖新套餐
+    """
+    order = Order.objects.select_related('user').get(pk=order_id)
+    if order.status != 'paid':
+        return
+    item = order.items.filter(item_type='membership').order_by('id').first()
+    if item is None:
+        return
+    plan = MembershipPlan.objects.get(pk=item.item_id)
+    # 没有 paid_on 的旧事件用订单最后更新日期近似
+    start = datetime.date.fromisoformat(paid_on) if paid_on else timezone.localdate(order.updated_at)
+    user = order.user
+    if user.membership_start and user.membership_start > start:
+        return
+    user.activate_membership(plan, start_date=start)
@@ -0,0 +1,83 @@
+"""
+订单流式导出
+
+用服务器端游标 ``.iterator(chunk_size=...)`` 分块读取订单，每块一次性预取订单项，
+逐行生成 CSV 或 NDJSON，内存占用与导出范围无关。
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+CSV_COLUMNS = [
+    'order_number', 'created_at', 'user_id', 'username', 'status',
+    'payment_method', 'total_amount', 'item_count', 'items',
+]
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """
+    csv.writer 的伪文件对象，write 直接返回写入的行
+    """
+    def write(self, value):
+        return value
+
+
+def _orders(queryset, chunk_size):
+    return (
+        queryset.select_related('user').prefetch_related('items')
+        .order_by('created_at', 'id').iterator(chunk_size=chunk_size)
+    )
+
+
+def _item(item):
+    return {
+        'item_type': item.item_type,
+        'item_id': item.item_id,
+        'quantity': item.quantity,
+        'price': item.price,
+        'item_total': item.item_total,
+    }
+
+
+def stream_csv(queryset, chunk_size=500):
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(CSV_COLUMNS)  # BOM，便于 Excel 识别 UTF-8
+    for order in _orders(queryset, chunk_size):
+        items = list(order.items.all())
+        yield writer.writerow([
+            order.order_number,
+            order.created_at.isoformat(),
+            order.user_id,
+            order.user.username,
+            order.status,
+            order.payment_method,
+            order.total_amount,
+            len(items),
+            '; '.join(f'{item.item_type}:{item.item_id} x{item.quantity} = {item.item_total}' for item in items),
+        ])
+
+
+def stream_ndjson(queryset, chunk_size=500):
+    for order in _orders(queryset, chunk_size):
+        yield json.dumps({
+            'id': order.id,
+            'order_number': order.order_number,
+            'created_at': order.created_at,
+            'user_id': order.user_id,
+            'username': order.user.username,
+            'status': order.status,
+            'payment_method': order.payment_method,
+            'total_amount': order.total_amount,
+            'items': [_item(item) for item in order.items.all()],
+        }, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def stream(queryset, export_format, chunk_size=500):
+    if export_format == 'ndjson':
+        return stream_ndjson(queryset, chunk_size)
+    return stream_csv(queryset, chunk_size)
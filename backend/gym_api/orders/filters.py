@@ -0,0 +1,29 @@
+import datetime
+
+import django_filters
+from django.utils import timezone
+
+from .models import Order
+
+
+class OrderFilter(django_filters.FilterSet):
+    """
+    订单筛选；日期按本地时区的整天换算成 created_at 区间，可走 (status, created_at) 索引
+    """
+    created_after = django_filters.DateFilter(method='filter_created_after')
+    created_before = django_filters.DateFilter(method='filter_created_before')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'payment_method', 'created_after', 'created_before']
+
+    @staticmethod
+    def _start_of(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+    def filter_created_after(self, queryset, name, value):
+        return queryset.filter(created_at__gte=self._start_of(value))
+
+    def filter_created_before(self, queryset, name, value):
+        # 包含结束日期当天
+        return queryset.filter(created_at__lt=self._start_of(value + datetime.timedelta(days=1)))
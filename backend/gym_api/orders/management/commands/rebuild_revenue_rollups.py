@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from gym_api.orders import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the revenue and daily revenue rollup tables from orders and order items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows inserted per statement')
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} revenue rollup rows'))
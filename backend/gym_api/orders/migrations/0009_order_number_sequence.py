@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:47
+
+from django.db import migrations, models
+
+
+def create_sequence(apps, schema_editor):
+    OrderNumberSequence = apps.get_model('orders', 'OrderNumberSequence')
+    OrderNumberSequence.objects.get_or_create(name='order')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Order Number Sequence',
+                'verbose_name_plural': 'Order Number Sequences',
+                'db_table': 'gym_order_number_sequence',
+            },
+        ),
+        migrations.RunPython(create_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:53
+
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    RevenueRollup = apps.get_model('orders', 'RevenueRollup')
+    refunded = Q(order__status='refunded')
+    rows = (
+        OrderItem.objects.filter(order__status__in=('paid', 'refunded'))
+        .annotate(
+            day=TruncDate('order__created_at'),
+            payment_method=F('order__payment_method'),
+            plan_id=Case(When(item_type='membership', then=F('item_id')), default=Value(0), output_field=IntegerField()),
+        )
+        .order_by()
+        .values('day', 'payment_method', 'item_type', 'plan_id')
+        .annotate(
+            revenue=Sum('item_total'),
+            order_count=Count('order', distinct=True),
+            refund_amount=Sum(Case(When(refunded, then=F('item_total')), default=Value(0), output_field=DecimalField())),
+            refund_count=Count('order', filter=refunded, distinct=True),
+        )
+    )
+    RevenueRollup.objects.bulk_create([RevenueRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_number_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(choices=[('credit_card', 'Credit Card'), ('debit_card', 'Debit Card'), ('paypal', 'PayPal'), ('bank_transfer', 'Bank Transfer')], max_length=20)),
+                ('item_type', models.CharField(choices=[('course', 'Course'), ('membership', 'Membership')], max_length=20)),
+                ('plan_id', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refund_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Revenue Rollup',
+                'verbose_name_plural': 'Revenue Rollups',
+                'db_table': 'gym_revenue_rollup',
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_method', 'item_type', 'plan_id'), name='gym_revenue_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:57
+
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    DailyRevenueRollup = apps.get_model('orders', 'DailyRevenueRollup')
+    refunded = Q(order__status='refunded')
+    rows = (
+        OrderItem.objects.filter(order__status__in=('paid', 'refunded'))
+        .annotate(day=TruncDate('order__created_at'), payment_method=F('order__payment_method'))
+        .order_by()
+        .values('day', 'payment_method')
+        .annotate(
+            revenue=Sum('item_total'),
+            order_count=Count('order', distinct=True),
+            refund_amount=Sum(Case(When(refunded, then=F('item_total')), default=Value(0), output_field=DecimalField())),
+            refund_count=Count('order', filter=refunded, distinct=True),
+        )
+    )
+    DailyRevenueRollup.objects.bulk_create([DailyRevenueRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_revenue_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(choices=[('credit_card', 'Credit Card'), ('debit_card', 'Debit Card'), ('paypal', 'PayPal'), ('bank_transfer', 'Bank Transfer')], max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+                ('refund_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refund_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Revenue Rollup',
+                'verbose_name_plural': 'Daily Revenue Rollups',
+                'db_table': 'gym_daily_revenue_rollup',
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_method'), name='gym_daily_revenue_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -64,10 +64,37 @@ class Order(models.Model):
         verbose_name_plural = 'Orders'
         db_table = 'gym_order'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='gym_order_user_created'),
+            models.Index(fields=['status', 'created_at'], name='gym_order_status_created'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number}"
 
+    def save(self, *args, **kwargs):
+        # 未指定订单号时从号段分配器取号，所有创建订单的路径都经过这里
+        if not self.order_number:
+            from .numbering import next_order_number
+            self.order_number = next_order_number()
+        super().save(*args, **kwargs)
+
+class OrderNumberSequence(models.Model):
+    """
+    订单号序列，各工作进程按号段从这里预留序号
+    """
+    name = models.CharField(max_length=30, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Order Number Sequence'
+        verbose_name_plural = 'Order Number Sequences'
+        db_table = 'gym_order_number_sequence'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
 class OrderItem(models.Model):
     """
     订单项模型
@@ -120,4 +147,63 @@ class Membership(models.Model):
             self.start_date = timezone.now()
         if not self.end_date and self.plan:
             self.end_date = self.start_date + timezone.timedelta(days=self.plan.duration_days)
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        super().save(*args, **kwargs) 
+
+
+class RevenueRollup(models.Model):
+    """
+    营收汇总：按 日期 × 支付方式 × 订单项类型 × 会员套餐 累计
+
+    已支付和已退款订单计入营收（revenue/order_count），已退款订单同时计入退款
+    （refund_amount/refund_count）。订单或订单项变化时增量更新，可用
+    rebuild_revenue_rollups 命令整体重建。课程订单项的 plan_id 为 0。
+    """
+    day = models.DateField()
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    item_type = models.CharField(max_length=20, choices=OrderItem.ITEM_TYPE_CHOICES)
+    plan_id = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    refund_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refund_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Revenue Rollup'
+        verbose_name_plural = 'Revenue Rollups'
+        db_table = 'gym_revenue_rollup'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'payment_method', 'item_type', 'plan_id'], name='gym_revenue_rollup_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_method} {self.item_type}:{self.plan_id}"
+
+
+class DailyRevenueRollup(models.Model):
+    """
+    营收日汇总：按 日期 × 支付方式 累计，不区分订单项类型
+
+    RevenueRollup 的每个分组只计一次包含该类型/套餐的订单，同时含课程和会员项的订单
+    会落在多行里；总计以及只按日期、月份、支付方式分组的订单数从这里读，每单只计一次。
+    """
+    day = models.DateField()
+    payment_method = models.CharField(max_length=20, choices=Order.PAYMENT_METHOD_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    refund_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refund_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Daily Revenue Rollup'
+        verbose_name_plural = 'Daily Revenue Rollups'
+        db_table = 'gym_daily_revenue_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_method'], name='gym_daily_revenue_rollup_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.payment_method}"
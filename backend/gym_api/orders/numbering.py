@@ -0,0 +1,120 @@
+"""
+订单号分配
+
+每个线程一次写入预留一段连续序号（ORDER_NUMBER_BLOCK_SIZE 个），之后在内存中
+逐个发号，不再访问数据库。订单号格式为 {前缀}-{日期}-{序号}，序号全局唯一且
+在同一线程内单调递增。进程退出时未用完的号段会留下空号，这是预期行为。
+
+号段在自己的短事务里立即提交，不随订单事务持锁或回滚：不在事务中时直接在默认连接上
+开 durable 事务，在事务中时改用本线程专用的自动提交连接，请求结束时关闭。SQLite 只有一个写者，另开连接会等待订单事务的
+写锁，因此在事务中只能随订单事务逐个取号，不缓存号段。
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .models import OrderNumberSequence
+
+SEQUENCE_NAME = 'order'
+DEFAULT_PREFIX = 'ORD'
+
+_local = threading.local()
+
+
+class _Block:
+    """
+    一段已提交的序号 [next, end)
+    """
+    def __init__(self, start, end):
+        self.next = start
+        self.end = end
+
+    def exhausted(self):
+        return self.next >= self.end
+
+
+def _block_size():
+    return getattr(settings, 'ORDER_NUMBER_BLOCK_SIZE', 100)
+
+
+def _advance(connection, size):
+    """
+    把序列推进 ``size``，返回 (起始序号, 结束序号)；调用方负责事务
+    """
+    table = connection.ops.quote_name(OrderNumberSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {table} SET next_value = next_value + %s WHERE name = %s', [size, SEQUENCE_NAME])
+        if cursor.rowcount != 1:
+            raise OrderNumberSequence.DoesNotExist(f'订单号序列 {SEQUENCE_NAME!r} 不存在')
+        cursor.execute(f'SELECT next_value FROM {table} WHERE name = %s', [SEQUENCE_NAME])
+        end = cursor.fetchone()[0]
+    return end - size, end
+
+
+def _dedicated_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = _local.connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    return connection
+
+
+def close_dedicated_connection(**kwargs):
+    """
+    请求结束时关闭本线程的专用连接，线程池里的线程不会各自长期占用一个连接
+    """
+    connection = getattr(_local, 'connection', None)
+    if connection is not None:
+        _local.connection = None
+        connection.close()
+
+
+request_finished.connect(close_dedicated_connection, dispatch_uid='order-numbering-close-connection')
+
+
+def reserve_block(size=None):
+    """
+    在独立的短事务中预留一段序号并立即提交，返回 _Block
+    """
+    size = size or _block_size()
+    default = transaction.get_connection()
+    if not default.in_atomic_block:
+        with transaction.atomic(durable=True):
+            return _Block(*_advance(default, size))
+
+    connection = _dedicated_connection()
+    connection.close_if_unusable_or_obsolete()
+    connection.set_autocommit(False)
+    try:
+        block = _Block(*_advance(connection, size))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.set_autocommit(True)
+    return block
+
+
+def next_value():
+    """
+    取下一个序号；号段用完时才访问数据库
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and connection.vendor == 'sqlite':
+        return _advance(connection, 1)[0]
+    block = getattr(_local, 'block', None)
+    if block is None or block.exhausted():
+        block = _local.block = reserve_block()
+    value = block.next
+    block.next += 1
+    return value
+
+
+def next_order_number(prefix=DEFAULT_PREFIX):
+    """
+    生成订单号，如 COURSE-20250101-00001234
+    """
+    return f'{prefix}-{timezone.localdate():%Y%m%d}-{next_value():08d}'
@@ -0,0 +1,217 @@
+"""
+营收汇总表的增量维护与重建
+
+每个订单对汇总表的“贡献”按 (日期, 支付方式, 订单项类型, 套餐) 分组计算，另按
+(日期, 支付方式) 计入日汇总表；订单或订单项变化时，用变化前后贡献的差值对汇总行做
+F() 增量更新，不扫描订单表。
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DailyRevenueRollup, Order, OrderItem, RevenueRollup
+
+COUNTED_STATUSES = ('paid', 'refunded')
+MEASURES = ('revenue', 'order_count', 'refund_amount', 'refund_count')
+KEY_FIELDS = ('day', 'payment_method', 'item_type', 'plan_id')
+DAILY_KEY_FIELDS = ('day', 'payment_method')
+# 分组键的长度决定写哪张表
+TABLES = {
+    len(KEY_FIELDS): (RevenueRollup, KEY_FIELDS),
+    len(DAILY_KEY_FIELDS): (DailyRevenueRollup, DAILY_KEY_FIELDS),
+}
+
+
+def _plan_id(item_type, item_id):
+    return item_id if item_type == 'membership' else 0
+
+
+def contribution(order, items):
+    """
+    订单在汇总表中的贡献：{分组键: [营收, 订单数, 退款额, 退款订单数]}
+
+    ``items`` 为 (item_type, item_id, item_total) 序列。同一订单在一个分组里只计一单；
+    (日期, 支付方式) 键是日汇总表的贡献，不论订单含几种订单项都只计一单。
+    """
+    if order.status not in COUNTED_STATUSES or order.created_at is None:
+        return {}
+    day = timezone.localdate(order.created_at)
+    refunded = order.status == 'refunded'
+    groups = {}
+    for item_type, item_id, item_total in items:
+        key = (day, order.payment_method, item_type, _plan_id(item_type, item_id))
+        group = groups.setdefault(key, [Decimal('0'), 1, Decimal('0'), int(refunded)])
+        group[0] += item_total
+        if refunded:
+            group[2] += item_total
+    if groups:
+        revenue = sum(group[0] for group in groups.values())
+        groups[(day, order.payment_method)] = [revenue, 1, revenue if refunded else Decimal('0'), int(refunded)]
+    return groups
+
+
+def order_items(order):
+    return list(order.items.values_list('item_type', 'item_id', 'item_total')) if order.pk else []
+
+
+def snapshot(order):
+    """
+    订单当前在数据库中的贡献
+    """
+    return contribution(order, order_items(order))
+
+
+def _diff(before, after):
+    delta = defaultdict(lambda: [0, 0, 0, 0])
+    for sign, groups in ((-1, before), (1, after)):
+        for key, values in groups.items():
+            for i, value in enumerate(values):
+                delta[key][i] += sign * value
+    return {key: values for key, values in delta.items() if any(values)}
+
+
+def _apply(delta):
+    """
+    按分组把差值加到汇总行上，行不存在时先创建
+    """
+    if not delta:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        for key, values in delta.items():
+            model, key_fields = TABLES[len(key)]
+            lookup = dict(zip(key_fields, key))
+            changes = {field: F(field) + value for field, value in zip(MEASURES, values)}
+            if not model.objects.filter(**lookup).update(updated_at=now, **changes):
+                try:
+                    with transaction.atomic():
+                        model.objects.create(**lookup, **dict(zip(MEASURES, values)))
+                except IntegrityError:
+                    # 并发请求刚刚建好了这一行
+                    model.objects.filter(**lookup).update(updated_at=now, **changes)
+
+
+def apply_change(before, after):
+    """
+    ``before``/``after`` 为变化前后的贡献，需在写订单的事务内调用
+    """
+    _apply(_diff(before, after))
+
+
+def _merge(into, groups):
+    for key, values in groups.items():
+        totals = into.setdefault(key, [0, 0, 0, 0])
+        for i, value in enumerate(values):
+            totals[i] += value
+
+
+def update_status(queryset, status):
+    """
+    批量修改订单状态并同步汇总表：一次批量读取、一次 UPDATE，差值按分组合并后写入
+    """
+    with transaction.atomic():
+        orders = list(queryset.exclude(status=status).prefetch_related('items'))
+        if not orders:
+            return 0
+        before, after = {}, {}
+        for order in orders:
+            items = [(item.item_type, item.item_id, item.item_total) for item in order.items.all()]
+            _merge(before, contribution(order, items))
+            order.status = status
+            _merge(after, contribution(order, items))
+        updated = Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+            status=status, updated_at=timezone.now()
+        )
+        apply_change(before, after)
+    return updated
+
+
+def grouped_totals(item_model=OrderItem, key_fields=KEY_FIELDS):
+    """
+    从订单项一次分组聚合出按 ``key_fields`` 分组的全部汇总行
+    """
+    refunded = Q(order__status='refunded')
+    return (
+        item_model.objects.filter(order__status__in=COUNTED_STATUSES)
+        .annotate(
+            day=TruncDate('order__created_at'),
+            payment_method=F('order__payment_method'),
+            plan_id=Case(
+                When(item_type='membership', then=F('item_id')),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by()
+        .values(*key_fields)
+        .annotate(
+            revenue=Sum('item_total'),
+            order_count=Count('order', distinct=True),
+            refund_amount=Sum(
+                Case(When(refunded, then=F('item_total')), default=Value(0), output_field=DecimalField())
+            ),
+            refund_count=Count('order', filter=refunded, distinct=True),
+        )
+    )
+
+
+def rebuild(batch_size=1000):
+    """
+    清空并重建汇总表和日汇总表，返回写入的行数
+    """
+    tables = [(model, [model(**row) for row in grouped_totals(key_fields=key_fields)])
+              for model, key_fields in TABLES.values()]
+    with transaction.atomic():
+        for model, rows in tables:
+            model.objects.all().delete()
+            model.objects.bulk_create(rows, batch_size=batch_size)
+    return sum(len(rows) for model, rows in tables)
+
+
+GROUPINGS = {
+    'day': F('day'),
+    'month': TruncMonth('day'),
+    'payment_method': F('payment_method'),
+    'item_type': F('item_type'),
+    'plan': F('plan_id'),
+}
+# 只用这些分组时读日汇总表，订单数不会因订单含多种订单项而重复
+DAILY_GROUPINGS = ('day', 'month', 'payment_method')
+
+
+def report(start, end, group_by=()):
+    """
+    只读汇总表回答 [start, end] 日期区间的营收查询，按 ``group_by``（GROUPINGS 的键）分组
+
+    按订单项类型或套餐分组时，每行的订单数是包含该类型/套餐的订单数，各行之和可能大于总计。
+    """
+    daily = DailyRevenueRollup.objects.filter(day__gte=start, day__lte=end)
+    measures = {field: Sum(field) for field in MEASURES}
+    totals = daily.aggregate(**measures)
+    rows = []
+    if group_by:
+        if all(name in DAILY_GROUPINGS for name in group_by):
+            rollup = daily
+        else:
+            rollup = RevenueRollup.objects.filter(day__gte=start, day__lte=end)
+        grouped = (
+            rollup.annotate(**{f'group_{name}': GROUPINGS[name] for name in group_by})
+            .order_by()
+            .values(*[f'group_{name}' for name in group_by])
+            .annotate(**measures)
+            .order_by(*[f'group_{name}' for name in group_by])
+        )
+        for row in grouped:
+            rows.append({
+                **{name: row[f'group_{name}'] for name in group_by},
+                **{field: row[field] for field in MEASURES},
+            })
+    for values in [totals, *rows]:
+        for field in MEASURES:
+            values[field] = values[field] or 0
+        values['net_revenue'] = values['revenue'] - values['refund_amount']
+    return totals, rows
@@ -32,12 +32,13 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = [
-            'id', 'order_id', 'user', 'user_info', 'order_type',
-            'status', 'status_display', 'total_amount', 'discount_amount',
-            'actual_amount', 'payment_method', 'payment_id', 'paid_at',
-            'remark', 'items', 'created_at', 'updated_at',
+            'id', 'order_number', 'user', 'user_info',
+            'status', 'status_display', 'total_amount',
+            'payment_method', 'payment_id',
+            'items', 'created_at', 'updated_at',
         ]
-        read_only_fields = ['id', 'order_id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'order_number', 'created_at', 'updated_at']
+        planned_relations = ['user']
     
     def get_user_info(self, obj):
         return {
@@ -74,6 +75,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         return order
 
 class OrderUpdateSerializer(serializers.ModelSerializer):
+    # 订单表没有这两列，仅用于校验支付状态变更
+    paid_at = serializers.DateTimeField(write_only=True, required=False)
+    remark = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    
     class Meta:
         model = Order
         fields = [
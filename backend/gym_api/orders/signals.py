@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from gym_api.common import cache as response_cache
+from .models import MembershipPlan, Order, OrderItem
+from . import rollups
+
+@receiver([post_save, post_delete], sender=MembershipPlan)
+def invalidate_membership_plan_cache(sender, **kwargs):
+    """
+    清除匿名会员套餐列表的缓存
+    """
+    response_cache.invalidate('membership_plans')
+
+@receiver(pre_save, sender=Order)
+def remember_order_contribution(sender, instance, **kwargs):
+    """
+    记录订单保存前在营收汇总中的贡献
+    """
+    previous = Order.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_before = rollups.snapshot(previous) if previous else {}
+
+@receiver(post_save, sender=Order)
+def update_order_rollup(sender, instance, **kwargs):
+    """
+    按订单保存前后的贡献差值更新营收汇总
+    """
+    before = getattr(instance, '_rollup_before', {})
+    rollups.apply_change(before, rollups.snapshot(instance))
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item(sender, instance, **kwargs):
+    instance._rollup_previous = (
+        OrderItem.objects.filter(pk=instance.pk).values_list('item_type', 'item_id', 'item_total').first()
+        if instance.pk else None
+    )
+
+def _item_row(item):
+    return (item.item_type, item.item_id, item.item_total)
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def update_order_item_rollup(sender, instance, **kwargs):
+    """
+    订单项新增、修改或删除时，按所属订单前后的贡献差值更新营收汇总
+    """
+    order = Order.objects.filter(pk=instance.order_id).first()
+    if order is None or order.status not in rollups.COUNTED_STATUSES:
+        return
+    current = rollups.order_items(order)
+    if kwargs['signal'] is post_delete:
+        previous = current + [_item_row(instance)]
+    else:
+        previous = list(current)
+        previous.remove(_item_row(instance))
+        if instance._rollup_previous is not None:
+            previous.append(instance._rollup_previous)
+    rollups.apply_change(rollups.contribution(order, previous), rollups.contribution(order, current))
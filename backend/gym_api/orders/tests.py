@@ -1,10 +1,12 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from io import StringIO
 # from django.urls import reverse
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from gym_api.utils.test_report import TestReport
+from gym_api.utils.query_plan import QueryPlanAssertionsMixin
 from gym_api.users.models import User
-from .models import MembershipPlan, Order, OrderItem
+from .models import DailyRevenueRollup, MembershipPlan, Order, OrderItem, OrderNumberSequence, RevenueRollup
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -111,4 +113,467 @@ class OrderAPITests(APITestCase):
     #     }
     #     response = self.client.post(url, data, format='json')
     #     self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-    #     self.assertEqual(Order.objects.count(), 1) 
\ No newline at end of file
+    #     self.assertEqual(Order.objects.count(), 1) 
+
+    def test_membership_plan_list_conditional_get(self):
+        url = '/api/orders/membership-plans/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.plan.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class AdminOrderPaginationTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='orderadmin',
+            email='orderadmin@example.com',
+            password='testpass123',
+            role='admin'
+        )
+        for i in range(25):
+            Order.objects.create(
+                user=self.admin,
+                total_amount=10 + i,
+                status='paid',
+                payment_method='credit_card',
+                order_number=f'PAGE{i:03d}'
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_cursor_walks_all_orders_without_offsets(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        seen, url, query_counts = [], '/api/orders/admin/orders/', []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(any('OFFSET' in q['sql'] for q in ctx.captured_queries))
+            query_counts.append(len(ctx.captured_queries))
+            seen.extend(row['order_number'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [f'PAGE{i:03d}' for i in reversed(range(25))])
+        self.assertEqual(len(set(query_counts)), 1)
+
+    def test_previous_link_and_exact_count(self):
+        first = self.client.get('/api/orders/admin/orders/', {'count': 'exact'})
+        self.assertEqual(first.data['count'], 25)
+        self.assertTrue(first.data['count_is_exact'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [row['id'] for row in back.data['results']],
+            [row['id'] for row in first.data['results']]
+        )
+
+    def test_page_numbers_are_rejected(self):
+        response = self.client.get('/api/orders/admin/orders/', {'page': 2})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('page', response.data)
+
+    def test_cursor_walks_orders_by_total_amount(self):
+        Order.objects.filter(order_number='PAGE007').update(total_amount=20)  # a tie on the key
+        for ordering, reverse in (('total_amount', False), ('-total_amount', True)):
+            seen, url, params = [], '/api/orders/admin/orders/', {'ordering': ordering, 'page_size': 4}
+            while url:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen.extend((row['total_amount'], row['id']) for row in response.data['results'])
+                url, params = response.data['next'], None
+            self.assertEqual(len(seen), 25)
+            self.assertEqual(seen, sorted(seen, key=lambda row: (float(row[0]), row[1]), reverse=reverse))
+
+    def test_tampered_cursor_is_not_found(self):
+        import base64
+        import json
+        for payload in ({'v': 'yesterday', 'id': 1}, {'v': None, 'id': 1}, {'v': [1], 'id': 1}, {'id': 1}):
+            cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            response = self.client.get('/api/orders/admin/orders/', {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, payload)
+        response = self.client.get('/api/orders/admin/orders/', {'cursor': 'not-base64!'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OrderQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='planadmin', email='planadmin@example.com', password='testpass123', role='admin'
+        )
+        self.member = User.objects.create_user(
+            username='planmember', email='planmember@example.com', password='testpass123'
+        )
+        for i, user in enumerate([self.admin, self.member] * 5):
+            Order.objects.create(
+                user=user, total_amount=10, status=('paid', 'pending')[i % 2],
+                payment_method='credit_card', order_number=f'PLAN{i:03d}'
+            )
+
+    def test_member_order_list_uses_user_index(self):
+        self.client.force_authenticate(user=self.member)
+        with self.assertNoFullScan('gym_order'):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_admin_order_list_by_status_uses_status_index(self):
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNoFullScan('gym_order'):
+            response = self.client.get('/api/orders/admin/orders/', {'status': 'paid'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class OrderIdempotencyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='retryuser', email='retryuser@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            'total_amount': '49.99',
+            'items': [{'item_type': 'membership', 'item_id': 1, 'quantity': 1, 'price': '49.99'}],
+        }
+
+    def test_retry_with_same_key_returns_first_order(self):
+        first = self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(OrderItem.objects.filter(order__user=self.user).count(), 1)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-2')
+        self.payload['total_amount'] = '99.00'
+        response = self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_failure_storing_the_response_rolls_back_the_order(self):
+        from unittest import mock
+        from gym_api.common import idempotency
+        from gym_api.common.models import IdempotencyKey
+        with mock.patch.object(idempotency, '_store', side_effect=RuntimeError('worker died')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-3')
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+        self.assertFalse(IdempotencyKey.objects.filter(key='order-3').exists())
+
+        response = self.client.post('/api/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='order-3')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get(key='order-3').response_status, status.HTTP_201_CREATED)
+
+
+class OrderNumberAllocationTests(TransactionTestCase):
+    # Blocks are only cached outside a transaction, so these run without TestCase's wrapper
+    serialized_rollback = True
+
+    def setUp(self):
+        from . import numbering
+        numbering._local.block = None
+        self.user = User.objects.create_user(
+            username='numbered', email='numbered@example.com', password='testpass123'
+        )
+
+    def create_order(self):
+        return Order.objects.create(user=self.user, total_amount=10, payment_method='credit_card')
+
+    def test_orders_get_unique_increasing_numbers_from_one_block(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.test import override_settings
+        with override_settings(ORDER_NUMBER_BLOCK_SIZE=50):
+            first = self.create_order()
+            with CaptureQueriesContext(connection) as ctx:
+                orders = [self.create_order() for _ in range(20)]
+        self.assertFalse(any('gym_order_number_sequence' in q['sql'] for q in ctx.captured_queries))
+        numbers = [first.order_number] + [order.order_number for order in orders]
+        self.assertEqual(len(set(numbers)), 21)
+        self.assertTrue(all(number.startswith('ORD-') for number in numbers))
+        sequence = [int(number.rsplit('-', 1)[1]) for number in numbers]
+        self.assertEqual(sequence, sorted(sequence))
+
+    def test_blocks_are_committed_when_reserved_and_do_not_overlap(self):
+        from . import numbering
+        first = numbering.reserve_block(size=10)
+        second = numbering.reserve_block(size=10)
+        self.assertEqual(second.next, first.end)
+        self.assertEqual(OrderNumberSequence.objects.get(name=numbering.SEQUENCE_NAME).next_value, second.end)
+
+    def test_numbers_taken_inside_a_rolled_back_sqlite_transaction_are_not_cached(self):
+        from django.db import transaction
+        from . import numbering
+        try:
+            with transaction.atomic():
+                rolled_back = numbering.next_value()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertIsNone(numbering._local.block)
+        self.assertEqual(numbering.next_value(), rolled_back)
+
+    def test_dedicated_connection_is_closed_when_the_request_finishes(self):
+        from unittest import mock
+        from django.core.signals import request_finished
+        from . import numbering
+        connection = numbering._local.connection = mock.Mock()
+        request_finished.send(sender=self.__class__)
+        connection.close.assert_called_once_with()
+        self.assertIsNone(numbering._local.connection)
+
+
+class MembershipOutboxTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='outboxadmin', email='outboxadmin@example.com', password='testpass123', role='admin'
+        )
+        self.buyer = User.objects.create_user(
+            username='outboxbuyer', email='outboxbuyer@example.com', password='testpass123'
+        )
+        self.plan = MembershipPlan.objects.create(
+            name='Outbox Plan', price=99, duration=90, plan_type='monthly', is_active=True
+        )
+        self.order = Order.objects.create(user=self.buyer, total_amount=99, payment_method='paypal')
+        OrderItem.objects.create(order=self.order, item_type='membership', item_id=self.plan.id, price=99)
+        self.client.force_authenticate(user=self.admin)
+
+    def pay(self):
+        return self.client.patch(f'/api/orders/admin/orders/{self.order.id}/', {
+            'status': 'paid', 'payment_method': 'paypal', 'paid_at': '2030-01-01T10:00:00Z'
+        }, format='json')
+
+    def test_payment_queues_activation_and_worker_applies_it(self):
+        from django.core.management import call_command
+        from gym_api.common.models import OutboxEvent
+        self.assertEqual(self.pay().status_code, status.HTTP_200_OK)
+        self.buyer.refresh_from_db()
+        self.assertNotEqual(self.buyer.role, 'member')
+        event = OutboxEvent.objects.get(topic='order.paid')
+        from django.utils import timezone
+        self.assertEqual(event.payload, {'order_id': self.order.id, 'paid_on': timezone.localdate().isoformat()})
+
+        out = StringIO()
+        call_command('process_outbox', stdout=out)
+        self.assertIn('Processed 1 events, 0 failed', out.getvalue())
+        self.buyer.refresh_from_db()
+        self.assertEqual(self.buyer.role, 'member')
+        self.assertEqual(self.buyer.membership_plan_id, self.plan.id)
+        self.assertEqual(self.buyer.member_id, f'M{self.buyer.id:06d}')
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'done')
+
+    def test_reprocessing_the_event_later_does_not_move_the_membership(self):
+        import datetime
+        from unittest import mock
+        from django.utils import timezone
+        from gym_api.common import outbox
+        from gym_api.common.models import OutboxEvent
+        self.pay()
+        outbox.process_outbox()
+        self.buyer.refresh_from_db()
+        activated = (self.buyer.membership_start, self.buyer.membership_end)
+
+        OutboxEvent.objects.update(status='pending', available_at=timezone.now())
+        later = timezone.now() + datetime.timedelta(days=3)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertEqual(outbox.process_outbox(), (1, 0))
+        self.buyer.refresh_from_db()
+        self.assertEqual((self.buyer.membership_start, self.buyer.membership_end), activated)
+
+    def test_failures_are_retried_then_parked_for_replay(self):
+        from django.core.management import call_command
+        from django.test import override_settings
+        from gym_api.common import outbox
+        from gym_api.common.models import OutboxEvent
+        OrderItem.objects.filter(order=self.order).update(item_id=self.plan.id + 1000)
+        self.pay()
+        event = OutboxEvent.objects.get(topic='order.paid')
+
+        self.assertEqual(outbox.process_outbox(), (0, 1))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+        self.assertIn('DoesNotExist', event.last_error)
+        # Backed off: not due again yet
+        self.assertEqual(outbox.process_outbox(), (0, 0))
+
+        OutboxEvent.objects.filter(pk=event.pk).update(available_at=event.created_at)
+        with override_settings(OUTBOX_MAX_ATTEMPTS=2):
+            outbox.process_outbox()
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'failed')
+
+        OrderItem.objects.filter(order=self.order).update(item_id=self.plan.id)
+        call_command('process_outbox', '--replay-failed', stdout=StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'done')
+        self.buyer.refresh_from_db()
+        self.assertEqual(self.buyer.membership_plan_id, self.plan.id)
+
+
+class RevenueRollupTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='revenueadmin', email='revenueadmin@example.com', password='testpass123', role='admin'
+        )
+        self.plan = MembershipPlan.objects.create(name='Rollup Plan', price=80, duration=30, plan_type='monthly')
+
+    def order(self, status='paid', payment_method='paypal', items=(('membership', None, 80),)):
+        order = Order.objects.create(
+            user=self.admin, total_amount=0, status=status, payment_method=payment_method
+        )
+        for item_type, item_id, price in items:
+            OrderItem.objects.create(
+                order=order, item_type=item_type, item_id=item_id or self.plan.id, price=price
+            )
+        return order
+
+    def rollup_state(self):
+        return sorted(
+            RevenueRollup.objects.exclude(order_count=0).values_list(
+                'day', 'payment_method', 'item_type', 'plan_id',
+                'revenue', 'order_count', 'refund_amount', 'refund_count'
+            )
+        ), sorted(
+            DailyRevenueRollup.objects.exclude(order_count=0).values_list(
+                'day', 'payment_method', 'revenue', 'order_count', 'refund_amount', 'refund_count'
+            )
+        )
+
+    def test_rollups_follow_status_and_item_changes_and_match_rebuild(self):
+        from . import rollups
+        paid = self.order()
+        self.order(payment_method='credit_card', items=[('course', 7, 20), ('course', 8, 15)])
+        pending = self.order(status='pending')
+        row = RevenueRollup.objects.get(payment_method='paypal', item_type='membership')
+        self.assertEqual((row.plan_id, row.revenue, row.order_count), (self.plan.id, 80, 1))
+        course_row = RevenueRollup.objects.get(item_type='course')
+        self.assertEqual((course_row.plan_id, course_row.revenue, course_row.order_count), (0, 35, 1))
+
+        paid.status = 'refunded'
+        paid.save()
+        row.refresh_from_db()
+        self.assertEqual((row.revenue, row.order_count, row.refund_amount, row.refund_count), (80, 1, 80, 1))
+
+        rollups.update_status(Order.objects.filter(pk=pending.pk), 'paid')
+        row.refresh_from_db()
+        self.assertEqual((row.revenue, row.order_count), (160, 2))
+
+        OrderItem.objects.filter(order__payment_method='credit_card', item_id=8).get().delete()
+        course_row.refresh_from_db()
+        self.assertEqual((course_row.revenue, course_row.order_count), (20, 1))
+
+        incremental = self.rollup_state()
+        rollups.rebuild()
+        self.assertEqual(self.rollup_state(), incremental)
+
+    def test_report_reads_only_rollups(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.order()
+        self.order(status='refunded')
+        self.order(payment_method='bank_transfer', items=[('course', 3, 25)])
+        self.client.force_authenticate(user=self.admin)
+        url = '/api/orders/admin/reports/revenue/'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'group_by': 'payment_method,plan'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('"gym_order"' in q['sql'] or '"gym_order_item"' in q['sql'] for q in ctx.captured_queries))
+        totals = response.data['totals']
+        self.assertEqual((totals['revenue'], totals['order_count'], totals['refund_amount']), (185, 3, 80))
+        self.assertEqual(totals['net_revenue'], 105)
+        by_method = {(row['payment_method'], row['plan']): row for row in response.data['results']}
+        self.assertEqual(by_method['paypal', self.plan.id]['order_count'], 2)
+        self.assertEqual(by_method['paypal', self.plan.id]['plan_name'], 'Rollup Plan')
+        self.assertEqual(by_method['bank_transfer', 0]['revenue'], 25)
+
+        self.assertEqual(self.client.get(url, {'group_by': 'week'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(url, {'start': '2030-01-02', 'end': '2030-01-01'}).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        for params in ({'end': 'garbage'}, {'start': '2030-02-30'}, {'start': '2030-01-01', 'end': '2030-13-01'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_order_with_several_item_types_is_counted_once(self):
+        self.order(items=[('membership', None, 80), ('course', 5, 20)])
+        self.order(status='refunded', items=[('membership', None, 80), ('course', 5, 20), ('course', 6, 10)])
+        self.client.force_authenticate(user=self.admin)
+        url = '/api/orders/admin/reports/revenue/'
+        response = self.client.get(url, {'group_by': 'payment_method'})
+        totals = response.data['totals']
+        self.assertEqual((totals['revenue'], totals['order_count']), (210, 2))
+        self.assertEqual((totals['refund_amount'], totals['refund_count']), (110, 1))
+        [row] = response.data['results']
+        self.assertEqual((row['payment_method'], row['order_count'], row['refund_count']), ('paypal', 2, 1))
+
+        by_type = {row['item_type']: row for row in self.client.get(url, {'group_by': 'item_type'}).data['results']}
+        self.assertEqual((by_type['course']['revenue'], by_type['course']['order_count']), (50, 2))
+        self.assertEqual((by_type['membership']['revenue'], by_type['membership']['order_count']), (160, 2))
+
+
+class OrderExportTests(APITestCase):
+    def setUp(self):
+        import datetime
+        from django.utils import timezone
+        self.admin = User.objects.create_user(
+            username='exportadmin', email='exportadmin@example.com', password='testpass123', role='admin'
+        )
+        self.client.force_authenticate(user=self.admin)
+        for i in range(5):
+            order = Order.objects.create(
+                user=self.admin, total_amount=10 + i, status=('paid', 'refunded')[i % 2],
+                payment_method='paypal', order_number=f'EXP{i:03d}'
+            )
+            OrderItem.objects.create(order=order, item_type='course', item_id=i, price=10 + i)
+            OrderItem.objects.create(order=order, item_type='membership', item_id=1, price=0)
+        old = Order.objects.create(
+            user=self.admin, total_amount=99, status='paid', payment_method='paypal', order_number='EXPOLD'
+        )
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=400))
+
+    def test_csv_export_streams_filtered_orders_with_chunked_prefetch(self):
+        import csv
+        import datetime
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from unittest import mock
+        from django.utils import timezone
+        from .views import AdminOrderExportView
+        since = (timezone.localdate() - datetime.timedelta(days=30)).isoformat()
+        with mock.patch.object(AdminOrderExportView, 'chunk_size', 2), CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/orders/admin/orders/export/', {
+                'status': 'paid', 'payment_method': 'paypal', 'created_after': since,
+            })
+            body = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="orders-', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([row['order_number'] for row in rows], ['EXP000', 'EXP002', 'EXP004'])
+        self.assertEqual(rows[0]['item_count'], '2')
+        self.assertIn('course:0 x1 = 10.00', rows[0]['items'])
+        item_queries = [q for q in ctx.captured_queries if '"gym_order_item"' in q['sql']]
+        self.assertEqual(len(item_queries), 2)  # three orders in chunks of two
+
+    def test_ndjson_export_and_validation(self):
+        import json
+        response = self.client.get('/api/orders/admin/orders/export/', {
+            'export_format': 'ndjson', 'status': 'refunded',
+        })
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['order_number'] for line in lines], ['EXP001', 'EXP003'])
+        self.assertEqual(len(lines[0]['items']), 2)
+        self.assertEqual(lines[0]['total_amount'], '11.00')
+
+        response = self.client.get('/api/orders/admin/orders/export/', {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_list_accepts_date_filters(self):
+        import datetime
+        from django.utils import timezone
+        before = (timezone.localdate() - datetime.timedelta(days=300)).isoformat()
+        response = self.client.get('/api/orders/admin/orders/', {'created_before': before})
+        self.assertEqual([row['order_number'] for row in response.data['results']], ['EXPOLD'])
@@ -11,6 +11,8 @@ from .views import (
     AdminMembershipPlanDetailView,
     AdminOrderListView,
     AdminOrderDetailView,
+    AdminOrderExportView,
+    AdminRevenueReportView,
 )
 
 app_name = 'gym_orders'
@@ -32,5 +34,9 @@ urlpatterns = [
     
     # 管理员订单管理
     path('admin/orders/', AdminOrderListView.as_view(), name='admin-order-list'),
+    path('admin/orders/export/', AdminOrderExportView.as_view(), name='admin-order-export'),
     path('admin/orders/<int:pk>/', AdminOrderDetailView.as_view(), name='admin-order-detail'),
+    
+    # 管理员报表
+    path('admin/reports/revenue/', AdminRevenueReportView.as_view(), name='admin-revenue-report'),
 ] 
\ No newline at end of file
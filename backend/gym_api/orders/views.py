@@ -1,9 +1,15 @@
 from rest_framework import generics, status, permissions, filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import MembershipPlan, Order, OrderItem
+from . import events, export, rollups
+from .filters import OrderFilter
 from .serializers import (
     MembershipPlanSerializer,
     OrderSerializer,
@@ -11,10 +17,14 @@ from .serializers import (
     OrderUpdateSerializer,
 )
 from gym_api.auth.permissions import IsAdminUserOrReadOnly, IsOwnerOrAdmin, IsStaffOrAdmin, IsAdmin
+from gym_api.common.idempotency import idempotent
+from gym_api.common.mixins import AnonymousResponseCacheMixin, ConditionalGetMixin, SerializerQueryPlanMixin
+from gym_api.common.pagination import KeysetPagination
+import datetime
 import requests
 
 # 会员套餐视图
-class MembershipPlanListCreateView(generics.ListCreateAPIView):
+class MembershipPlanListCreateView(AnonymousResponseCacheMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     """
     会员套餐列表和创建视图
     """
@@ -24,6 +34,7 @@ class MembershipPlanListCreateView(generics.ListCreateAPIView):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['price', 'duration', 'created_at']
+    response_cache_groups = ('membership_plans',)
     
     def get_queryset(self):
         """
@@ -75,14 +86,14 @@ class AdminMembershipPlanDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdmin]
 
 # 订单视图
-class OrderListCreateView(generics.ListCreateAPIView):
+class OrderListCreateView(SerializerQueryPlanMixin, generics.ListCreateAPIView):
     """
     订单列表和创建视图
     """
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['status', 'order_type']
-    ordering_fields = ['created_at', 'paid_at']
+    filterset_fields = ['status', 'payment_method']
+    ordering_fields = ['created_at']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -103,51 +114,30 @@ class OrderListCreateView(generics.ListCreateAPIView):
         else:
             return Order.objects.filter(user=user)
     
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """
+        支持 Idempotency-Key 请求头，客户端重试时返回首次创建的订单
+        """
+        return super().create(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """
         创建订单时自动关联当前用户
         """
         try:
-            # 将当前用户关联到订单
-            order = serializer.save(user=self.request.user)
-            print(f"订单创建成功: ID={order.id}, 用户={self.request.user.username}, 金额={order.actual_amount}")
-            
-            # 如果订单状态为已支付，立即更新用户会员信息
-            if order.status == 'paid' and order.order_type == 'membership':
-                self.update_user_membership(order)
+            # 将当前用户关联到订单；订单与订单项在同一事务中写入，失败时不留下半成品
+            with transaction.atomic():
+                order = serializer.save(user=self.request.user)
+                # 已支付的会员订单写入发件箱事件，由后台进程开通会员
+                if order.status == 'paid':
+                    events.order_paid(order)
+            print(f"订单创建成功: ID={order.id}, 用户={self.request.user.username}, 金额={order.total_amount}")
         except Exception as e:
             print(f"订单创建失败: {str(e)}")
             raise ValidationError(f"订单创建失败: {str(e)}")
-    
-    def update_user_membership(self, order):
-        """
-        当支付会员套餐订单时，更新用户会员信息
-        """
-        if order.order_type == 'membership':
-            # 获取订单中的会员套餐信息
-            membership_items = order.items.filter(membership_plan__isnull=False)
-            
-            if membership_items.exists():
-                membership_item = membership_items.first()
-                plan_id = membership_item.membership_plan.id
-                user_id = order.user.id
-                
-                # 调用会员信息更新接口
-                try:
-                    # 本地调用方式
-                    from gym_api.users.views import CreateUserMembershipView
-                    request_data = {
-                        'user_id': user_id,
-                        'plan_id': plan_id
-                    }
-                    view = CreateUserMembershipView()
-                    view.post(request=self.request._request, data=request_data)
-                    print(f"用户会员信息更新成功: 用户ID={user_id}, 套餐ID={plan_id}")
-                except Exception as e:
-                    # 记录错误但不中断流程
-                    print(f"更新用户会员信息失败: {str(e)}")
 
-class OrderDetailView(generics.RetrieveUpdateAPIView):
+class OrderDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateAPIView):
     """
     订单详情和更新视图
     """
@@ -175,57 +165,60 @@ class OrderDetailView(generics.RetrieveUpdateAPIView):
         """
         更新订单状态
         """
-        instance = self.get_object()
-        old_status = instance.status
+        old_status = serializer.instance.status
         
-        # 保存更新
-        order = serializer.save()
-        
-        # 如果订单状态从待支付变为已支付，更新用户会员信息
-        if old_status == 'pending' and order.status == 'paid':
-            self.update_user_membership(order)
-    
-    def update_user_membership(self, order):
-        """
-        当支付会员套餐订单时，更新用户会员信息
-        """
-        if order.order_type == 'membership':
-            # 获取订单中的会员套餐信息
-            membership_items = order.items.filter(membership_plan__isnull=False)
+        with transaction.atomic():
+            # 保存更新
+            order = serializer.save()
             
-            if membership_items.exists():
-                membership_item = membership_items.first()
-                plan_id = membership_item.membership_plan.id
-                user_id = order.user.id
-                
-                # 调用会员信息更新接口
-                try:
-                    # 本地调用方式
-                    from gym_api.users.views import CreateUserMembershipView
-                    request_data = {
-                        'user_id': user_id,
-                        'plan_id': plan_id
-                    }
-                    view = CreateUserMembershipView()
-                    view.post(request=self.request._request, data=request_data)
-                except Exception as e:
-                    # 记录错误但不中断流程
-                    print(f"更新用户会员信息失败: {str(e)}")
+            # 订单从待支付变为已支付时写入发件箱事件，会员开通不占用本次请求
+            if old_status == 'pending' and order.status == 'paid':
+                events.order_paid(order)
 
 # 管理员订单管理视图
-class AdminOrderListView(generics.ListAPIView):
+class AdminOrderListView(SerializerQueryPlanMixin, generics.ListAPIView):
     """
     管理员订单列表视图
     """
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAdmin]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'order_type', 'payment_method']
-    search_fields = ['order_id', 'user__username']
-    ordering_fields = ['created_at', 'paid_at', 'total_amount']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    keyset_ordering_fields = ('created_at', 'total_amount')  # ?ordering=total_amount / -total_amount
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = OrderFilter
+    search_fields = ['order_number', 'user__username']
 
-class AdminOrderDetailView(generics.RetrieveUpdateAPIView):
+class AdminOrderExportView(generics.GenericAPIView):
+    """
+    管理员订单导出视图
+    GET /api/orders/admin/orders/export/?export_format=csv|ndjson
+    筛选条件与订单列表相同（status、payment_method、created_after、created_before、search），
+    结果在一个请求内流式返回，不分页、不计数
+    """
+    queryset = Order.objects.all()
+    permission_classes = [IsAdmin]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_class = OrderFilter
+    search_fields = ['order_number', 'user__username']
+    chunk_size = 500
+
+    def get(self, request):
+        # 不用 format 参数名，避免与 DRF 的渲染器格式后缀冲突
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in export.FORMATS:
+            raise ValidationError({'export_format': f'可选值: {", ".join(export.FORMATS)}'})
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export.stream(queryset, export_format, self.chunk_size),
+            content_type=export.FORMATS[export_format],
+        )
+        filename = f'orders-{timezone.localdate():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class AdminOrderDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateAPIView):
     """
     管理员订单详情和更新视图
     """
@@ -241,42 +234,15 @@ class AdminOrderDetailView(generics.RetrieveUpdateAPIView):
         """
         更新订单状态
         """
-        instance = self.get_object()
-        old_status = instance.status
-        
-        # 保存更新
-        order = serializer.save()
+        old_status = serializer.instance.status
         
-        # 如果订单状态从待支付变为已支付，更新用户会员信息
-        if old_status == 'pending' and order.status == 'paid':
-            self.update_user_membership(order)
-    
-    def update_user_membership(self, order):
-        """
-        当支付会员套餐订单时，更新用户会员信息
-        """
-        if order.order_type == 'membership':
-            # 获取订单中的会员套餐信息
-            membership_items = order.items.filter(membership_plan__isnull=False)
+        with transaction.atomic():
+            # 保存更新
+            order = serializer.save()
             
-            if membership_items.exists():
-                membership_item = membership_items.first()
-                plan_id = membership_item.membership_plan.id
-                user_id = order.user.id
-                
-                # 调用会员信息更新接口
-                try:
-                    # 本地调用方式
-                    from gym_api.users.views import CreateUserMembershipView
-                    request_data = {
-                        'user_id': user_id,
-                        'plan_id': plan_id
-                    }
-                    view = CreateUserMembershipView()
-                    view.post(request=self.request._request, data=request_data)
-                except Exception as e:
-                    # 记录错误但不中断流程
-                    print(f"更新用户会员信息失败: {str(e)}")
+            # 订单从待支付变为已支付时写入发件箱事件，会员开通不占用本次请求
+            if old_status == 'pending' and order.status == 'paid':
+                events.order_paid(order)
 
 class CancelOrderView(generics.UpdateAPIView):
     """
@@ -309,4 +275,52 @@ class CancelOrderView(generics.UpdateAPIView):
         order.save()
         
         serializer = OrderSerializer(order)
-        return Response(serializer.data) 
\ No newline at end of file
+        return Response(serializer.data) 
+
+
+class AdminRevenueReportView(APIView):
+    """
+    管理员营收报表
+    GET /api/orders/admin/reports/revenue/?start=2025-01-01&end=2025-01-31&group_by=day,payment_method
+    只读营收汇总表，不扫描订单；group_by 可选 day、month、payment_method、item_type、plan
+    """
+    permission_classes = [IsAdmin]
+    default_days = 30
+
+    def _date_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: '日期格式应为 YYYY-MM-DD'})
+        return parsed
+
+    def get(self, request):
+        end = self._date_param('end') or timezone.localdate()
+        start = self._date_param('start') or end - datetime.timedelta(days=self.default_days - 1)
+        if start > end:
+            raise ValidationError({'detail': '开始日期不能晚于结束日期'})
+
+        group_by = [name for name in request.query_params.get('group_by', '').split(',') if name]
+        unknown = [name for name in group_by if name not in rollups.GROUPINGS]
+        if unknown or len(set(group_by)) != len(group_by):
+            raise ValidationError({'group_by': f'可选值: {", ".join(rollups.GROUPINGS)}'})
+
+        totals, rows = rollups.report(start, end, group_by)
+        if 'plan' in group_by:
+            names = dict(MembershipPlan.objects.filter(
+                pk__in={row['plan'] for row in rows}
+            ).values_list('pk', 'name'))
+            for row in rows:
+                row['plan_name'] = names.get(row['plan'])
+        return Response({
+            'start': start,
+            'end': end,
+            'group_by': group_by,
+            'totals': totals,
+            'results': rows,
+        })
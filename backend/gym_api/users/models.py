@@ -52,6 +52,9 @@ class User(AbstractUser):
         verbose_name = _('User')
         verbose_name_plural = _('Users')
         db_table = 'gym_user'
+        indexes = [
+            models.Index(fields=['role', 'date_joined'], name='gym_user_role_joined'),
+        ]
         
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -70,6 +73,20 @@ class User(AbstractUser):
             end_date__gt=timezone.now()
         ).first()
 
+    def activate_membership(self, plan, start_date=None):
+        """Start a membership on ``plan`` (today by default) and promote the user to member"""
+        start_date = start_date or timezone.now().date()
+        self.membership_start = start_date
+        self.membership_end = start_date + timezone.timedelta(days=plan.duration)
+        self.membership_type = plan.plan_type
+        self.membership_status = 'active'
+        self.membership_plan_id = plan.id
+        self.membership_plan_name = plan.name
+        self.role = 'member'
+        if not self.member_id:
+            self.member_id = f"M{self.id:06d}"
+        self.save()
+
     def get_enrolled_courses(self):
         """Get all courses user is enrolled in"""
         return self.enrollments.filter(
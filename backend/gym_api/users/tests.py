@@ -4,6 +4,7 @@ from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from .models import User, UserProfile
 from gym_api.utils.test_report import TestReport
+from gym_api.utils.query_plan import QueryPlanAssertionsMixin
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -125,4 +126,19 @@ class UserAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
         self.assertIn('refresh', response.data)
-        shared_report.add_test_result('test_user_login_api', 'PASS' if response.status_code == status.HTTP_200_OK else 'FAIL') 
\ No newline at end of file
+        shared_report.add_test_result('test_user_login_api', 'PASS' if response.status_code == status.HTTP_200_OK else 'FAIL') 
+
+
+class UserQueryPlanTests(QueryPlanAssertionsMixin, APITestCase):
+    def test_user_list_by_role_uses_role_index(self):
+        admin = User.objects.create_superuser(
+            username='planadmin', email='planadmin@example.com', password='testpass123', role='admin'
+        )
+        for i in range(5):
+            User.objects.create_user(
+                username=f'plancoach{i}', email=f'plancoach{i}@example.com', password='testpass123', role='staff'
+            )
+        self.client.force_authenticate(user=admin)
+        with self.assertNoFullScan('gym_user'):
+            response = self.client.get('/api/users/', {'role': 'staff'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
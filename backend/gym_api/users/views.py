@@ -13,17 +13,20 @@ from .serializers import (
     UserMembershipUpdateSerializer
 )
 from gym_api.auth.permissions import IsAdminUserOrReadOnly, IsOwnerOrAdmin, IsAdmin
+from gym_api.common.mixins import SerializerQueryPlanMixin
+from gym_api.common.pagination import KeysetPagination
 from gym_api.orders.models import MembershipPlan
 from django.utils import timezone
-import datetime
 
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(SerializerQueryPlanMixin, generics.ListCreateAPIView):
     """
     用户列表和创建视图
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]  # 使用 Django 自带的 IsAdminUser 权限类
+    pagination_class = KeysetPagination  # 游标分页，深翻页不再 OFFSET
+    keyset_ordering = ('-date_joined', '-id')
     
     def get_queryset(self):
         """
@@ -57,9 +60,9 @@ class UserListCreateView(generics.ListCreateAPIView):
                 Q(phone__icontains=search)
             )
             
-        return queryset.order_by('-date_joined')  # 添加排序以避免分页警告
+        return queryset  # 排序由游标分页负责
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     用户详情、更新和删除视图
     """
@@ -68,7 +71,7 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsOwnerOrAdmin]
 
 # 管理员教练管理视图
-class InstructorListView(generics.ListAPIView):
+class InstructorListView(SerializerQueryPlanMixin, generics.ListAPIView):
     """
     教练列表视图
     """
@@ -99,7 +102,7 @@ class InstructorCreateView(generics.CreateAPIView):
         """
         serializer.save(role='staff')
 
-class InstructorDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InstructorDetailView(SerializerQueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     教练详情、更新和删除视图
     """
@@ -291,24 +294,8 @@ class CreateUserMembershipView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # 设置会员有效期
-        start_date = timezone.now().date()
-        end_date = start_date + datetime.timedelta(days=plan.duration)
-        
-        # 更新用户会员信息
-        user.membership_start = start_date
-        user.membership_end = end_date
-        user.membership_type = plan.plan_type
-        user.membership_status = 'active'
-        user.membership_plan_id = plan.id
-        user.membership_plan_name = plan.name
-        user.role = 'member'  # 更新用户角色为会员
-        
-        # 生成会员卡号（如果没有）
-        if not user.member_id:
-            user.member_id = f"M{user.id:06d}"
-            
-        user.save()
+        # 设置会员有效期、角色和会员卡号
+        user.activate_membership(plan)
         
         # 返回更新后的会员信息
         setattr(user, 'membership_plan', plan)
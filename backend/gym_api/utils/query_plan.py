@@ -0,0 +1,64 @@
+"""
+EXPLAIN QUERY PLAN checks for tests.
+
+Wrap an endpoint call in ``assertNoFullScan`` to fail the test when any
+SELECT it runs against the named tables falls back to a full table scan
+instead of an index search.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# "SCAN gym_order" is a full scan; "SCAN gym_order USING INDEX ..." walks an
+# index in order, and "SEARCH ..." is an index lookup. Both are fine.
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+TABLE_ALIAS = re.compile(r'"(\w+)" (\w+)\b')
+
+
+def explain(sql):
+    """
+    SQLite's plan for ``sql`` as a list of detail lines
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(sql, tables):
+    """
+    Plan lines that scan one of ``tables`` (directly or via a Django alias) end to end
+    """
+    names = set(tables)
+    names.update(alias for table, alias in TABLE_ALIAS.findall(sql) if table in tables)
+    scans = []
+    for line in explain(sql):
+        match = FULL_SCAN.match(line.strip())
+        if match and match.group(1) in names:
+            scans.append(line)
+    return scans
+
+
+class QueryPlanAssertionsMixin:
+    """
+    TestCase mixin; the checks are SQLite-specific and pass silently elsewhere
+    """
+
+    @contextmanager
+    def assertNoFullScan(self, *tables):
+        with CaptureQueriesContext(connection) as captured:
+            yield captured
+        if connection.vendor != 'sqlite':
+            return
+        checked = 0
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            if not any(f'"{table}"' in sql for table in tables):
+                continue
+            checked += 1
+            scans = full_scans(sql, tables)
+            self.assertFalse(scans, f'Full table scan in query plan {scans} for:\n{sql}')
+        self.assertTrue(checked, f'No query touched {", ".join(tables)}')
@@ -58,9 +58,11 @@ MIDDLEWARE = [
 ]
 
 # CORS设置
+from corsheaders.defaults import default_headers
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000,http://localhost:5173,http://127.0.0.1:5173').split(',')
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 ROOT_URLCONF = 'gym_project.urls'
 
@@ -149,6 +151,39 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache settings (shared Redis cache when REDIS_URL is set)
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Anonymous catalog response cache
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '60'))
+RESPONSE_CACHE_LOCK_TIMEOUT = 5
+
+# Enrollments for schedules that ended this many days ago move to the archive table
+ENROLLMENT_ARCHIVE_AFTER_DAYS = int(os.getenv('ENROLLMENT_ARCHIVE_AFTER_DAYS', '365'))
+
+# Order numbers reserved per database write by each worker thread
+ORDER_NUMBER_BLOCK_SIZE = int(os.getenv('ORDER_NUMBER_BLOCK_SIZE', '100'))
+
+# Stored responses for Idempotency-Key retries expire after this many seconds
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 60 * 60)))
+
+# Outbox worker: claim lease, retry backoff base and attempts before an event is parked as failed
+OUTBOX_LEASE_SECONDS = 300
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_MAX_ATTEMPTS = 8
+
 # REST Framework 设置
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
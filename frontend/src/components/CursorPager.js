@@ -0,0 +1,18 @@
+import React from 'react';
+import { Button, Space } from 'antd';
+
+// Previous/next controls for a list using useCursorPagination
+const CursorPager = ({ page, loading, onPrevious, onNext }) => (
+  <Space style={{ marginTop: 16, display: 'flex', justifyContent: 'flex-end' }}>
+    {page.count !== null && <span>About {page.count} records</span>}
+    <Button disabled={!page.hasPrevious || loading} onClick={onPrevious}>
+      Previous
+    </Button>
+    <span>Page {page.number}</span>
+    <Button disabled={!page.hasNext || loading} onClick={onNext}>
+      Next
+    </Button>
+  </Space>
+);
+
+export default CursorPager;
@@ -11,6 +11,8 @@ import {
 } from '@ant-design/icons';
 import moment from 'moment';
 import { useNavigate } from 'react-router-dom';
+import CursorPager from '../../../components/CursorPager';
+import { useCursorPagination } from '../../../utils/cursorPagination';
 
 const { TabPane } = Tabs;
 const { Option } = Select;
@@ -26,39 +28,24 @@ const EnrollmentManagementPage = () => {
   const [editingId, setEditingId] = useState(null);
   const navigate = useNavigate();
   
-  // Pagination state
-  const [pagination, setPagination] = useState({
-    current: 1,
-    pageSize: 10,
-    total: 0
-  });
+  // Cursor pagination state (the API returns next/previous links, not page numbers)
+  const page = useCursorPagination(10);
 
-  // Fetch enrollment records with pagination
-  const fetchEnrollments = async (page = 1, pageSize = 10) => {
+  // Fetch one page of enrollment records; by default reload the current page
+  const fetchEnrollments = async (cursor = page.cursor, step = 0) => {
     try {
       setLoading(true);
       const res = await axios.get('/api/courses/enrollments/', {
-        params: {
-          page: page,
-          page_size: pageSize
-        }
+        params: page.paramsFor(cursor)
       });
       
       // Handle paginated response
       if (res.data && res.data.results) {
         setEnrollments(res.data.results);
-        setPagination({
-          current: page,
-          pageSize: pageSize,
-          total: res.data.count || 0
-        });
+        page.update(res.data, cursor, step);
       } else if (Array.isArray(res.data)) {
         // Fallback for non-paginated response
         setEnrollments(res.data);
-        setPagination({
-          ...pagination,
-          total: res.data.length
-        });
       }
     } catch (error) {
       console.error('Failed to get enrollment records:', error);
@@ -109,23 +96,22 @@ const EnrollmentManagementPage = () => {
 
   // Initialize data
   useEffect(() => {
-    fetchEnrollments(pagination.current, pagination.pageSize);
+    fetchEnrollments(null, null);
     fetchCourses();
     fetchUsers();
     fetchSchedules();
   }, []);
 
-  // Handle table pagination change
-  const handleTableChange = (pagination) => {
-    fetchEnrollments(pagination.current, pagination.pageSize);
-  };
+  // Move between pages by following the cursor links
+  const handlePreviousPage = () => fetchEnrollments(page.previous, -1);
+  const handleNextPage = () => fetchEnrollments(page.next, 1);
 
   // Update enrollment status
   const handleStatusChange = async (id, status) => {
     try {
       await axios.patch(`/api/courses/enrollments/${id}/`, { status });
       message.success(`Status updated successfully`);
-      fetchEnrollments(pagination.current, pagination.pageSize);
+      fetchEnrollments();
     } catch (error) {
       console.error('Failed to update status:', error);
       message.error('Failed to update status');
@@ -137,7 +123,7 @@ const EnrollmentManagementPage = () => {
     try {
       await axios.delete(`/api/courses/enrollments/${id}/`);
       message.success('Enrollment record deleted successfully');
-      fetchEnrollments(pagination.current, pagination.pageSize);
+      fetchEnrollments();
     } catch (error) {
       console.error('Failed to delete enrollment record:', error);
       message.error('Failed to delete enrollment record');
@@ -158,7 +144,7 @@ const EnrollmentManagementPage = () => {
       setModalVisible(false);
       form.resetFields();
       setEditingId(null);
-      fetchEnrollments(pagination.current, pagination.pageSize);
+      fetchEnrollments();
     } catch (error) {
       console.error('Failed to save enrollment record:', error);
       message.error('Failed to save enrollment record');
@@ -171,7 +157,7 @@ const EnrollmentManagementPage = () => {
       title: 'No.',
       key: 'index',
       width: 80,
-      render: (_, __, index) => (pagination.current - 1) * pagination.pageSize + index + 1
+      render: (_, __, index) => (page.number - 1) * page.pageSize + index + 1
     },
     {
       title: 'User',
@@ -302,8 +288,13 @@ const EnrollmentManagementPage = () => {
           dataSource={enrollments} 
           rowKey="id" 
           loading={loading}
-          pagination={pagination}
-          onChange={handleTableChange}
+          pagination={false}
+        />
+        <CursorPager
+          page={page}
+          loading={loading}
+          onPrevious={handlePreviousPage}
+          onNext={handleNextPage}
         />
       </Card>
 
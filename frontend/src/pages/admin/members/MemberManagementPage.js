@@ -3,6 +3,8 @@ import { Table, Button, Input, Space, Popconfirm, message, Modal, Form, Select,
 import { SearchOutlined, EditOutlined, DeleteOutlined, PlusOutlined, EyeOutlined } from '@ant-design/icons';
 import axios from 'axios';
 import moment from 'moment';
+import CursorPager from '../../../components/CursorPager';
+import { useCursorPagination } from '../../../utils/cursorPagination';
 
 const { Option } = Select;
 const { RangePicker } = DatePicker;
@@ -13,12 +15,8 @@ const MemberManagementPage = () => {
   const [search, setSearch] = useState('');
   const [form] = Form.useForm();
   
-  // 添加分页状态
-  const [pagination, setPagination] = useState({
-    current: 1,
-    pageSize: 10,
-    total: 0
-  });
+  // 游标分页状态（接口返回 next/previous 链接，不再支持页码）
+  const page = useCursorPagination(10);
   
   // Modal states
   const [isModalVisible, setIsModalVisible] = useState(false);
@@ -30,33 +28,24 @@ const MemberManagementPage = () => {
   const [membershipPlans, setMembershipPlans] = useState([]);
 
   // Fetch member list
-  const fetchMembers = async (page = 1, pageSize = 10) => {
+  const fetchMembers = async (cursor = page.cursor, step = 0) => {
     setLoading(true);
     try {
       const res = await axios.get('/api/users/', { 
         params: { 
           search,
           role: 'member',
-          page,
-          page_size: pageSize
+          ...page.paramsFor(cursor)
         } 
       });
       
       // 处理分页数据
       if (res.data && res.data.results) {
         setMembers(res.data.results);
-        setPagination({
-          current: page,
-          pageSize: pageSize,
-          total: res.data.count || 0
-        });
+        page.update(res.data, cursor, step);
       } else if (Array.isArray(res.data)) {
         // 兼容非分页响应
         setMembers(res.data);
-        setPagination({
-          ...pagination,
-          total: res.data.length
-        });
       }
     } catch (e) {
       console.error('Failed to get member list:', e);
@@ -65,10 +54,9 @@ const MemberManagementPage = () => {
     setLoading(false);
   };
 
-  // 处理分页变化
-  const handleTableChange = (pagination) => {
-    fetchMembers(pagination.current, pagination.pageSize);
-  };
+  // 按游标链接翻页
+  const handlePreviousPage = () => fetchMembers(page.previous, -1);
+  const handleNextPage = () => fetchMembers(page.next, 1);
 
   // Fetch membership plans
   const fetchMembershipPlans = async () => {
@@ -84,7 +72,8 @@ const MemberManagementPage = () => {
   };
 
   useEffect(() => {
-    fetchMembers(pagination.current, pagination.pageSize);
+    // 搜索条件变化时回到第一页
+    fetchMembers(null, null);
     fetchMembershipPlans();
     // eslint-disable-next-line
   }, [search]);
@@ -94,7 +83,7 @@ const MemberManagementPage = () => {
     try {
       await axios.delete(`/api/users/${id}/`);
       message.success('Member deleted successfully');
-      fetchMembers(pagination.current, pagination.pageSize);
+      fetchMembers();
     } catch (error) {
       console.error('Failed to delete member:', error);
       message.error('Failed to delete member');
@@ -187,7 +176,7 @@ const MemberManagementPage = () => {
       }
       
       setIsModalVisible(false);
-      fetchMembers(pagination.current, pagination.pageSize);
+      fetchMembers();
     } catch (error) {
       console.error('Form submission failed:', error);
       message.error(error.response?.data?.error || 'Operation failed');
@@ -225,7 +214,7 @@ const MemberManagementPage = () => {
       title: 'No.',
       key: 'index',
       width: 80,
-      render: (_, __, index) => (pagination.current - 1) * pagination.pageSize + index + 1
+      render: (_, __, index) => (page.number - 1) * page.pageSize + index + 1
     },
     {
       title: 'Username',
@@ -342,8 +331,13 @@ const MemberManagementPage = () => {
         columns={columns}
         dataSource={members}
         loading={loading}
-        pagination={pagination}
-        onChange={handleTableChange}
+        pagination={false}
+      />
+      <CursorPager
+        page={page}
+        loading={loading}
+        onPrevious={handlePreviousPage}
+        onNext={handleNextPage}
       />
       
       {/* Member Form Modal */}
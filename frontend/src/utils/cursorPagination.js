@@ -0,0 +1,35 @@
+import { useState } from 'react';
+
+// Pull the cursor out of a next/previous link; no cursor means the first page
+export const cursorFromLink = (link) =>
+  link ? new URL(link, window.location.origin).searchParams.get('cursor') : null;
+
+// State for lists served with cursor (keyset) pagination: the API returns
+// next/previous links and an estimated count instead of page numbers
+export const useCursorPagination = (pageSize = 10) => {
+  const [page, setPage] = useState({
+    cursor: null,
+    number: 1,
+    next: null,
+    hasNext: false,
+    previous: null,
+    hasPrevious: false,
+    count: null
+  });
+
+  // Query params for one page; the first page has no cursor
+  const paramsFor = (cursor) => (cursor ? { cursor, page_size: pageSize } : { page_size: pageSize });
+
+  // Record a page response. step: 1 = next, -1 = previous, 0 = reload, null = back to the first page
+  const update = (data, cursor, step) => setPage((prev) => ({
+    cursor,
+    number: step === null ? 1 : Math.max(1, prev.number + step),
+    next: cursorFromLink(data.next),
+    hasNext: Boolean(data.next),
+    previous: cursorFromLink(data.previous),
+    hasPrevious: Boolean(data.previous),
+    count: data.count ?? null
+  }));
+
+  return { ...page, pageSize, paramsFor, update };
+};